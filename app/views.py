@@ -2,6 +2,8 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
 
+from nutrichoice.prices import get_aggregator
+
 def analyze_roster(request):
     return JsonResponse({"message": "Roster analysis endpoint working!"})
 
@@ -14,8 +16,33 @@ def snap_meal(request):
 def calculate_score(request):
     return JsonResponse({"message": "Score calculation working!"})
 
+def _json_body(request):
+    """The request's JSON object, or None if the body isn't one."""
+    try: body = json.loads(request.body or b"{}")
+    except ValueError: return None
+    return body if isinstance(body, dict) else None
+
+@csrf_exempt
 def compare_prices(request):
-    return JsonResponse({"message": "Price comparison working!"})
+    body = _json_body(request)
+    if not body or not isinstance(body.get("item_name"), str) or not body["item_name"].strip():
+        return JsonResponse({"error": "item_name is required"}, status=400)
+    return JsonResponse(get_aggregator().compare(body["item_name"]), json_dumps_params={"ensure_ascii": False})
+
+@csrf_exempt
+def compare_prices_batch(request):
+    # {"items": [...]} and/or {"meal_plan": <generate-meal-plan response>}
+    body = _json_body(request)
+    if body is None: return JsonResponse({"error": "Body must be a JSON object"}, status=400)
+    items = body.get("items", [])
+    if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+        return JsonResponse({"error": "items must be a list of strings"}, status=400)
+    if body.get("meal_plan") is not None and not isinstance(body["meal_plan"], dict):
+        return JsonResponse({"error": "meal_plan must be an object"}, status=400)
+    aggregator = get_aggregator()
+    if body.get("meal_plan"):
+        items += aggregator.shopping_list(body["meal_plan"])
+    return JsonResponse(aggregator.compare_list(items), json_dumps_params={"ensure_ascii": False})
 
 def generate_meal_plan(request):
     return JsonResponse({"message": "Meal plan generation working!"})
@@ -0,0 +1,71 @@
+import contextvars
+import os
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from nutrichoice.admission import CONNECT_TIMEOUT, AsyncAdmissionGate, Deadline
+from nutrichoice.observability import ADMISSION
+
+# Same policy as the Django backend (both use nutrichoice/admission.py): each AI request
+# gets AI_DEADLINE_SECONDS end to end, split across its provider attempts. Per worker and
+# endpoint, AI_CONCURRENCY_LIMIT run at once, AI_QUEUE_LIMIT more wait up to
+# AI_QUEUE_WAIT_SECONDS, the rest get an immediate 503.
+AI_DEADLINE_SECONDS = float(os.environ.get("AI_DEADLINE_SECONDS", 25))
+AI_CONCURRENCY_LIMIT = int(os.environ.get("AI_CONCURRENCY_LIMIT", 8))
+AI_QUEUE_LIMIT = int(os.environ.get("AI_QUEUE_LIMIT", 8))
+AI_QUEUE_WAIT_SECONDS = float(os.environ.get("AI_QUEUE_WAIT_SECONDS", 2))
+AI_RETRY_AFTER_SECONDS = int(os.environ.get("AI_RETRY_AFTER_SECONDS", 5))
+
+# path -> endpoint label for the AI-backed routes
+ADMITTED_PATHS = {
+    "/snap-meal": "snap_meal",
+    "/analyze-roster": "analyze_roster",
+    "/generate-meal-plan": "generate_meal_plan",
+    "/generate-workout": "generate_workout",
+    "/log-meal": "log_meal",
+}
+
+
+current_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+def deadline():
+    """The current request's deadline (a fresh one outside a request, e.g. in scripts)."""
+    return current_deadline.get() or Deadline(AI_DEADLINE_SECONDS)
+
+
+_gates = {}
+
+
+def get_gate(endpoint):
+    # Only touched from the event loop thread, so no lock
+    if endpoint not in _gates:
+        _gates[endpoint] = AsyncAdmissionGate(AI_CONCURRENCY_LIMIT, AI_QUEUE_LIMIT, AI_QUEUE_WAIT_SECONDS)
+    return _gates[endpoint]
+
+
+def in_flight():
+    """AI requests currently running on this worker, across all endpoints."""
+    return sum(gate.active for gate in list(_gates.values()))
+
+
+async def admission_middleware(request: Request, call_next):
+    endpoint = ADMITTED_PATHS.get(request.url.path)
+    if endpoint is None:
+        return await call_next(request)
+
+    token = current_deadline.set(Deadline(AI_DEADLINE_SECONDS))
+    try:
+        gate = get_gate(endpoint)
+        result = await gate.acquire()
+        ADMISSION.labels(endpoint, result or "rejected").inc()
+        if result is None:
+            return JSONResponse({"error": "Server busy. Try again shortly."}, status_code=503,
+                                headers={"Retry-After": str(AI_RETRY_AFTER_SECONDS)})
+        try:
+            return await call_next(request)
+        finally:
+            await gate.release()
+    finally:
+        current_deadline.reset(token)
@@ -1,17 +1,34 @@
-import json
+import functools
 import io
 import time
 import requests
-import random
 import base64
 import re
-import ast
+import os
+import sqlite3
+import sys
+from contextlib import asynccontextmanager
 from typing import List, Optional
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import google.generativeai as genai
-from PIL import Image
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+# The nutrichoice package (code shared with the Django app) lives at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import CONNECT_TIMEOUT, admission_middleware, deadline, in_flight
+from meal_parser import FoodLexicon, summarize
+from meal_plans import MEAL_PLAN_WARMER, WARM_CALLS_PER_MINUTE, PlanStore, Warmer, bucket_key, calorie_band
+from nutrichoice.ai_schemas import (MealEstimate, MealPlanResult, RosterResult, SnapMealResult, WorkoutResult,
+                                    accept_reply, gemini_schema, openai_response_format)
+from nutrichoice.json_utils import clean_and_parse_json
+from nutrichoice.prices import get_aggregator
+from nutrichoice.observability import configure_logging, logger, provider_attempt, record_source, render_metrics, span
+from profiling import download_profile, is_admin, list_profiles, profiled, profiling_middleware
+
+configure_logging()
 
 # --- 1. CONFIGURATION ---
 KEYS = {
@@ -21,121 +38,216 @@ KEYS = {
     "MISTRAL": "jvZCWrEEw92UXOdTAISsim9eVUT1UkSL" 
 }
 
-genai.configure(api_key=KEYS["GEMINI"])
+# Provider endpoints. Point these at benchmarks/stub_llm.py to load-test without real quota.
+GEMINI_API_ENDPOINT = os.environ.get("GEMINI_API_ENDPOINT")
+MISTRAL_URL = os.environ.get("MISTRAL_URL", "https://api.mistral.ai/v1/chat/completions")
+GROQ_URL = os.environ.get("GROQ_URL", "https://api.groq.com/openai/v1/chat/completions")
 
-# --- HELPER: ROBUST JSON PARSER ---
-def clean_and_parse_json(text):
-    """
-    Surgically extracts JSON from messy AI responses.
-    """
-    print(f"\n--- RAW AI RESPONSE START ---\n{text}\n--- RAW AI RESPONSE END ---\n")
+# Structured output: each endpoint asks for JSON matching its ai_schemas model and every reply
+# is validated; an invalid one fails over to the next provider. STRUCTURED_OUTPUT=0 goes back
+# to free-form replies parsed by json_utils.
+STRUCTURED_OUTPUT = os.environ.get("STRUCTURED_OUTPUT", "1").lower() in ("1", "true", "yes")
 
-    # 1. Regex to find the largest outer block starting with { and ending with }
-    match = re.search(r'\{.*\}', text, re.DOTALL)
-    if match:
-        json_str = match.group(0)
+# google.generativeai (~0.8s) and PIL load on the first Gemini call, not at worker start
+@functools.cache
+def gemini():
+    import google.generativeai as genai
+    if GEMINI_API_ENDPOINT:
+        # A custom endpoint only works over REST, not gRPC
+        genai.configure(api_key=KEYS["GEMINI"], transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
     else:
-        return None
+        genai.configure(api_key=KEYS["GEMINI"])
+    return genai
 
-    # 2. Try standard parsing
-    try:
-        return json.loads(json_str)
-    except:
-        pass
+def structured(schema):
+    """The schema to request, or None in free-form mode."""
+    return schema if STRUCTURED_OUTPUT else None
+
+def gemini_config(schema):
+    return {"response_mime_type": "application/json", "response_schema": gemini_schema(schema)} if schema else None
+
+def json_object(schema):
+    # For providers/models without json_schema support: valid JSON guaranteed, shape checked by us
+    return {"type": "json_object"} if schema else None
+
+def accept(text, schema, attempt):
+    # The shared validate-or-fail-over step, with this backend's JSON repair
+    return accept_reply(text, schema, attempt, repair=clean_and_parse_json)
+
+def reply_data(result, schema):
+    """Endpoint side: structured results are already dicts, free-form text still needs repair."""
+    if not result or schema is not None:
+        return result
+    with span('json_repair'):
+        return clean_and_parse_json(result)
+
+# Django's DB, used read-only to extend the meal parser lexicon with FoodItem names
+FOOD_DB_PATH = os.environ.get(
+    "FOOD_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "db.sqlite3")
+)
 
-    # 3. Last Resort: Python literal_eval
+def load_food_items():
+    """Reads (name, calories, protein, carbs, fat) rows from store_fooditem, if reachable."""
     try:
-        return ast.literal_eval(json_str)
-    except:
-        return None
+        conn = sqlite3.connect(f"file:{FOOD_DB_PATH}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT name, calories, protein, carbs, fat FROM store_fooditem").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("FoodItem lexicon unavailable", extra={'error': str(e)})
+        return []
+
+LEXICON = FoodLexicon(load_food_items())
+
+def _grams(value):
+    match = re.search(r"\d+(?:\.\d+)?", str(value or 0))
+    return float(match.group(0)) if match else 0.0
 
 # --- 2. VISION ENGINE (Gemini -> Mistral -> Groq) ---
-def generate_vision_content(prompt, image_bytes):
+# Both engines return (text, source) like the Django provider layers, or (None, None); with a
+# schema, (validated dict, source). Each attempt's timeout is its share of the request deadline.
+@profiled
+def generate_vision_content(prompt, image_bytes, schema=None):
+    budget = deadline()
+
     # 1. Try Gemini
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash') 
-        image = Image.open(io.BytesIO(image_bytes))
-        response = model.generate_content([prompt, image])
-        return response.text
-    except Exception as e:
-        print(f"⚠️ Gemini Vision Failed: {e}")
+        with provider_attempt(0, "gemini-1.5-flash") as attempt:
+            model = gemini().GenerativeModel('gemini-1.5-flash') 
+            with span('image_encode', kind='pil'):
+                from PIL import Image
+                image = Image.open(io.BytesIO(image_bytes))
+            response = model.generate_content([prompt, image], generation_config=gemini_config(schema),
+                                              request_options={"timeout": budget.attempt_timeout(3)})
+            result = accept(response.text, schema, attempt)
+            attempt['ok'] = True
+            return result, "Gemini Vision"
+    except Exception:
+        pass  # logged by provider_attempt
+
+    with span('image_encode', kind='base64'):
+        base64_image = base64.b64encode(image_bytes).decode('utf-8')
 
     # 2. Try Mistral Pixtral
+    if budget.expired(): return None, None
     try:
-        print("👁️ Trying Mistral Pixtral...")
-        base64_image = base64.b64encode(image_bytes).decode('utf-8')
-        headers = {"Authorization": f"Bearer {KEYS['MISTRAL']}", "Content-Type": "application/json"}
-        data = {
-            "model": "pixtral-12b-2409", 
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt + " Return JSON object ONLY. No conversational text."},
-                        {"type": "image_url", "image_url": f"data:image/jpeg;base64,{base64_image}"}
-                    ]
-                }
-            ],
-            "temperature": 0.1
-        }
-        resp = requests.post("https://api.mistral.ai/v1/chat/completions", headers=headers, json=data)
-        if resp.status_code == 200: 
-            return resp.json()['choices'][0]['message']['content']
-        else: 
-            print(f"⚠️ Mistral Error: {resp.text}")
-    except Exception as e:
-        print(f"⚠️ Mistral Vision Failed: {e}")
+        with provider_attempt(1, "pixtral-12b-2409") as attempt:
+            headers = {"Authorization": f"Bearer {KEYS['MISTRAL']}", "Content-Type": "application/json"}
+            data = {
+                "model": "pixtral-12b-2409", 
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": prompt + " Return JSON object ONLY. No conversational text."},
+                            {"type": "image_url", "image_url": f"data:image/jpeg;base64,{base64_image}"}
+                        ]
+                    }
+                ],
+                "temperature": 0.1
+            }
+            if schema: data["response_format"] = openai_response_format(schema)
+            resp = requests.post(MISTRAL_URL, headers=headers, json=data, timeout=(CONNECT_TIMEOUT, budget.attempt_timeout(2)))
+            if resp.status_code == 200: 
+                result = accept(resp.json()['choices'][0]['message']['content'], schema, attempt)
+                attempt['ok'] = True
+                return result, "Mistral Pixtral"
+            attempt['error'] = f"HTTP {resp.status_code}: {resp.text[:150]}"
+    except Exception:
+        pass
 
     # 3. Try Groq Vision
+    if budget.expired(): return None, None
     try:
-        base64_image = base64.b64encode(image_bytes).decode('utf-8')
-        headers = {"Authorization": f"Bearer {KEYS['GROQ']}", "Content-Type": "application/json"}
-        data = {
-            "model": "llama-3.2-11b-vision-preview",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                    ]
-                }
-            ]
-        }
-        resp = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data)
-        if resp.status_code == 200: return resp.json()['choices'][0]['message']['content']
+        with provider_attempt(2, "llama-3.2-11b-vision-preview") as attempt:
+            headers = {"Authorization": f"Bearer {KEYS['GROQ']}", "Content-Type": "application/json"}
+            data = {
+                "model": "llama-3.2-11b-vision-preview",
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": prompt},
+                            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+                        ]
+                    }
+                ]
+            }
+            if schema: data["response_format"] = json_object(schema)
+            resp = requests.post(GROQ_URL, headers=headers, json=data, timeout=(CONNECT_TIMEOUT, budget.attempt_timeout(1)))
+            if resp.status_code == 200:
+                result = accept(resp.json()['choices'][0]['message']['content'], schema, attempt)
+                attempt['ok'] = True
+                return result, "Groq Vision"
+            attempt['error'] = f"HTTP {resp.status_code}"
     except:
         pass
 
-    return None
+    return None, None
 
 # --- 3. TEXT ENGINE ---
-def generate_text_with_failover(user_prompt, system_instruction=""):
+def generate_text_with_failover(user_prompt, system_instruction="", schema=None):
+    budget = deadline()
+
     # 1. Gemini
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
-        return model.generate_content(f"{system_instruction}\n{user_prompt}").text
+        with provider_attempt(0, "gemini-2.0-flash-lite") as attempt:
+            model = gemini().GenerativeModel('gemini-2.0-flash-lite')
+            text = model.generate_content(f"{system_instruction}\n{user_prompt}", generation_config=gemini_config(schema),
+                                          request_options={"timeout": budget.attempt_timeout(3)}).text
+            result = accept(text, schema, attempt)
+            attempt['ok'] = True
+            return result, "Gemini"
     except: pass
 
     # 2. Groq
+    if budget.expired(): return None, None
     try:
-        headers = {"Authorization": f"Bearer {KEYS['GROQ']}", "Content-Type": "application/json"}
-        data = {"messages": [{"role": "system", "content": system_instruction}, {"role": "user", "content": user_prompt}], "model": "llama3-8b-8192"}
-        resp = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data)
-        if resp.status_code == 200: return resp.json()['choices'][0]['message']['content']
+        with provider_attempt(1, "llama3-8b-8192") as attempt:
+            headers = {"Authorization": f"Bearer {KEYS['GROQ']}", "Content-Type": "application/json"}
+            data = {"messages": [{"role": "system", "content": system_instruction}, {"role": "user", "content": user_prompt}], "model": "llama3-8b-8192"}
+            if schema: data["response_format"] = json_object(schema)
+            resp = requests.post(GROQ_URL, headers=headers, json=data, timeout=(CONNECT_TIMEOUT, budget.attempt_timeout(2)))
+            if resp.status_code == 200:
+                result = accept(resp.json()['choices'][0]['message']['content'], schema, attempt)
+                attempt['ok'] = True
+                return result, "Groq"
+            attempt['error'] = f"HTTP {resp.status_code}"
     except: pass
 
     # 3. Mistral
+    if budget.expired(): return None, None
     try:
-        headers = {"Authorization": f"Bearer {KEYS['MISTRAL']}", "Content-Type": "application/json"}
-        data = {"messages": [{"role": "system", "content": system_instruction}, {"role": "user", "content": user_prompt}], "model": "open-mistral-nemo"}
-        resp = requests.post("https://api.mistral.ai/v1/chat/completions", headers=headers, json=data)
-        if resp.status_code == 200: return resp.json()['choices'][0]['message']['content']
+        with provider_attempt(2, "open-mistral-nemo") as attempt:
+            headers = {"Authorization": f"Bearer {KEYS['MISTRAL']}", "Content-Type": "application/json"}
+            data = {"messages": [{"role": "system", "content": system_instruction}, {"role": "user", "content": user_prompt}], "model": "open-mistral-nemo"}
+            if schema: data["response_format"] = openai_response_format(schema)
+            resp = requests.post(MISTRAL_URL, headers=headers, json=data, timeout=(CONNECT_TIMEOUT, budget.attempt_timeout(1)))
+            if resp.status_code == 200:
+                result = accept(resp.json()['choices'][0]['message']['content'], schema, attempt)
+                attempt['ok'] = True
+                return result, "Mistral"
+            attempt['error'] = f"HTTP {resp.status_code}"
     except: pass
 
-    return None
+    return None, None
+
+@functools.cache
+def plan_store():
+    return PlanStore()
+
+@asynccontextmanager
+async def lifespan(app):
+    # Background refill of the meal-plan buckets users actually ask for, while this worker is idle
+    warmer = None
+    if MEAL_PLAN_WARMER and WARM_CALLS_PER_MINUTE > 0:
+        warmer = Warmer(plan_store(), lambda *bucket: build_meal_plan(*bucket)[0], lambda: in_flight() == 0)
+        warmer.start()
+    yield
+    if warmer: warmer.stop()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -143,6 +255,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.middleware("http")(profiling_middleware)
+# Registered last so it runs first: overload is refused before any other work
+app.middleware("http")(admission_middleware)
 
 # --- MODELS ---
 class MealPlanRequest(BaseModel):
@@ -161,9 +276,14 @@ class MealLogRequest(BaseModel):
 class PriceRequest(BaseModel):
     item_name: str
 
+class ShoppingListRequest(BaseModel):
+    items: List[str] = []
+    meal_plan: Optional[dict] = None  # a /generate-meal-plan response
+
 # --- ENDPOINTS ---
 
 @app.post("/snap-meal")
+@profiled
 async def log_meal_image(file: UploadFile = File(...), user_goal: str = Form("Maintain")):
     try:
         contents = await file.read()
@@ -185,17 +305,22 @@ async def log_meal_image(file: UploadFile = File(...), user_goal: str = Form("Ma
             "advice": "1 sentence explanation."
         }}
         """
-        raw_text = generate_vision_content(prompt, contents)
+        # Off the event loop: a slow provider must not stall every other request on this worker
+        schema = structured(SnapMealResult)
+        result, source = await run_in_threadpool(generate_vision_content, prompt, contents, schema)
         
-        if raw_text:
-            data = clean_and_parse_json(raw_text)
-            if data: return data
+        if result:
+            data = reply_data(result, schema)
+            if data:
+                record_source('snap_meal', source)
+                return data
             else: raise Exception("Parse Failed")
         else: 
             raise Exception("All AIs Failed")
 
     except Exception as e:
-        print(f"Snap Error: {e}")
+        logger.warning("Snap failed", extra={'error': str(e)})
+        record_source('snap_meal', None, fallback='scan_failed')
         return {
             "estimated_calories": 0, 
             "macros": {"protein": "0g", "carbs": "0g", "fat": "0g"}, 
@@ -205,62 +330,143 @@ async def log_meal_image(file: UploadFile = File(...), user_goal: str = Form("Ma
         }
 
 @app.post("/analyze-roster")
+@profiled
 async def analyze_roster(file: UploadFile = File(...)):
     try:
         contents = await file.read()
         prompt = "Extract weekly schedule to JSON. Keys=Days, Values=List of {time, event}. RAW JSON ONLY."
         
-        raw_text = generate_vision_content(prompt, contents)
-        if raw_text:
-            data = clean_and_parse_json(raw_text)
-            if data: return data
+        # Off the event loop: a slow provider must not stall every other request on this worker
+        schema = structured(RosterResult)
+        result, source = await run_in_threadpool(generate_vision_content, prompt, contents, schema)
+        if result:
+            data = reply_data(result, schema)
+            if data:
+                record_source('analyze_roster', source)
+                return data
             
         raise Exception("Parse Error")
     except:
+        record_source('analyze_roster', None, fallback='ai_offline')
         return {"weekly_schedule": {"Error": [{"time": "00:00", "event": "AI Offline"}]}}
 
-@app.post("/generate-meal-plan")
-def generate_meal_plan(request: MealPlanRequest):
+def build_meal_plan(goal, calories, preference):
+    """One LLM-generated plan as (data, source); data is None if no provider gave parseable JSON."""
     sys = "Nutritionist. JSON Only."
-    user = f"Create 1-day meal plan. Goal: {request.user_goal}, {request.daily_calories} cal. JSON Structure: {{ 'analysis': 'str', 'meals': [ {{ 'type': 'Breakfast', 'name': 'str', 'calories': int, 'nutrients': {{ 'protein': 'str' }}, 'recipe': ['step1'] }} ] }}"
-    res = generate_text_with_failover(user, sys)
+    user = f"Create 1-day {preference} meal plan. Goal: {goal}, {calories} cal. JSON Structure: {{ 'analysis': 'str', 'meals': [ {{ 'type': 'Breakfast', 'name': 'str', 'calories': int, 'nutrients': {{ 'protein': 'str' }}, 'recipe': ['step1'] }} ] }}"
+    schema = structured(MealPlanResult)
+    res, source = generate_text_with_failover(user, sys, schema)
     if res:
-        data = clean_and_parse_json(res)
-        if data: return data
+        data = reply_data(res, schema)
+        if isinstance(data, dict) and data.get("meals"):
+            return data, source
+    return None, source
+
+@app.post("/generate-meal-plan")
+@profiled
+def generate_meal_plan(request: MealPlanRequest):
+    # Generic requests share plans per (goal, 100-kcal band, preference) bucket; the LLM only
+    # runs on a miss. Plans built around the user's own ingredients are never shared.
+    bucket = None if request.available_ingredients else bucket_key(request.user_goal, request.daily_calories, request.dietary_preference)
+    if bucket:
+        try:
+            with span('plan_cache'):
+                plan = plan_store().take(bucket)
+            if plan:
+                record_source('generate_meal_plan', 'Plan Cache')
+                return plan
+        except sqlite3.Error as e:
+            logger.warning("meal plan cache unavailable", extra={'error': str(e)})
+
+    calories = calorie_band(request.daily_calories) if bucket else request.daily_calories
+    data, source = build_meal_plan(request.user_goal, calories, request.dietary_preference)
+    if data:
+        if bucket:
+            try: plan_store().add(bucket, data)
+            except sqlite3.Error as e: logger.warning("meal plan cache unavailable", extra={'error': str(e)})
+        record_source('generate_meal_plan', source)
+        return data
+    record_source('generate_meal_plan', source, fallback='offline_plan')
     return {"analysis": "Offline Plan", "meals": []}
 
 @app.post("/generate-workout")
+@profiled
 def generate_workout(request: WorkoutRequest):
     sys = "Trainer. JSON Only."
     user = f"Workout: {request.context}. JSON Structure: {{ 'advice': 'str', 'exercises': [ {{ 'name': 'str', 'sets': 'str', 'reps': 'str' }} ] }}"
-    res = generate_text_with_failover(user, sys)
+    schema = structured(WorkoutResult)
+    res, source = generate_text_with_failover(user, sys, schema)
     if res:
-        data = clean_and_parse_json(res)
-        if data: return data
+        data = reply_data(res, schema)
+        if data:
+            record_source('generate_workout', source)
+            return data
+    record_source('generate_workout', source, fallback='offline_routine')
     return {"advice": "Offline Routine", "exercises": []}
 
+def estimate_with_llm(fragments):
+    """LLM fallback for the parts of a meal the local parser couldn't resolve."""
+    sys = "JSON Only."
+    user = f"Analyze: {', '.join(fragments)}. JSON Structure: {{ 'estimated_calories': int, 'macros': {{ 'protein': 'str', 'carbs': 'str', 'fat': 'str' }}, 'ingredients': ['str'] }}"
+    schema = structured(MealEstimate)
+    res, _ = generate_text_with_failover(user, sys, schema)
+    data = reply_data(res, schema)
+    if not isinstance(data, dict):
+        return [{"item": f, "calories": 0, "source": "unresolved"} for f in fragments]
+
+    macros = data.get("macros") or {}
+    names = data.get("ingredients") or fragments
+    return [{
+        "item": ", ".join(str(n) for n in names),
+        "calories": int(_grams(data.get("estimated_calories"))),
+        "protein": _grams(macros.get("protein")),
+        "carbs": _grams(macros.get("carbs")),
+        "fat": _grams(macros.get("fat")),
+        "source": "llm",
+    }]
+
 @app.post("/log-meal")
+@profiled
 def log_meal_text(meal_log: MealLogRequest):
-    sys = "JSON Only."
-    user = f"Analyze: {meal_log.meal_description}. JSON Structure: {{ 'estimated_calories': int, 'macros': {{ 'protein': 'str', 'carbs': 'str', 'fat': 'str' }}, 'ingredients': ['str'] }}"
-    res = generate_text_with_failover(user, sys)
-    if res:
-        data = clean_and_parse_json(res)
-        if data: return data
-    return {"estimated_calories": 0}
+    # Common items ("2 rotis, 1 bowl dal") are answered locally; only leftovers hit the LLM
+    with span('meal_parse'):
+        items, unresolved = LEXICON.parse(meal_log.meal_description)
+    if unresolved:
+        items += estimate_with_llm(unresolved)
+
+    data = summarize(items)
+    sources = {i["source"] for i in items}
+    if sources == {"local"}: data["ai_source"] = "Local Parser"
+    elif "local" in sources: data["ai_source"] = "Local Parser + LLM"
+    elif "llm" in sources: data["ai_source"] = "LLM"
+    else: data["ai_source"] = "Offline"
+    record_source('log_meal', data["ai_source"], fallback='unresolved' if data["ai_source"] == "Offline" else None)
+    return data
 
 @app.post("/compare-prices")
+@profiled
 def compare_prices(request: PriceRequest):
-    base = 100
-    blinkit = base + random.randint(-15, 10)
-    zepto = base + random.randint(-15, 10)
-    return {
-        "item": request.item_name,
-        "results": [
-            { "store": "Blinkit", "price": blinkit, "currency": "₹", "link": f"[https://blinkit.com/s/?q=](https://blinkit.com/s/?q=){request.item_name}", "is_cheapest": blinkit < zepto },
-            { "store": "Zepto", "price": zepto, "currency": "₹", "link": f"[https://www.google.com/search?q=](https://www.google.com/search?q=){request.item_name}+zepto", "is_cheapest": zepto < blinkit }
-        ]
-    }
+    return get_aggregator().compare(request.item_name)
+
+@app.post("/compare-prices/batch")
+@profiled
+def compare_prices_batch(request: ShoppingListRequest):
+    # One fan-out per store for the whole list; repeated items are priced once
+    aggregator = get_aggregator()
+    items = list(request.items)
+    if request.meal_plan:
+        items += aggregator.shopping_list(request.meal_plan)
+    return aggregator.compare_list(items)
+
+@app.get("/metrics")
+def metrics(request: Request):
+    # Same admin token as /profiles (PROFILING_TOKEN)
+    if not is_admin(request): raise HTTPException(status_code=403)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+app.get("/profiles")(list_profiles)
+app.get("/profiles/{profile_id}.{ext}")(download_profile)
 
 if __name__ == "__main__":
     import uvicorn
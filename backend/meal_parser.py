@@ -0,0 +1,204 @@
+import re
+
+# --- 1. PORTION TABLE ---
+# Nutrition per standard serving: (serving grams/ml, kcal, protein, carbs, fat)
+PORTIONS = {
+    "roti":            (40,  110, 3.0, 18.0, 3.0),
+    "paratha":         (80,  260, 5.0, 36.0, 10.0),
+    "naan":            (90,  260, 9.0, 45.0, 5.0),
+    "bread":           (30,  80,  3.0, 14.0, 1.0),
+    "rice":            (150, 195, 4.0, 42.0, 0.5),
+    "brown rice":      (150, 165, 3.5, 34.0, 1.3),
+    "biryani":         (300, 500, 20.0, 60.0, 18.0),
+    "khichdi":         (200, 240, 8.0, 40.0, 5.0),
+    "poha":            (150, 250, 5.0, 45.0, 6.0),
+    "upma":            (150, 230, 6.0, 33.0, 8.0),
+    "idli":            (40,  58,  2.0, 12.0, 0.4),
+    "dosa":            (100, 170, 4.0, 28.0, 4.0),
+    "oats":            (40,  150, 5.0, 27.0, 2.5),
+    "dal":             (150, 180, 9.0, 24.0, 5.0),
+    "sambar":          (150, 130, 6.0, 18.0, 4.0),
+    "rajma":           (150, 210, 11.0, 30.0, 5.0),
+    "chole":           (150, 240, 10.0, 32.0, 8.0),
+    "sabzi":           (150, 120, 3.0, 12.0, 7.0),
+    "salad":           (100, 35,  1.5, 7.0, 0.2),
+    "paneer":          (100, 265, 18.0, 3.6, 21.0),
+    "chicken curry":   (150, 240, 25.0, 5.0, 13.0),
+    "chicken breast":  (100, 165, 31.0, 0.0, 3.6),
+    "chicken":         (100, 190, 27.0, 0.0, 8.0),
+    "fish":            (100, 140, 22.0, 0.0, 5.0),
+    "egg":             (50,  78,  6.0, 0.6, 5.0),
+    "omelette":        (100, 155, 11.0, 1.0, 12.0),
+    "milk":            (250, 150, 8.0, 12.0, 8.0),
+    "curd":            (150, 90,  5.0, 7.0, 5.0),
+    "lassi":           (250, 180, 6.0, 28.0, 5.0),
+    "tea":             (150, 90,  3.0, 12.0, 3.0),
+    "coffee":          (150, 60,  2.0, 8.0, 2.0),
+    "banana":          (120, 105, 1.3, 27.0, 0.4),
+    "apple":           (180, 95,  0.5, 25.0, 0.3),
+    "orange":          (130, 62,  1.2, 15.0, 0.2),
+    "samosa":          (60,  260, 4.0, 24.0, 17.0),
+    "ghee":            (14,  125, 0.0, 0.0, 14.0),
+    "butter":          (10,  72,  0.1, 0.0, 8.0),
+    "peanut butter":   (16,  95,  4.0, 3.0, 8.0),
+    "almonds":         (28,  165, 6.0, 6.0, 14.0),
+    "whey":            (30,  120, 24.0, 3.0, 1.5),
+}
+
+ALIASES = {
+    "chapati": "roti", "chapatti": "roti", "phulka": "roti",
+    "daal": "dal", "dhal": "dal",
+    "dahi": "curd", "yogurt": "curd", "yoghurt": "curd",
+    "chai": "tea",
+    "chana masala": "chole", "chickpea curry": "chole",
+    "omelet": "omelette", "boiled egg": "egg",
+    "sabji": "sabzi", "vegetable curry": "sabzi",
+    "protein shake": "whey", "whey protein": "whey",
+    "almond": "almonds",
+}
+
+# Grams (or ml) per unit. None means "one standard serving".
+UNITS = {
+    "piece": None, "serving": None, "portion": None,
+    "bowl": 150, "katori": 150, "cup": 240, "glass": 250, "plate": 300,
+    "slice": 30, "scoop": 30, "handful": 28,
+    "tbsp": 15, "tablespoon": 15, "tsp": 5, "teaspoon": 5,
+    "g": 1, "gm": 1, "gram": 1, "kg": 1000, "ml": 1, "l": 1000, "litre": 1000, "liter": 1000,
+}
+
+SIZES = {"small": 0.75, "medium": 1.0, "large": 1.5, "big": 1.5}
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "twelve": 12,
+    "half": 0.5, "quarter": 0.25, "couple": 2, "dozen": 12,
+}
+
+SPLIT_RE = re.compile(r"\s*(?:,|;|&|\+|\band\b|\bwith\b|\bplus\b)\s*")
+NUMBER_RE = r"\d+(?:\.\d+)?(?:/\d+)?"
+
+
+def _plurals(word):
+    yield word
+    yield word + "s"
+    yield word + "es"
+    if word.endswith("y"):
+        yield word[:-1] + "ies"
+
+
+def _alternation(words):
+    # Longest first so "peanut butter" wins over "butter"
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+def _number(token):
+    if token in NUMBER_WORDS:
+        return NUMBER_WORDS[token]
+    num, _, den = token.partition("/")
+    try:
+        value = float(num) / float(den or 1)
+    except ZeroDivisionError:
+        # "1/0" is a typo, not a quantity; read it as one serving
+        value = 1.0
+    return int(value) if value.is_integer() else value
+
+
+# --- 2. COMPILED LEXICON ---
+class FoodLexicon:
+    """
+    Maps free-text food names to portion entries. One compiled regex strips the quantity,
+    size and unit; what's left must be a known name (or alias) in full.
+    Extra names (e.g. FoodItem rows) are per-serving only, with no gram weight, so a
+    weight or volume unit leaves them unresolved.
+    """
+
+    def __init__(self, extra_foods=()):
+        self.entries = {name: PORTIONS[name] for name in PORTIONS}
+        for name, calories, protein, carbs, fat in extra_foods:
+            key = (name or "").strip().lower()
+            if key and key not in self.entries and key not in ALIASES:
+                self.entries[key] = (None, calories or 0, protein or 0, carbs or 0, fat or 0)
+
+        self.surface = {}
+        for name in self.entries:
+            for form in _plurals(name):
+                self.surface.setdefault(form, name)
+        for alias, name in ALIASES.items():
+            for form in _plurals(alias):
+                self.surface.setdefault(form, name)
+
+        unit_forms = {form: unit for unit in UNITS for form in _plurals(unit)}
+        self.unit_forms = unit_forms
+        self.item_re = re.compile(
+            r"^(?:(?P<qty>" + NUMBER_RE + r"|(?:" + _alternation(NUMBER_WORDS) + r")\b)\s*(?:an?\s+)?(?:of\s+)?)?"
+            r"(?:(?P<size>" + _alternation(SIZES) + r")\s+)?"
+            r"(?:(?P<unit>" + _alternation(unit_forms) + r")\b\.?\s*(?:of\s+)?)?"
+            r"(?P<rest>.*)$"
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def parse_item(self, fragment):
+        """Returns a resolved item dict, or None if the food or its quantity can't be resolved."""
+        m = self.item_re.match(fragment)
+        # The whole name must match: "chicken biryani" is not "chicken", so it goes to the LLM
+        name = self.surface.get(" ".join(m.group("rest").split()))
+        if not name:
+            return None
+
+        serving_g, calories, protein, carbs, fat = self.entries[name]
+        qty = _number(m.group("qty")) if m.group("qty") else 1
+        unit = self.unit_forms.get(m.group("unit")) if m.group("unit") else None
+        unit_g = UNITS.get(unit) if unit else None
+
+        # Scale everything to "number of standard servings"
+        servings = qty
+        if unit_g:
+            if not serving_g:
+                # Per-serving entries (FoodItem rows) can't convert "200g"; leave it to the LLM
+                return None
+            servings = qty * unit_g / serving_g
+        if m.group("size"):
+            servings *= SIZES[m.group("size")]
+
+        return {
+            "item": name,
+            "quantity": qty,
+            "unit": unit or "serving",
+            "calories": round(calories * servings),
+            "protein": round(protein * servings, 1),
+            "carbs": round(carbs * servings, 1),
+            "fat": round(fat * servings, 1),
+            "source": "local",
+        }
+
+    def parse(self, text):
+        """
+        Splits a meal description into items.
+        Returns (resolved_items, unresolved_fragments).
+        """
+        resolved, unresolved = [], []
+        for fragment in SPLIT_RE.split((text or "").lower().strip().rstrip(".")):
+            fragment = fragment.strip()
+            if not fragment:
+                continue
+            item = self.parse_item(fragment)
+            if item:
+                resolved.append(item)
+            else:
+                unresolved.append(fragment)
+        return resolved, unresolved
+
+
+def summarize(items):
+    """Builds the /log-meal response body from a list of item dicts."""
+    protein = sum(i.get("protein", 0) for i in items)
+    carbs = sum(i.get("carbs", 0) for i in items)
+    fat = sum(i.get("fat", 0) for i in items)
+    return {
+        "estimated_calories": int(sum(i.get("calories", 0) for i in items)),
+        "macros": {"protein": f"{protein:g}g", "carbs": f"{carbs:g}g", "fat": f"{fat:g}g"},
+        "ingredients": [i["item"] for i in items],
+        "items": items,
+    }
@@ -0,0 +1,181 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from nutrichoice.observability import logger
+
+# Generated plans, bucketed by (goal, 100-kcal band, preference). SQLite so every uvicorn
+# worker serves from (and only one worker warms) the same set of plans.
+MEAL_PLAN_CACHE_PATH = os.environ.get(
+    "MEAL_PLAN_CACHE_PATH", os.path.join(tempfile.gettempdir(), "nutrichoice-meal-plans.sqlite3")
+)
+VARIANTS_PER_BUCKET = int(os.environ.get("MEAL_PLAN_VARIANTS", 4))
+PLAN_TTL_SECONDS = float(os.environ.get("MEAL_PLAN_TTL_SECONDS", 7 * 24 * 3600))
+# Warmer: wakes every WARM_INTERVAL_SECONDS; spends at most WARM_CALLS_PER_MINUTE LLM calls,
+# and only while no AI request is running on this worker
+MEAL_PLAN_WARMER = os.environ.get("MEAL_PLAN_WARMER", "1").lower() in ("1", "true", "yes")
+WARM_INTERVAL_SECONDS = float(os.environ.get("MEAL_PLAN_WARM_INTERVAL", 30))
+WARM_CALLS_PER_MINUTE = float(os.environ.get("MEAL_PLAN_WARM_CALLS_PER_MINUTE", 2))
+WARM_BUCKETS_TRACKED = 200  # most-requested buckets the warmer keeps full
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    id INTEGER PRIMARY KEY, bucket TEXT NOT NULL, plan TEXT NOT NULL,
+    created REAL NOT NULL, served INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS plans_bucket ON plans (bucket, served);
+CREATE TABLE IF NOT EXISTS demand (bucket TEXT PRIMARY KEY, hits INTEGER NOT NULL, last_seen REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS lease (name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL);
+"""
+
+
+def _slug(text):
+    # "|" separates the parts of a bucket key, so it can't appear inside one
+    return " ".join(str(text).lower().replace("|", " ").split())
+
+
+def calorie_band(calories):
+    """Nearest multiple of 100: 1849 -> 1800, 1850 -> 1900."""
+    return int(max(0, calories) + 50) // 100 * 100
+
+
+def bucket_key(goal, calories, preference):
+    return f"{_slug(goal)}|{calorie_band(calories)}|{_slug(preference)}"
+
+
+def parse_bucket(bucket):
+    goal, band, preference = bucket.split("|")
+    return goal, int(band), preference
+
+
+class PlanStore:
+    """Plan variants per bucket. `take` rotates through a bucket's variants, least-served first."""
+
+    def __init__(self, path=MEAL_PLAN_CACHE_PATH, variants=VARIANTS_PER_BUCKET, ttl=PLAN_TTL_SECONDS):
+        self.path = path
+        self.variants = variants
+        self.ttl = ttl
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit; multi-statement writes use an explicit BEGIN IMMEDIATE (closing rolls back)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def take(self, bucket):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO demand VALUES (?, 1, ?) ON CONFLICT(bucket) DO UPDATE SET hits = hits + 1, last_seen = ?",
+                (bucket, now, now),
+            )
+            row = conn.execute(
+                "SELECT id, plan FROM plans WHERE bucket = ? AND created > ? ORDER BY served, created LIMIT 1",
+                (bucket, now - self.ttl),
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE plans SET served = served + 1 WHERE id = ?", (row[0],))
+            conn.execute("COMMIT")
+        return json.loads(row[1]) if row else None
+
+    def add(self, bucket, plan):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM plans WHERE bucket = ? AND created <= ?", (bucket, now - self.ttl))
+            # New variants start at the current minimum so they join the rotation instead of jumping it
+            served = conn.execute("SELECT COALESCE(MIN(served), 0) FROM plans WHERE bucket = ?", (bucket,)).fetchone()[0]
+            conn.execute("INSERT INTO plans (bucket, plan, created, served) VALUES (?, ?, ?, ?)",
+                         (bucket, json.dumps(plan), now, served))
+            # Keep the newest `variants`
+            conn.execute(
+                "DELETE FROM plans WHERE bucket = ? AND id NOT IN "
+                "(SELECT id FROM plans WHERE bucket = ? ORDER BY created DESC LIMIT ?)",
+                (bucket, bucket, self.variants),
+            )
+            conn.execute("COMMIT")
+
+    def needs(self, limit=WARM_BUCKETS_TRACKED):
+        """Requested buckets short of `variants` fresh plans, most requested first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT d.bucket, COUNT(p.id) FROM demand d "
+                "LEFT JOIN plans p ON p.bucket = d.bucket AND p.created > ? "
+                "GROUP BY d.bucket ORDER BY d.hits DESC LIMIT ?",
+                (time.time() - self.ttl, limit),
+            ).fetchall()
+        return [bucket for bucket, count in rows if count < self.variants]
+
+    def acquire_lease(self, name, holder, seconds):
+        """True while `holder` owns lease `name`; it is taken over once the owner stops renewing."""
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO lease VALUES (?, ?, ?) ON CONFLICT(name) DO UPDATE "
+                "SET holder = excluded.holder, expires = excluded.expires "
+                "WHERE lease.holder = excluded.holder OR lease.expires < ?",
+                (name, holder, now + seconds, now),
+            )
+            return cur.rowcount == 1
+
+
+class Warmer(threading.Thread):
+    """
+    Refills under-stocked buckets in the background. `generate(goal, calories, preference)`
+    returns a plan or None; `is_idle()` says whether the worker has spare provider quota.
+    """
+
+    def __init__(self, store, generate, is_idle, interval=WARM_INTERVAL_SECONDS, calls_per_minute=WARM_CALLS_PER_MINUTE):
+        super().__init__(name="meal-plan-warmer", daemon=True)
+        self.store = store
+        self.generate = generate
+        self.is_idle = is_idle
+        self.interval = interval
+        self.spacing = 60.0 / calls_per_minute if calls_per_minute > 0 else float("inf")
+        self.holder = f"{os.getpid()}-{id(self)}"
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            try:
+                self.warm_once()
+            except Exception:
+                logger.exception("meal plan warmer failed")
+
+    def warm_once(self):
+        made = 0
+        for bucket in self.store.needs():
+            # Renewed per call: only one worker warms at a time, another takes over if it dies
+            lease = self.store.acquire_lease("warmer", self.holder, self.interval + self.spacing * 2)
+            if not lease or self._halt.is_set() or not self.is_idle():
+                break
+            try:
+                goal, calories, preference = parse_bucket(bucket)
+            except ValueError:
+                # Key stored before _slug dropped "|"; skip it rather than end the cycle here
+                logger.warning("meal plan bucket skipped", extra={'bucket': bucket})
+                continue
+            plan = self.generate(goal, calories, preference)
+            if plan:
+                self.store.add(bucket, plan)
+                made += 1
+            logger.info("meal plan warmed", extra={'bucket': bucket, 'ok': bool(plan)})
+            # Spread calls out so warming never eats a provider's per-minute quota
+            if self._halt.wait(self.spacing):
+                break
+        return made
+
+    def stop(self):
+        self._halt.set()
@@ -0,0 +1,90 @@
+import asyncio
+import contextvars
+import functools
+import os
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse
+
+from nutrichoice import profiling
+from nutrichoice.observability import has_admin_token
+
+# FastAPI side of nutrichoice/profiling.py; same settings and file layout as the Django one
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "")
+PROFILES_KEPT = int(os.environ.get("PROFILES_KEPT", profiling.DEFAULT_KEEP))
+
+current_session = contextvars.ContextVar("profile_session", default=None)
+
+
+def profile_dir():
+    return profiling.profile_dir(PROFILE_DIR)
+
+
+def is_admin(request: Request):
+    return has_admin_token(request.headers, PROFILING_TOKEN)
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Profiles a request when an admin sends `X-Profile: 1` with a valid `X-Profile-Token`,
+    or for PROFILE_SAMPLE_RATE of traffic. The event loop thread is attached here; sync
+    endpoints attach their threadpool thread through @profiled.
+
+    The loop thread is shared: while the profiled request awaits, cProfile and the stack
+    sampler also see whatever other requests run on the loop. For a clean profile, send the
+    request when the worker is otherwise idle; the threadpool threads attached through
+    @profiled are the profiled request's alone. On Python 3.12+ only one cProfile can be
+    active, so the loop thread's profiler covers the threadpool too and @profiled adds only
+    the stack sampler there.
+    """
+    if not profiling.should_profile(request.headers, PROFILING_TOKEN, PROFILE_SAMPLE_RATE) \
+            or not profiling.busy.acquire(blocking=False):
+        return await call_next(request)
+    try:
+        session = profiling.ProfileSession(f"{request.method} {request.url.path}", profile_dir(), PROFILES_KEPT)
+        token = current_session.set(session)
+        session.start()
+        session.attach()
+        try:
+            response = await call_next(request)
+        finally:
+            session.detach()
+            current_session.reset(token)
+            session.stop()
+    finally:
+        profiling.busy.release()
+    response.headers["X-Profile-Id"] = session.id
+    return response
+
+
+def profiled(func):
+    """Attaches the worker thread running a sync endpoint (or provider chain) to the active profile."""
+    if asyncio.iscoroutinefunction(func):
+        return func  # runs on the loop thread, which the middleware already attached
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = current_session.get()
+        if session is None or session.is_attached():
+            return func(*args, **kwargs)
+        session.attach()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            session.detach()
+    return wrapper
+
+
+def list_profiles(request: Request):
+    if not is_admin(request): raise HTTPException(status_code=403)
+    return {"profiles": profiling.list_summaries(profile_dir())}
+
+
+def download_profile(request: Request, profile_id: str, ext: str):
+    if not is_admin(request): raise HTTPException(status_code=403)
+    path = profiling.profile_file(profile_dir(), profile_id, ext)
+    if path is None:
+        raise HTTPException(status_code=404)
+    return FileResponse(path, filename=f"{profile_id}.{ext}")
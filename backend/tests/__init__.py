@@ -0,0 +1,5 @@
+import os
+import sys
+
+# As in main.py: the nutrichoice package (code shared with the Django app) lives at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
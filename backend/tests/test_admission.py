@@ -0,0 +1,36 @@
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import admission
+from nutrichoice.admission import AsyncAdmissionGate
+
+
+def make_app():
+    app = FastAPI()
+    app.middleware("http")(admission.admission_middleware)
+
+    @app.post("/log-meal")
+    async def log_meal():
+        return {"ok": True}
+
+    return app
+
+
+class AdmissionMiddlewareTests(unittest.TestCase):
+    def test_admitted(self):
+        with mock.patch.dict(admission._gates, clear=True):
+            response = TestClient(make_app()).post("/log-meal")
+        self.assertEqual(response.status_code, 200)
+
+    def test_full_gate_answers_503_with_retry_after(self):
+        with mock.patch.dict(admission._gates, {"log_meal": AsyncAdmissionGate(0, 0, 0)}):
+            response = TestClient(make_app()).post("/log-meal")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], str(admission.AI_RETRY_AFTER_SECONDS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from meal_parser import FoodLexicon, _number
+
+# Run from backend/: python -m unittest
+
+
+class NumberTests(unittest.TestCase):
+    def test_words_and_decimals(self):
+        self.assertEqual(_number("two"), 2)
+        self.assertEqual(_number("half"), 0.5)
+        self.assertEqual(_number("1.5"), 1.5)
+        self.assertIsInstance(_number("2.0"), int)
+
+    def test_fractions(self):
+        self.assertEqual(_number("1/2"), 0.5)
+        self.assertEqual(_number("4/2"), 2)
+        self.assertIsInstance(_number("4/2"), int)
+
+    def test_zero_denominator(self):
+        self.assertEqual(_number("1/0"), 1)
+
+
+class ParseTests(unittest.TestCase):
+    lexicon = FoodLexicon()
+
+    def test_quantities_and_units(self):
+        resolved, unresolved = self.lexicon.parse("2 rotis, a bowl of dal and 1/2 cup rice")
+        self.assertEqual(unresolved, [])
+        self.assertEqual([i["item"] for i in resolved], ["roti", "dal", "rice"])
+        self.assertEqual(resolved[0]["calories"], 220)
+        self.assertEqual(resolved[1]["calories"], 180)
+        self.assertEqual(resolved[2]["calories"], 156)
+
+    def test_multi_word_names(self):
+        resolved, _ = self.lexicon.parse("1 tbsp peanut butter, 100g chicken breast")
+        self.assertEqual([i["item"] for i in resolved], ["peanut butter", "chicken breast"])
+
+    def test_aliases(self):
+        resolved, _ = self.lexicon.parse("2 chapatis with dahi")
+        self.assertEqual([i["item"] for i in resolved], ["roti", "curd"])
+
+    def test_unknown_dishes_stay_unresolved(self):
+        # A known word inside a dish name is not the dish
+        for dish in ("chicken biryani", "egg fried rice", "paneer butter masala"):
+            resolved, unresolved = self.lexicon.parse(f"1 plate {dish}")
+            self.assertEqual(resolved, [], dish)
+            self.assertEqual(unresolved, [f"1 plate {dish}"])
+
+    def test_zero_denominator(self):
+        resolved, unresolved = self.lexicon.parse("1/0 roti")
+        self.assertEqual(unresolved, [])
+        self.assertEqual(resolved[0]["calories"], 110)
+
+    def test_extra_foods(self):
+        lexicon = FoodLexicon([("Masala Oats", 180, 6, 30, 4)])
+        resolved, _ = lexicon.parse("masala oats")
+        self.assertEqual(resolved[0]["item"], "masala oats")
+        self.assertEqual(resolved[0]["calories"], 180)
+
+    def test_extra_foods_by_weight_go_to_llm(self):
+        # FoodItem rows have no serving weight, so "200g" can't become a number of servings
+        lexicon = FoodLexicon([("Masala Oats", 180, 6, 30, 4)])
+        resolved, unresolved = lexicon.parse("200g masala oats, 1 bowl masala oats, 2 masala oats")
+        self.assertEqual(unresolved, ["200g masala oats", "1 bowl masala oats"])
+        self.assertEqual([i["calories"] for i in resolved], [360])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import meal_plans
+from meal_plans import PlanStore, Warmer, bucket_key, calorie_band, parse_bucket
+
+
+class BucketTests(unittest.TestCase):
+    def test_calorie_band_rounds_to_nearest_hundred(self):
+        self.assertEqual([calorie_band(c) for c in (1849, 1850, 1899.5, 49, 0, -300)],
+                         [1800, 1900, 1900, 0, 0, 0])
+
+    def test_key_round_trip(self):
+        key = bucket_key("  Fat   Loss ", 2012, "Veg")
+        self.assertEqual(key, "fat loss|2000|veg")
+        self.assertEqual(parse_bucket(key), ("fat loss", 2000, "veg"))
+
+    def test_separator_in_free_text(self):
+        key = bucket_key("cut|bulk", 1850, "veg | jain")
+        self.assertEqual(parse_bucket(key), ("cut bulk", 1900, "veg jain"))
+
+
+class PlanStoreTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = PlanStore(os.path.join(tmp.name, "plans.sqlite3"), variants=3)
+        self.bucket = bucket_key("shred", 1800, "veg")
+
+    def test_take_rotates_least_served_first(self):
+        self.assertIsNone(self.store.take(self.bucket))
+        for n in range(3):
+            self.store.add(self.bucket, {"n": n})
+        self.assertEqual([self.store.take(self.bucket)["n"] for _ in range(7)], [0, 1, 2, 0, 1, 2, 0])
+
+    def test_new_variant_joins_the_rotation(self):
+        for n in range(2):
+            self.store.add(self.bucket, {"n": n})
+        for _ in range(4):
+            self.store.take(self.bucket)
+        self.store.add(self.bucket, {"n": 2})
+        self.assertEqual([self.store.take(self.bucket)["n"] for _ in range(3)], [0, 1, 2])
+
+    def test_add_keeps_the_newest_variants(self):
+        for n in range(5):
+            self.store.add(self.bucket, {"n": n})
+        self.assertEqual(sorted(self.store.take(self.bucket)["n"] for _ in range(3)), [2, 3, 4])
+
+    def test_needs_lists_requested_buckets_short_of_variants(self):
+        full, short = bucket_key("bulk", 2500, "non-veg"), self.bucket
+        for n in range(3):
+            self.store.add(full, {"n": n})
+        for bucket in (full, short, short):
+            self.store.take(bucket)
+        self.assertEqual(self.store.needs(), [short])
+
+    def test_lease_takeover(self):
+        self.assertTrue(self.store.acquire_lease("warmer", "a", 30))
+        self.assertFalse(self.store.acquire_lease("warmer", "b", 30))
+        self.assertTrue(self.store.acquire_lease("warmer", "a", 30))  # renewal
+        with mock.patch.object(meal_plans.time, "time", return_value=meal_plans.time.time() + 31):
+            self.assertTrue(self.store.acquire_lease("warmer", "b", 30))
+            self.assertFalse(self.store.acquire_lease("warmer", "a", 30))
+
+
+class WarmerTests(unittest.TestCase):
+    def test_malformed_bucket_does_not_end_the_cycle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PlanStore(os.path.join(tmp, "plans.sqlite3"), variants=1)
+            store.take("old|key|with|pipes")
+            store.take("old|key|with|pipes")
+            store.take(bucket_key("shred", 1800, "veg"))
+            generated = []
+            warmer = Warmer(store, lambda *bucket: generated.append(bucket) or {"ok": True}, lambda: True,
+                            interval=1, calls_per_minute=60000)
+            with self.assertLogs(meal_plans.logger, "INFO"):
+                self.assertEqual(warmer.warm_once(), 1)
+            self.assertEqual(generated, [("shred", 1800, "veg")])
+
+
+if __name__ == "__main__":
+    unittest.main()
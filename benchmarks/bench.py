@@ -0,0 +1,203 @@
+"""
+Offline microbenchmarks for the per-request CPU hot paths.
+
+    python benchmarks/bench.py --update         # record baselines for this machine (once)
+    python benchmarks/bench.py                  # run all, compare against baselines.json
+    python benchmarks/bench.py -k json          # only cases whose name contains "json"
+    python benchmarks/bench.py --threshold 0.5  # allow 50% slowdown before failing
+
+Each case reports the best of several rounds (min is the most stable estimator on a
+noisy machine). A case more than --threshold slower than its baseline is a regression
+and the run exits with status 1. Baselines only mean something on the machine that
+recorded them, so baselines.json is not committed: record it locally with --update
+(again after changing hardware or Python version).
+"""
+import argparse
+import copy
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'biosync_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+# The repair paths log every failed parse; keep them out of the results table
+logging.getLogger('nutrichoice').setLevel(logging.ERROR)
+
+from nutrichoice.json_utils import clean_and_parse_json  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from store.models import FoodItem  # noqa: E402
+from store.renderers import ORJSONRenderer  # noqa: E402
+from store.serializers import FOOD_FIELDS, FoodItemSerializer, encode_food_row  # noqa: E402
+from store.views import encode_image, normalize_roster, safe_json_extract  # noqa: E402
+
+BASELINES = os.path.join(HERE, 'baselines.json')
+CORPUS = os.path.join(HERE, 'model_outputs.json')
+
+CASES = {}
+
+
+def case(name, items=1, unit='op'):
+    """
+    Registers a setup function returning the zero-arg callable to time, or a pair
+    (fn, make_input) for code that consumes its input: each call then gets a fresh
+    make_input() built before the clock starts.
+    """
+    def register(setup):
+        CASES[name] = (setup, items, unit)
+        return setup
+    return register
+
+
+# --- encode_image ---
+for size_kb in (64, 512, 4096):
+    def _setup(size_kb=size_kb):
+        payload = random.Random(size_kb).randbytes(size_kb * 1024)
+        upload = io.BytesIO(payload)
+        return lambda: encode_image(upload)
+    case(f'encode_image_{size_kb}kb', items=size_kb, unit='KB')(_setup)
+
+
+# --- JSON extraction over the model-output corpus ---
+with open(CORPUS) as f:
+    _corpus = json.load(f)
+
+for _doc in _corpus:
+    case(f"safe_json_extract[{_doc['name']}]")(lambda text=_doc['text']: lambda: safe_json_extract(text))
+    case(f"clean_and_parse_json[{_doc['name']}]")(lambda text=_doc['text']: lambda: clean_and_parse_json(text))
+
+
+# --- Roster post-processing (day filling + event sorting) ---
+for _doc in _corpus:
+    if _doc['name'] in ('roster_clean', 'roster_fenced', 'roster_bare_days'):
+        def _setup(text=_doc['text']):
+            parsed = safe_json_extract(text)
+            # normalize_roster mutates; every op starts from an unsorted copy, made outside the timing
+            return normalize_roster, lambda: copy.deepcopy(parsed)
+        case(f"normalize_roster[{_doc['name']}]")(_setup)
+
+
+# --- FoodItem list rendering ---
+def _food_items(n):
+    return [FoodItem(id=i, name=f"food {i}", calories=100 + i % 500, protein=i % 40 + 0.5,
+                     carbs=i % 90 + 0.25, fat=i % 30 + 0.75, scan_count=i % 7) for i in range(n)]
+
+
+for rows in (1_000, 10_000, 100_000):
+    def _serializer(rows=rows):
+        items = _food_items(rows)
+        return lambda: JSONRenderer().render(FoodItemSerializer(items, many=True).data)
+
+    def _fast(rows=rows):
+        tuples = [tuple(getattr(item, f) for f in FOOD_FIELDS) for item in _food_items(rows)]
+        return lambda: ORJSONRenderer().render(list(map(encode_food_row, tuples)))
+
+    case(f'food_list_serializer_{rows}', items=rows, unit='row')(_serializer)
+    case(f'food_list_fast_{rows}', items=rows, unit='row')(_fast)
+
+
+# --- Harness ---
+def measure(fn, rounds, min_time, make_input=None):
+    if make_input is None:
+        run = timeit.Timer(fn).timeit
+    else:
+        def run(number):
+            inputs = [make_input() for _ in range(number)]
+            # Same conditions as timeit: no GC pauses inside the timed loop
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                for value in inputs:
+                    fn(value)
+                return time.perf_counter() - start
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+
+    # Like timeit.autorange: grow the call count until one round takes >= 0.2s
+    number = 1
+    while (elapsed := run(number)) < 0.2:
+        number *= 10 if elapsed < 0.02 else 2
+    # then scale up so each round lasts about min_time
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(run(number) for _ in range(rounds)) / number
+
+
+def machine():
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'machine': platform.machine()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', '--filter', default='', help='only run cases whose name contains this')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per round')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown vs baseline (0.25 = 25%%)')
+    parser.add_argument('--update', action='store_true', help='record results as the new baselines')
+    args = parser.parse_args(argv)
+
+    baselines = {'machine': machine(), 'cases': {}}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+    if not baselines['cases'] and not args.update:
+        print("no baselines recorded on this machine yet; run with --update first")
+    elif baselines.get('machine') != machine() and not args.update:
+        print(f"warning: baselines were recorded on {baselines.get('machine')}; comparisons may be off")
+
+    regressions = []
+    print(f"{'case':<48} {'per op':>12} {'throughput':>20} {'vs baseline':>12}")
+    for name, (setup, items, unit) in CASES.items():
+        if args.filter not in name:
+            continue
+        fn, make_input = setup(), None
+        if isinstance(fn, tuple):
+            fn, make_input = fn
+        seconds = measure(fn, args.rounds, args.min_time, make_input)
+        base = baselines['cases'].get(name)
+        delta = ''
+        if base and not args.update:
+            if seconds / base - 1 > args.threshold:
+                # Confirm before flagging: one slow burst on a shared box is not a regression
+                seconds = min(seconds, measure(fn, args.rounds, args.min_time, make_input))
+            change = seconds / base - 1
+            delta = f"{change:+.1%}"
+            if change > args.threshold:
+                regressions.append((name, change))
+                delta += ' !!'
+        throughput = f"{items / seconds:,.0f} {unit}/s"
+        print(f"{name:<48} {seconds * 1e6:>10.1f}us {throughput:>20} {delta:>12}")
+        if args.update:
+            baselines['cases'][name] = seconds
+
+    if args.update:
+        baselines['machine'] = machine()
+        with open(BASELINES, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"baselines written to {os.path.relpath(BASELINES, ROOT)}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for name, change in regressions:
+            print(f"  {name}: {change:+.1%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
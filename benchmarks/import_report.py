@@ -0,0 +1,96 @@
+"""
+Cold-start report: wall time and `-X importtime` breakdown for each server entry point.
+
+    python benchmarks/import_report.py                 # all entry points
+    python benchmarks/import_report.py -e fastapi      # one entry point
+    python benchmarks/import_report.py --top 20        # longer per-package table
+
+Each entry point is started in a fresh interpreter. Wall time is the best of --runs
+starts. The run fails (exit 1) when an entry point is slower than its target, or when
+it imports a provider SDK at startup: those must only load on the first AI call.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (working dir, argv after the interpreter, cold-start target in ms)
+ENTRY_POINTS = {
+    # gunicorn worker: WSGI app plus the URLconf the first request loads
+    'django-wsgi': (ROOT, ['-c', 'from biosync_backend.wsgi import application; import biosync_backend.urls'], 1000),
+    # Every manage.py command runs system checks, which import all views
+    'manage-check': (ROOT, ['manage.py', 'check'], 1000),
+    # uvicorn worker
+    'fastapi': (os.path.join(ROOT, 'backend'), ['-c', 'import main'], 1000),
+}
+
+# Loaded lazily by store.views.google_sdk/openrouter_client and backend/main.gemini
+LAZY_MODULES = ('openai', 'google.generativeai', 'PIL')
+
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def start(cwd, argv, importtime=False):
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + argv
+    began = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - began
+    if proc.returncode != 0:
+        raise SystemExit(f"{' '.join(argv)} failed:\n{proc.stderr[-2000:]}")
+    return elapsed, proc.stderr
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-e', '--entry', action='append', choices=ENTRY_POINTS, help='repeatable; default all')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8, help='packages to list per entry point')
+    args = parser.parse_args(argv)
+
+    failures = []
+    for name in args.entry or ENTRY_POINTS:
+        cwd, entry_argv, target_ms = ENTRY_POINTS[name]
+        wall_ms = min(start(cwd, entry_argv)[0] for _ in range(args.runs)) * 1000
+        rows = parse_importtime(start(cwd, entry_argv, importtime=True)[1])
+
+        import_ms = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+        by_package = Counter()
+        for module, self_us, _, _ in rows:
+            by_package[module.split('.')[0]] += self_us
+        loaded = {module for module, *_ in rows}
+        eager = [module for module in LAZY_MODULES if module in loaded]
+
+        status = 'ok' if wall_ms <= target_ms else 'OVER TARGET'
+        print(f"\n{name}: {wall_ms:.0f}ms cold start (target {target_ms}ms, {status}), {import_ms:.0f}ms in imports")
+        for package, self_us in by_package.most_common(args.top):
+            print(f"  {package:<32} {self_us / 1000:>8.1f}ms")
+        if wall_ms > target_ms:
+            failures.append(f"{name}: {wall_ms:.0f}ms > {target_ms}ms")
+        if eager:
+            print(f"  imported at startup, should be lazy: {', '.join(eager)}")
+            failures.append(f"{name}: eager import of {', '.join(eager)}")
+
+    if failures:
+        print("\nFAILED\n  " + "\n  ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Open-loop load generator for the Django and FastAPI backends, meant to run against
+benchmarks/stub_llm.py so no real provider quota is used.
+
+    python benchmarks/stub_llm.py --rate-429 0.1 &
+    GOOGLE_API_KEY=stub OPENROUTER_API_KEY=stub GEMINI_API_ENDPOINT=http://127.0.0.1:8089 \\
+        OPENROUTER_BASE_URL=http://127.0.0.1:8089/openrouter/v1 python manage.py runserver 8000 &
+    (cd backend && GEMINI_API_ENDPOINT=http://127.0.0.1:8089 \\
+        MISTRAL_URL=http://127.0.0.1:8089/mistral/v1/chat/completions \\
+        GROQ_URL=http://127.0.0.1:8089/groq/openai/v1/chat/completions uvicorn main:app --port 8001) &
+
+    python benchmarks/loadgen.py --rps 10 --duration 30
+    python benchmarks/loadgen.py --scenario fastapi:snap-meal=3 --scenario django:scan-food --rps 20
+
+Requests are sent on a fixed schedule (open loop): a slow server does not slow the
+arrival rate, and latency is measured from the scheduled send time, so queueing inside
+the generator counts against the server instead of hiding it.
+
+The report has client-side throughput, p50/p95/p99 and errors per scenario, then the
+per-provider-layer outcomes and fallbacks taken from each backend's /metrics, and what
+the stub injected (429 / 500 / malformed) over the same window. /metrics needs the admin
+token: export the same PROFILING_TOKEN to the backends and to this script.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from prometheus_client.parser import text_string_to_metric_families
+
+MEAL_PLAN = {"user_goal": "Lose Weight", "daily_calories": 1800, "dietary_preference": "Indian"}
+
+# name -> (backend, path, kind, payload); kind is 'json' or the multipart field holding the image
+SCENARIOS = {
+    'django:analyze-roster': ('django', '/api/analyze-roster/', 'file', None),
+    'django:scan-food': ('django', '/api/scan-food/', 'image', None),
+    'fastapi:snap-meal': ('fastapi', '/snap-meal', 'file', {"user_goal": "Maintain"}),
+    'fastapi:analyze-roster': ('fastapi', '/analyze-roster', 'file', None),
+    'fastapi:generate-meal-plan': ('fastapi', '/generate-meal-plan', 'json', MEAL_PLAN),
+    'fastapi:generate-workout': ('fastapi', '/generate-workout', 'json', {"context": "Leg day, 45 minutes"}),
+    # "mystery cake" is not in the local lexicon, so this one reaches the LLM
+    'fastapi:log-meal': ('fastapi', '/log-meal', 'json', {"meal_description": "2 rotis, 1 bowl dal and a slice of mystery cake"}),
+}
+
+
+def sample_jpeg():
+    # A real JPEG: the Gemini layer in backend/main.py decodes it with PIL before sending
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float('nan')
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+# --- Backend /metrics and stub /__stats snapshots ---
+def scrape(url):
+    """Counter-like samples from a Prometheus endpoint, keyed by (sample name, sorted labels)."""
+    token = os.environ.get('PROFILING_TOKEN', '')
+    try:
+        response = requests.get(url, headers={'Authorization': f'Bearer {token}'}, timeout=5)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+    text = response.text
+    samples = {}
+    for family in text_string_to_metric_families(text):
+        if not family.name.startswith('nutrichoice_'):
+            continue
+        for s in family.samples:
+            if s.name.endswith(('_count', '_sum', '_total')):
+                samples[(s.name, tuple(sorted(s.labels.items())))] = s.value
+    return samples
+
+
+def diff(after, before):
+    return {k: v - (before or {}).get(k, 0) for k, v in (after or {}).items() if v - (before or {}).get(k, 0)}
+
+
+def stub_stats(url):
+    try:
+        return requests.get(f"{url}/__stats", timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return None
+
+
+class LoadRun:
+    def __init__(self, bases, mix, rps, duration, concurrency, timeout, seed=None):
+        self.bases = bases
+        self.mix = mix
+        self.rps = rps
+        self.duration = duration
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.image = sample_jpeg()
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadgen')
+        self.local = threading.local()
+        self.results = defaultdict(list)  # scenario -> [(latency_s, outcome)]
+        self.lock = threading.Lock()
+
+    def _session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _send(self, name, scheduled):
+        backend, path, kind, payload = SCENARIOS[name]
+        url = self.bases[backend] + path
+        try:
+            if kind == 'json':
+                resp = self._session().post(url, json=payload, timeout=self.timeout)
+            else:
+                files = {kind: ('meal.jpg', self.image, 'image/jpeg')}
+                resp = self._session().post(url, files=files, data=payload or {}, timeout=self.timeout)
+            outcome = 'ok' if resp.status_code < 400 else f"http_{resp.status_code}"
+        except requests.Timeout:
+            outcome = 'timeout'
+        except requests.ConnectionError:
+            outcome = 'connection'
+        except (requests.RequestException, ValueError) as e:
+            # Anything else (bad URL, redirect loop, encoding error) is still an error row, not a lost request
+            outcome = type(e).__name__
+        latency = time.perf_counter() - scheduled
+        with self.lock:
+            self.results[name].append((latency, outcome))
+
+    def run(self):
+        names, weights = zip(*self.mix.items())
+        total = int(self.rps * self.duration)
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i / self.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.pool.submit(self._send, self.rng.choices(names, weights)[0], scheduled)
+        self.pool.shutdown(wait=True)
+        return time.perf_counter() - start
+
+
+# --- Report ---
+def print_client_report(results, elapsed):
+    print(f"\n{'scenario':<28} {'sent':>6} {'ok':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}  errors")
+    for name in sorted(results):
+        rows = results[name]
+        latencies = sorted(lat for lat, _ in rows)
+        outcomes = Counter(outcome for _, outcome in rows)
+        ok = outcomes.pop('ok', 0)
+        errors = ', '.join(f"{k} {v}" for k, v in outcomes.most_common()) or '-'
+        p50, p95, p99 = (percentile(latencies, p) * 1000 for p in (50, 95, 99))
+        print(f"{name:<28} {len(rows):>6} {ok:>6} {ok / elapsed:>7.2f} {p50:>6.0f}ms {p95:>6.0f}ms {p99:>6.0f}ms  {errors}")
+
+
+def print_backend_report(backend, delta):
+    if delta is None:
+        print(f"\n{backend}: /metrics unreachable (or PROFILING_TOKEN unset), no per-layer breakdown")
+        return
+    layers = defaultdict(lambda: {'ok': 0, 'invalid': 0, 'error': 0, 'seconds': 0.0})
+    fallbacks = Counter()
+    for (name, labels), value in delta.items():
+        labels = dict(labels)
+        if name == 'nutrichoice_provider_latency_seconds_count':
+            layers[(labels['layer'], labels['provider'])][labels['outcome']] += int(value)
+        elif name == 'nutrichoice_provider_latency_seconds_sum':
+            layers[(labels['layer'], labels['provider'])]['seconds'] += value
+        elif name == 'nutrichoice_fallback_total':
+            fallbacks[f"{labels['endpoint']}/{labels['kind']}"] += int(value)
+
+    print(f"\n{backend}: provider layers")
+    print(f"  {'layer':<6} {'provider':<48} {'calls':>6} {'ok':>6} {'invalid':>7} {'error':>6} {'err%':>6} {'mean':>8}")
+    for (layer, provider), c in sorted(layers.items()):
+        calls = c['ok'] + c['invalid'] + c['error']
+        failed = c['invalid'] + c['error']
+        mean = c['seconds'] / calls * 1000 if calls else 0
+        print(f"  {layer:<6} {provider:<48} {calls:>6} {c['ok']:>6} {c['invalid']:>7} {c['error']:>6} "
+              f"{failed / calls if calls else 0:>6.0%} {mean:>6.0f}ms")
+    if fallbacks:
+        print("  fallbacks: " + ', '.join(f"{k} {v}" for k, v in fallbacks.most_common()))
+
+
+def print_stub_report(before, after):
+    if after is None:
+        print("\nstub: /__stats unreachable")
+        return
+    print("\nstub: injected outcomes")
+    for provider in sorted(after):
+        counts = Counter(after[provider])
+        counts.subtract((before or {}).get(provider, {}))
+        print(f"  {provider:<11} " + ', '.join(f"{k} {v}" for k, v in sorted(counts.items()) if v))
+
+
+def parse_mix(specs, parser):
+    if not specs:
+        return {name: 1.0 for name in SCENARIOS}
+    mix = {}
+    for spec in specs:
+        name, _, weight = spec.partition('=')
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}; expected one of {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--django', default='http://127.0.0.1:8000', help='Django base URL')
+    parser.add_argument('--fastapi', default='http://127.0.0.1:8001', help='FastAPI base URL')
+    parser.add_argument('--stub', default='http://127.0.0.1:8089', help='stub provider base URL')
+    parser.add_argument('--scenario', action='append', default=[], metavar='NAME[=WEIGHT]',
+                        help=f"repeatable; default is an even mix of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--rps', type=float, default=5.0, help='target arrival rate')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of arrivals')
+    parser.add_argument('--concurrency', type=int, default=64, help='max requests in flight')
+    parser.add_argument('--timeout', type=float, default=60.0, help='client timeout per request')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', metavar='PATH', help='also write raw latencies and outcomes here')
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.scenario, parser)
+    bases = {'django': args.django.rstrip('/'), 'fastapi': args.fastapi.rstrip('/')}
+    used = sorted({SCENARIOS[name][0] for name in mix})
+
+    metrics_before = {b: scrape(f"{bases[b]}/metrics") for b in used}
+    stub_before = stub_stats(args.stub)
+
+    print(f"{args.rps} req/s for {args.duration:.0f}s over {len(mix)} scenario(s), up to {args.concurrency} in flight")
+    run = LoadRun(bases, mix, args.rps, args.duration, args.concurrency, args.timeout, seed=args.seed)
+    elapsed = run.run()
+
+    print_client_report(run.results, elapsed)
+    for backend in used:
+        after = scrape(f"{bases[backend]}/metrics")
+        print_backend_report(backend, diff(after, metrics_before[backend]) if after is not None else None)
+    print_stub_report(stub_before, stub_stats(args.stub))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({name: [{'latency_s': lat, 'outcome': o} for lat, o in rows]
+                       for name, rows in run.results.items()}, f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+Local stand-in for the AI providers, for load tests that must not burn real quota.
+
+    python benchmarks/stub_llm.py --port 8089 --latency-ms 800 --rate-429 0.05 --rate-500 0.02 --malformed 0.05
+    python benchmarks/stub_llm.py --provider gemini:rate_429=0.5,latency_ms=1500   # per-provider overrides
+
+Routes (the provider is picked from the path, auth headers are ignored):
+    POST /v1beta/models/<model>:generateContent      Gemini (google-generativeai over REST)
+    POST /openrouter/v1/chat/completions             OpenRouter (openai SDK)
+    POST /mistral/v1/chat/completions                Mistral
+    POST /groq/openai/v1/chat/completions            Groq
+    GET  /__stats    per-provider counts of what was served (ok / 429 / 500 / malformed)
+    POST /__reset    zero the counts
+
+Point the backends at it with:
+    Django:  GOOGLE_API_KEY=stub OPENROUTER_API_KEY=stub GEMINI_API_ENDPOINT=http://127.0.0.1:8089
+             OPENROUTER_BASE_URL=http://127.0.0.1:8089/openrouter/v1
+    FastAPI: GEMINI_API_ENDPOINT=http://127.0.0.1:8089
+             MISTRAL_URL=http://127.0.0.1:8089/mistral/v1/chat/completions
+             GROQ_URL=http://127.0.0.1:8089/groq/openai/v1/chat/completions
+
+Latency is lognormal around --latency-ms with shape --sigma (p95 is about median * e^(1.645 sigma)).
+A "malformed" reply is a 200 whose content is the right answer cut off mid-object, which is
+what a provider hitting its token limit sends back.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROVIDERS = ('gemini', 'openrouter', 'mistral', 'groq')
+
+# Canned answers, picked by what the prompt asks for
+REPLIES = [
+    (re.compile(r'timetable|weekly schedule', re.I), {
+        "weekly_schedule": {
+            "Monday": [{"time": "09:00", "event": "Maths"}, {"time": "11:00", "event": "Physics Lab"}],
+            "Tuesday": [{"time": "10:00", "event": "Chemistry"}],
+            "Wednesday": [{"time": "09:00", "event": "Maths"}, {"time": "14:00", "event": "Robotics"}],
+            "Thursday": [{"time": "12:00", "event": "English"}],
+            "Friday": [{"time": "09:00", "event": "Maths"}],
+        }
+    }),
+    (re.compile(r'Identify food', re.I), {
+        "food_name": "Paneer Tikka", "estimated_calories": 320, "protein": 18, "carbs": 9, "fat": 22,
+    }),
+    (re.compile(r'Analyze the food', re.I), {
+        "estimated_calories": 540,
+        "macros": {"protein": "21g", "carbs": "68g", "fat": "19g"},
+        "ingredients": ["Roti", "Dal", "Paneer"],
+        "diet_fit": "Fits Goal",
+        "advice": "Balanced plate; go easy on the butter.",
+    }),
+    (re.compile(r'meal plan', re.I), {
+        "analysis": "Moderate deficit with high protein.",
+        "meals": [
+            {"type": "Breakfast", "name": "Moong Dal Chilla", "calories": 350, "nutrients": {"protein": "18g"},
+             "recipe": ["Soak dal", "Grind", "Cook on tawa"]},
+            {"type": "Lunch", "name": "Rajma Rice", "calories": 550, "nutrients": {"protein": "20g"},
+             "recipe": ["Pressure cook rajma", "Temper", "Serve with rice"]},
+            {"type": "Dinner", "name": "Grilled Paneer Salad", "calories": 450, "nutrients": {"protein": "28g"},
+             "recipe": ["Grill paneer", "Toss with greens"]},
+        ],
+    }),
+    (re.compile(r'Workout', re.I), {
+        "advice": "Keep rest under 90 seconds.",
+        "exercises": [{"name": "Squat", "sets": "4", "reps": "8"}, {"name": "Push-up", "sets": "3", "reps": "12"}],
+    }),
+    (re.compile(r'Analyze:', re.I), {
+        "estimated_calories": 250, "macros": {"protein": "8g", "carbs": "30g", "fat": "10g"}, "ingredients": ["Snack"],
+    }),
+]
+DEFAULT_REPLY = "Eat more vegetables and keep protein at every meal."
+
+
+class Behaviour:
+    """How one provider answers: latency distribution and failure rates."""
+
+    FIELDS = ('latency_ms', 'sigma', 'rate_429', 'rate_500', 'malformed')
+
+    def __init__(self, latency_ms=800.0, sigma=0.5, rate_429=0.0, rate_500=0.0, malformed=0.0):
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.malformed = malformed
+
+    def override(self, spec):
+        copy = Behaviour(**vars(self))
+        for pair in filter(None, spec.split(',')):
+            key, _, value = pair.partition('=')
+            if key not in self.FIELDS:
+                raise ValueError(f"unknown setting {key!r}; expected one of {', '.join(self.FIELDS)}")
+            setattr(copy, key, float(value))
+        return copy
+
+    def delay(self, rng):
+        return rng.lognormvariate(math.log(self.latency_ms / 1000), self.sigma) if self.latency_ms > 0 else 0.0
+
+    def outcome(self, rng):
+        roll = rng.random()
+        for name, rate in (('429', self.rate_429), ('500', self.rate_500), ('malformed', self.malformed)):
+            if roll < rate:
+                return name
+            roll -= rate
+        return 'ok'
+
+
+def reply_for(prompt):
+    for pattern, payload in REPLIES:
+        if pattern.search(prompt):
+            return json.dumps(payload)
+    return DEFAULT_REPLY
+
+
+def truncate(text):
+    return text[:max(1, len(text) // 2)]
+
+
+def prompt_text(provider, body):
+    # Only the text parts matter; images are ignored
+    if provider == 'gemini':
+        parts = [p for c in body.get('contents', []) for p in c.get('parts', [])]
+        return ' '.join(p.get('text', '') for p in parts)
+    texts = []
+    for message in body.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, str):
+            texts.append(content)
+        else:
+            texts.extend(part.get('text', '') for part in content or [] if part.get('type') == 'text')
+    return ' '.join(texts)
+
+
+def success_body(provider, model, text):
+    if provider == 'gemini':
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": 100, "candidatesTokenCount": len(text) // 4, "totalTokenCount": 100 + len(text) // 4},
+            "modelVersion": model,
+        }
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": len(text) // 4, "total_tokens": 100 + len(text) // 4},
+    }
+
+
+def error_body(provider, status):
+    if provider == 'gemini':
+        reason = 'RESOURCE_EXHAUSTED' if status == 429 else 'INTERNAL'
+        return {"error": {"code": status, "message": f"stub {reason.lower()}", "status": reason}}
+    kind = 'rate_limit_exceeded' if status == 429 else 'server_error'
+    return {"error": {"message": f"stub {kind}", "type": kind, "code": status}}
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self, address, default, overrides, seed=None):
+        super().__init__(address, StubHandler)
+        self.behaviours = {p: overrides.get(p, default) for p in PROVIDERS}
+        self.stats = defaultdict(Counter)
+        self.stats_lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def count(self, provider, outcome):
+        with self.stats_lock:
+            self.stats[provider]['requests'] += 1
+            self.stats[provider][outcome] += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # one line per request drowns the terminal at load-test rates
+
+    def _send(self, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        path = self.path.split('?', 1)[0]
+        match = re.search(r'/models/([^/:]+):generateContent$', path)
+        if match:
+            return 'gemini', match.group(1)
+        for provider in ('openrouter', 'mistral', 'groq'):
+            if path.startswith(f'/{provider}/') and path.endswith('/chat/completions'):
+                return provider, None
+        return None, None
+
+    def do_GET(self):
+        if self.path == '/__stats':
+            with self.server.stats_lock:
+                return self._send(200, {p: dict(c) for p, c in self.server.stats.items()})
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if self.path == '/__reset':
+            with self.server.stats_lock:
+                self.server.stats.clear()
+            return self._send(200, {"reset": True})
+
+        provider, model = self._route()
+        if provider is None:
+            return self._send(404, {"error": f"no stub route for {self.path}"})
+        try:
+            body = json.loads(raw or b'{}')
+        except ValueError:
+            return self._send(400, {"error": "invalid JSON body"})
+
+        behaviour = self.server.behaviours[provider]
+        with self.server.rng_lock:
+            delay, outcome = behaviour.delay(self.server.rng), behaviour.outcome(self.server.rng)
+        time.sleep(delay)
+        self.server.count(provider, outcome)
+
+        if outcome == '429':
+            return self._send(429, error_body(provider, 429), headers=[('Retry-After', '1')])
+        if outcome == '500':
+            return self._send(500, error_body(provider, 500))
+        text = reply_for(prompt_text(provider, body))
+        if outcome == 'malformed':
+            text = truncate(text)
+        self._send(200, success_body(provider, model or body.get('model', 'stub'), text))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=800.0, help='median provider latency')
+    parser.add_argument('--sigma', type=float, default=0.5, help='lognormal shape; 0 = fixed latency')
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-500', type=float, default=0.0)
+    parser.add_argument('--malformed', type=float, default=0.0, help='share of 200s with truncated JSON content')
+    parser.add_argument('--provider', action='append', default=[], metavar='NAME:key=value,...',
+                        help=f"per-provider override ({', '.join(PROVIDERS)})")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    default = Behaviour(args.latency_ms, args.sigma, args.rate_429, args.rate_500, args.malformed)
+    overrides = {}
+    for spec in args.provider:
+        name, _, settings = spec.partition(':')
+        if name not in PROVIDERS:
+            parser.error(f"unknown provider {name!r}; expected one of {', '.join(PROVIDERS)}")
+        try:
+            overrides[name] = overrides.get(name, default).override(settings)
+        except ValueError as e:
+            parser.error(str(e))
+
+    server = StubServer((args.host, args.port), default, overrides, seed=args.seed)
+    print(f"stub providers on http://{args.host}:{args.port}")
+    for name, b in server.behaviours.items():
+        print(f"  {name:<11} median {b.latency_ms:.0f}ms sigma {b.sigma} 429 {b.rate_429:.0%} "
+              f"500 {b.rate_500:.0%} malformed {b.malformed:.0%}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -37,8 +37,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'store.profiling.ProfilingMiddleware',        # First, so a profile covers the whole stack
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', # <--- CRITICAL: Serves static files on Render
+    'store.webapp.WebAppWhiteNoiseMiddleware',    # <--- CRITICAL: Serves static files (and the Flutter web build) on Render
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',      # <--- CRITICAL: Allows Flutter to connect
     'django.middleware.common.CommonMiddleware',
@@ -80,6 +81,120 @@ DATABASES = {
     )
 }
 
+# SQLite production mode (small deployments): WAL so readers never block the writer,
+# fsync only at checkpoints, wait on locks instead of failing with "database is locked",
+# and BEGIN IMMEDIATE so a read transaction never has to upgrade to a write lock.
+# Writes from the scan and profile endpoints also go through one writer thread
+# with group commit (store/db_writer.py).
+SQLITE_PRODUCTION_MODE = (
+    os.environ.get('SQLITE_PRODUCTION_MODE', '').lower() in ('1', 'true', 'yes')
+    and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3'
+)
+
+if SQLITE_PRODUCTION_MODE:
+    DATABASES['default']['OPTIONS'] = {
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA busy_timeout=5000;'
+            'PRAGMA mmap_size=134217728;'
+            'PRAGMA cache_size=-20000;'
+            'PRAGMA temp_store=MEMORY;'
+        ),
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 5,
+    }
+    # Max jobs folded into one commit, and how long (seconds) the writer waits to fill a group
+    DB_WRITER_GROUP_SIZE = int(os.environ.get('DB_WRITER_GROUP_SIZE', 32))
+    DB_WRITER_GROUP_WINDOW = float(os.environ.get('DB_WRITER_GROUP_WINDOW', 0.002))
+
+
+# Cache
+# Invalidation (store/cache.py) bumps version keys in the cache itself, so every worker must
+# share one cache. Local memory is only right for a single process; with more workers
+# (gunicorn reads WEB_CONCURRENCY) the file backend is the default. Set CACHE_LOCATION to
+# choose its directory. Pass the worker count as WEB_CONCURRENCY, not only as `gunicorn -w`.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+if os.environ.get('CACHE_LOCATION') or WEB_CONCURRENCY > 1:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'nutrichoice',
+        }
+    }
+
+# Seconds FoodItem / UserProfile reads stay in the read-through cache (store/cache.py)
+OBJECT_CACHE_TIMEOUT = int(os.environ.get('OBJECT_CACHE_TIMEOUT', 300))
+
+
+# Food delta sync (store/sync.py): GET /api/foods/changes?since=<version> pages at most
+# FOOD_SYNC_PAGE_SIZE changed rows. `manage.py snapshot_foods` (run periodically) writes the
+# bootstrap file served at /api/foods/snapshot, keeping the newest FOOD_SNAPSHOTS_KEPT.
+FOOD_SYNC_PAGE_SIZE = int(os.environ.get('FOOD_SYNC_PAGE_SIZE', 1000))
+FOOD_SNAPSHOT_DIR = os.environ.get('FOOD_SNAPSHOT_DIR', os.path.join(BASE_DIR, 'snapshots'))
+FOOD_SNAPSHOTS_KEPT = int(os.environ.get('FOOD_SNAPSHOTS_KEPT', 3))
+FOOD_SNAPSHOT_MAX_AGE = int(os.environ.get('FOOD_SNAPSHOT_MAX_AGE', 300))
+
+
+# Serve GET /api/foods/ and /api/profile/ through the values_list + orjson path
+# for every request (otherwise opt in per request with ?fast=1)
+FAST_READS = os.environ.get('FAST_READS', '').lower() in ('1', 'true', 'yes')
+
+
+# Logging
+# Structured (one JSON object per line) so provider attempts and spans can be queried
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'nutrichoice.observability.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+    },
+    'loggers': {
+        'nutrichoice': {
+            'handlers': ['console'],
+            'level': os.environ.get('LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+
+# Per-request profiling (store/profiling.py). Admins send `X-Profile: 1` plus
+# `X-Profile-Token: $PROFILING_TOKEN`; PROFILE_SAMPLE_RATE profiles a random fraction.
+# The same token guards /metrics (Prometheus: `authorization: {credentials: $PROFILING_TOKEN}`).
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '')
+# Newest profiles kept in PROFILE_DIR; older ones are deleted as new ones are written
+PROFILES_KEPT = int(os.environ.get('PROFILES_KEPT', 100))
+
+
+# AI endpoints (store/admission.py): each request gets AI_DEADLINE_SECONDS end to end,
+# split across its provider attempts. Per worker and endpoint, AI_CONCURRENCY_LIMIT run
+# at once, AI_QUEUE_LIMIT more wait up to AI_QUEUE_WAIT_SECONDS, the rest get a 503.
+# Only effective with threaded or async workers: a sync worker runs one request at a time.
+AI_DEADLINE_SECONDS = float(os.environ.get('AI_DEADLINE_SECONDS', 25))
+AI_CONCURRENCY_LIMIT = int(os.environ.get('AI_CONCURRENCY_LIMIT', 8))
+AI_QUEUE_LIMIT = int(os.environ.get('AI_QUEUE_LIMIT', 8))
+AI_QUEUE_WAIT_SECONDS = float(os.environ.get('AI_QUEUE_WAIT_SECONDS', 2))
+AI_RETRY_AFTER_SECONDS = int(os.environ.get('AI_RETRY_AFTER_SECONDS', 5))
+
+# Ask providers for JSON matching the endpoint's schema (nutrichoice/ai_schemas.py) and validate
+# every reply; an invalid one fails over to the next provider. Off: free-form replies + repair.
+STRUCTURED_OUTPUT = os.environ.get('STRUCTURED_OUTPUT', '1').lower() in ('1', 'true', 'yes')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -123,11 +238,25 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # This enables WhiteNoise to actually serve those files
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Flutter web client. `python manage.py collectweb` (after collectstatic) copies the build into
+# STATIC_ROOT/web/<content hash>/ with .br/.gz variants, served with immutable cache headers
+# (store/webapp.py). Its index.html goes to WEB_APP_ROOT and is served at / with a short
+# max-age, so a deploy reaches clients within WEB_INDEX_MAX_AGE seconds.
+FLUTTER_WEB_BUILD = os.environ.get('FLUTTER_WEB_BUILD', os.path.join(BASE_DIR, 'app', 'build', 'web'))
+WEB_APP_ROOT = os.path.join(BASE_DIR, 'webroot')
+WHITENOISE_ROOT = WEB_APP_ROOT if os.path.isdir(WEB_APP_ROOT) else None
+WHITENOISE_INDEX_FILE = True
+WHITENOISE_MAX_AGE = int(os.environ.get('WEB_INDEX_MAX_AGE', 60))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Scanned foods are buffered and upserted in batches (see store/food_writer.py)
+FOOD_SCAN_BATCH_SIZE = int(os.environ.get('FOOD_SCAN_BATCH_SIZE', 20))
+FOOD_SCAN_FLUSH_SECONDS = float(os.environ.get('FOOD_SCAN_FLUSH_SECONDS', 2.0))
+
 
 # ========================================================
 #  CRITICAL SECURITY SETTINGS FOR MOBILE APPS (FLUTTER)
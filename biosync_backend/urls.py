@@ -17,6 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include
 from app import views  # <--- Import your views from the 'app' folder
+from store.observability import metrics_view
+from store.profiling import profile_download, profile_list
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,9 +29,13 @@ urlpatterns = [
     path('snap-meal', views.snap_meal, name='snap_meal'),
     path('calculate-score', views.calculate_score, name='calculate_score'),
     path('compare-prices', views.compare_prices, name='compare_prices'),
+    path('compare-prices/batch', views.compare_prices_batch, name='compare_prices_batch'),
     path('generate-meal-plan', views.generate_meal_plan, name='generate_meal_plan'),
     path('swap-meal', views.swap_meal, name='swap_meal'),
     path('generate-workout', views.generate_workout, name='generate_workout'),
     path('admin/', admin.site.urls),
     path('api/', include('store.urls')),
+    path('metrics', metrics_view, name='metrics'),
+    path('profiles/', profile_list, name='profile-list'),
+    path('profiles/<str:profile_id>.<str:ext>', profile_download, name='profile-download'),
 ]
\ No newline at end of file
@@ -0,0 +1,3 @@
+# Framework-free code shared by the Django app (store/, app/) and the FastAPI backend
+# (backend/). Django imports it from the repo root; backend/main.py puts the repo root on
+# sys.path so `uvicorn main:app` run from backend/ finds it too.
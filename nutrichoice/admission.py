@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+# Deadline budgets and admission gates for the AI endpoints of both backends. The Django
+# decorator (store/admission.py) uses the thread gate, the FastAPI middleware
+# (backend/admission.py) the asyncio one; both apply the same policy.
+
+# requests' connect timeout; the read timeout comes from the deadline
+CONNECT_TIMEOUT = 3.05
+# An attempt with less time than this can't realistically succeed, so the chain stops instead
+MIN_ATTEMPT_SECONDS = 1.0
+
+
+class Deadline:
+    """Wall-clock budget for one request, shared by every upstream call it makes."""
+
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return self.remaining() < MIN_ATTEMPT_SECONDS
+
+    def attempt_timeout(self, attempts_left):
+        """
+        Timeout for the next attempt: an even share of what is left over the attempts still
+        to try. Time a fast failure doesn't use rolls over to the attempts after it.
+        """
+        remaining = self.remaining()
+        return min(remaining, max(MIN_ATTEMPT_SECONDS, remaining / max(1, attempts_left)))
+
+
+class BaseGate:
+    """
+    Runs at most `limit` requests at once. Up to `queue` more wait `wait` seconds for a
+    slot, first come first served; anything beyond that is refused straight away. Limits
+    are per worker process. Subclasses supply the locking; callers hold it around the
+    underscore methods.
+    """
+
+    def __init__(self, limit, queue, wait):
+        self.limit = limit
+        self.queue = queue
+        self.wait = wait
+        self.active = 0
+        self._waiters = deque()  # one [granted] flag per queued request, oldest first
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    def _enter(self):
+        """'admitted' if a slot is free and nobody is queued, None if the queue is full too, else 'wait'."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return 'admitted'
+        if len(self._waiters) >= self.queue:
+            return None
+        return 'wait'
+
+    def _join_queue(self):
+        ticket = [False]
+        self._waiters.append(ticket)
+        return ticket
+
+    def _leave_queue(self, ticket):
+        """After waiting: True if the ticket was handed a slot, else it leaves the queue empty-handed."""
+        if ticket[0]:
+            return True
+        self._waiters.remove(ticket)
+        return False
+
+    def _release(self):
+        # A freed slot goes straight to the oldest waiter, so newcomers can't overtake the queue
+        if self._waiters:
+            self._waiters.popleft()[0] = True
+        else:
+            self.active -= 1
+
+
+class AdmissionGate(BaseGate):
+    """BaseGate for threaded servers."""
+
+    def __init__(self, limit, queue, wait):
+        super().__init__(limit, queue, wait)
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Returns 'admitted', 'queued' (admitted after waiting) or None (refused)."""
+        with self._cond:
+            result = self._enter()
+            if result != 'wait':
+                return result
+            ticket = self._join_queue()
+            self._cond.wait_for(lambda: ticket[0], timeout=self.wait)
+            return 'queued' if self._leave_queue(ticket) else None
+
+    def release(self):
+        with self._cond:
+            self._release()
+            self._cond.notify_all()
+
+
+class AsyncAdmissionGate(BaseGate):
+    """BaseGate for one event loop."""
+
+    def __init__(self, limit, queue, wait):
+        super().__init__(limit, queue, wait)
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        """Returns 'admitted', 'queued' (admitted after waiting) or None (refused)."""
+        async with self._cond:
+            result = self._enter()
+            if result != 'wait':
+                return result
+            ticket = self._join_queue()
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: ticket[0]), self.wait)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # The client went away while queued; pass on a slot it was already handed
+                if self._leave_queue(ticket):
+                    self._release()
+                    self._cond.notify_all()
+                raise
+            return 'queued' if self._leave_queue(ticket) else None
+
+    async def release(self):
+        async with self._cond:
+            self._release()
+            self._cond.notify_all()
@@ -0,0 +1,212 @@
+import functools
+import re
+from typing import Annotated, List
+
+from pydantic import BaseModel, BeforeValidator, ConfigDict, ValidationError, model_validator
+
+from .observability import span
+
+# Typed shapes of every AI reply, shared by both backends. Each model doubles as the JSON
+# schema sent to providers that support constrained output.
+
+
+class InvalidOutput(ValueError):
+    """A provider reply that doesn't match the requested schema, even after repair."""
+
+
+def _whole_number(value):
+    # Models write 540, 540.0 or "540 kcal"; all mean 540
+    if isinstance(value, float):
+        return round(value)
+    if isinstance(value, str):
+        match = re.search(r"-?\d+(?:\.\d+)?", value)
+        return round(float(match.group(0))) if match else value
+    return value
+
+
+def _number(value):
+    if isinstance(value, str):
+        match = re.search(r"-?\d+(?:\.\d+)?", value)
+        return float(match.group(0)) if match else value
+    return value
+
+
+Calories = Annotated[int, BeforeValidator(_whole_number)]
+Grams = Annotated[float, BeforeValidator(_number)]
+
+
+class Output(BaseModel):
+    # Lenient where models commonly drift (21 vs "21g"), ignores keys we don't serve
+    model_config = ConfigDict(coerce_numbers_to_str=True, extra="ignore")
+
+
+class Macros(Output):
+    protein: str
+    carbs: str
+    fat: str
+
+
+class SnapMealResult(Output):
+    estimated_calories: Calories
+    macros: Macros
+    ingredients: List[str]
+    diet_fit: str
+    advice: str
+
+
+class FoodScanResult(Output):
+    food_name: str
+    estimated_calories: Calories
+    protein: Grams
+    carbs: Grams
+    fat: Grams
+
+
+class MealEstimate(Output):
+    estimated_calories: Calories
+    macros: Macros
+    ingredients: List[str]
+
+
+class Event(Output):
+    time: str
+    event: str
+
+
+class WeeklySchedule(Output):
+    Monday: List[Event] = []
+    Tuesday: List[Event] = []
+    Wednesday: List[Event] = []
+    Thursday: List[Event] = []
+    Friday: List[Event] = []
+    Saturday: List[Event] = []
+    Sunday: List[Event] = []
+
+    @model_validator(mode="before")
+    @classmethod
+    def _day_names(cls, data):
+        if isinstance(data, dict):
+            return {str(k).strip().capitalize(): v for k, v in data.items()}
+        return data
+
+
+class RosterResult(Output):
+    weekly_schedule: WeeklySchedule
+
+    @model_validator(mode="before")
+    @classmethod
+    def _bare_days(cls, data):
+        # {"Monday": [...]} without the wrapper is the most common drift
+        if isinstance(data, dict) and "weekly_schedule" not in data:
+            return {"weekly_schedule": data}
+        return data
+
+
+class Nutrients(Output):
+    protein: str
+
+
+class Meal(Output):
+    type: str
+    name: str
+    calories: Calories
+    nutrients: Nutrients
+    recipe: List[str]
+
+
+class MealPlanResult(Output):
+    analysis: str
+    meals: List[Meal]
+
+
+class Exercise(Output):
+    name: str
+    sets: str
+    reps: str
+
+
+class WorkoutResult(Output):
+    advice: str
+    exercises: List[Exercise]
+
+
+# --- Validation ---
+def parse_output(text, model, repair=None):
+    """
+    Validated dict for a reply. Well-formed JSON validates directly; anything else goes
+    through `repair` (the old heuristics) first. Raises InvalidOutput if neither works.
+    """
+    try:
+        return model.model_validate_json(text).model_dump()
+    except ValidationError as e:
+        error = e
+    data = repair(text) if repair and text else None
+    if data is None:
+        raise InvalidOutput(str(error)[:200])
+    try:
+        return model.model_validate(data).model_dump()
+    except ValidationError as e:
+        raise InvalidOutput(str(e)[:200])
+
+
+def accept_reply(text, schema, attempt, repair=None):
+    """
+    What a provider layer returns: the text in free-form mode (schema None), else the
+    validated dict. An invalid reply marks the provider_attempt 'invalid' and raises
+    InvalidOutput, so the chain fails over to the next provider.
+    """
+    if schema is None:
+        return text
+    try:
+        with span('validate'):
+            return parse_output(text, schema, repair)
+    except InvalidOutput:
+        attempt['outcome'] = 'invalid'
+        raise
+
+
+# --- Schemas for providers ---
+def _plain(model):
+    """model_json_schema() with $refs inlined and the keys providers reject dropped."""
+    schema = model.model_json_schema()
+    defs = schema.get("$defs", {})
+
+    def resolve(node):
+        if "$ref" in node:
+            return resolve(defs[node["$ref"].rsplit("/", 1)[-1]])
+        out = {}
+        for key, value in node.items():
+            if key in ("title", "default", "$defs"):
+                continue
+            if key == "properties":
+                out[key] = {name: resolve(prop) for name, prop in value.items()}
+            elif key == "items":
+                out[key] = resolve(value)
+            else:
+                out[key] = value
+        return out
+
+    return resolve(schema)
+
+
+@functools.cache
+def gemini_schema(model):
+    """For Gemini's generation_config response_schema (an OpenAPI subset)."""
+    return _plain(model)
+
+
+@functools.cache
+def openai_response_format(model):
+    """OpenAI-compatible response_format in strict json_schema mode. Shared: don't mutate."""
+
+    def strict(node):
+        node = dict(node)
+        if node.get("type") == "object":
+            node["properties"] = {k: strict(v) for k, v in node.get("properties", {}).items()}
+            node["required"] = list(node["properties"])
+            node["additionalProperties"] = False
+        elif node.get("type") == "array" and "items" in node:
+            node["items"] = strict(node["items"])
+        return node
+
+    return {"type": "json_schema", "json_schema": {"name": model.__name__, "schema": strict(_plain(model)), "strict": True}}
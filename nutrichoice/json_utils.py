@@ -0,0 +1,33 @@
+import ast
+import json
+import logging
+import re
+
+# Plain logging (not observability) so this module imports without the metrics registry
+logger = logging.getLogger('nutrichoice')
+
+# --- HELPER: ROBUST JSON PARSER ---
+def clean_and_parse_json(text):
+    """
+    Surgically extracts JSON from messy AI responses.
+    """
+    logger.debug("raw AI response", extra={'text': text})
+
+    # 1. Regex to find the largest outer block starting with { and ending with }
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if match:
+        json_str = match.group(0)
+    else:
+        return None
+
+    # 2. Try standard parsing
+    try:
+        return json.loads(json_str)
+    except:
+        pass
+
+    # 3. Last Resort: Python literal_eval
+    try:
+        return ast.literal_eval(json_str)
+    except:
+        return None
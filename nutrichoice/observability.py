@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram,
+                               REGISTRY, generate_latest, multiprocess)
+
+# Logging and Prometheus metrics for both backends: same names, so dashboards cover either.
+logger = logging.getLogger('nutrichoice')
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra={...}` fields become top-level keys."""
+
+    RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record):
+        payload = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        payload.update({k: v for k, v in vars(record).items() if k not in self.RESERVED})
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging():
+    """JSON lines on stderr for the `nutrichoice` logger. Django does this through settings.LOGGING."""
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+    logger.propagate = False
+
+
+# Provider calls are slow (seconds); local spans are fast (ms). Separate buckets for each.
+PROVIDER_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+SPAN_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+PROVIDER_LATENCY = Histogram(
+    'nutrichoice_provider_latency_seconds', 'Time spent in one AI provider attempt.',
+    ['layer', 'provider', 'outcome'], buckets=PROVIDER_BUCKETS,
+)
+SPAN_LATENCY = Histogram(
+    'nutrichoice_span_seconds', 'Time spent in local request stages (json_repair, validate, db_write, image_encode, meal_parse).',
+    ['span'], buckets=SPAN_BUCKETS,
+)
+AI_SOURCE = Counter(
+    'nutrichoice_ai_source_total', 'Responses served per endpoint and ai_source.',
+    ['endpoint', 'source'],
+)
+AI_REQUESTS = Counter(
+    'nutrichoice_ai_requests_total', 'AI-backed requests per endpoint (denominator for the fallback rate).',
+    ['endpoint'],
+)
+FALLBACKS = Counter(
+    'nutrichoice_fallback_total', 'Responses degraded to a fallback (Raw Mode, offline stub, all providers failed).',
+    ['endpoint', 'kind'],
+)
+ADMISSION = Counter(
+    'nutrichoice_admission_total', 'AI endpoint admission decisions: admitted, queued (then admitted) or rejected (503).',
+    ['endpoint', 'result'],
+)
+CACHE_REQUESTS = Counter(
+    'nutrichoice_cache_requests_total', 'Cache lookups by result; hit ratio = hit / total.',
+    ['namespace', 'result'],
+)
+
+
+@contextmanager
+def span(name, **fields):
+    """Times a local stage into nutrichoice_span_seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_LATENCY.labels(name).observe(elapsed)
+        logger.debug('span', extra={'span': name, 'ms': round(elapsed * 1000, 2), **fields})
+
+
+@contextmanager
+def provider_attempt(layer, provider):
+    """
+    Times one provider call. The block sets attempt['ok'] = True on a usable answer, or
+    attempt['outcome'] = 'invalid' for a reply that failed schema validation; anything
+    else (including an exception) is recorded as an error.
+    """
+    attempt = {'ok': False}
+    start = time.perf_counter()
+    try:
+        yield attempt
+    except Exception as e:
+        attempt['error'] = str(e)[:200]
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        outcome = attempt.get('outcome') or ('ok' if attempt['ok'] else 'error')
+        PROVIDER_LATENCY.labels(str(layer), provider, outcome).observe(elapsed)
+        logger.info('provider attempt', extra={
+            'layer': layer, 'provider': provider, 'outcome': outcome,
+            'ms': round(elapsed * 1000, 1), 'error': attempt.get('error'),
+        })
+
+
+def record_source(endpoint, source, fallback=None):
+    AI_REQUESTS.labels(endpoint).inc()
+    AI_SOURCE.labels(endpoint, source or 'none').inc()
+    if fallback:
+        FALLBACKS.labels(endpoint, fallback).inc()
+
+
+def render_metrics():
+    """Returns (body, content_type) for the /metrics route."""
+    # Under gunicorn with PROMETHEUS_MULTIPROC_DIR set, merge every worker's samples
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+# --- Admin-only routes (/metrics, /profiles) ---
+def has_admin_token(headers, token):
+    """
+    True if the request carries the admin token: `X-Profile-Token: <token>`, or
+    `Authorization: Bearer <token>` (what a Prometheus scrape config sends). No token, no access.
+    """
+    if not token:
+        return False
+    return headers.get('X-Profile-Token') == token or headers.get('Authorization') == f'Bearer {token}'
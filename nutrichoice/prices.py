@@ -0,0 +1,253 @@
+import abc
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import quote_plus
+
+from .observability import logger
+
+PRICE_FIXTURES = os.environ.get(
+    "PRICE_FIXTURES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "prices.json")
+)
+PRICE_CACHE_TTL_SECONDS = float(os.environ.get("PRICE_CACHE_TTL_SECONDS", 900))
+PRICE_SOURCE_TIMEOUT = float(os.environ.get("PRICE_SOURCE_TIMEOUT", 1.5))
+
+_MISSING = object()
+
+
+def normalize_item(text):
+    return re.sub(r"\s+", " ", str(text).strip().lower())
+
+
+# --- SOURCES ---
+class PriceSource(abc.ABC):
+    """
+    One store. Implement `fetch(item)` -> quote or None (not stocked), where a quote is
+    {"price", "unit", "link"}. Stores with a batch/search API should also override
+    `fetch_many(items)` -> {item: quote or None} to answer the whole list in one round trip.
+    """
+
+    name = ""
+    currency = "₹"
+    timeout = PRICE_SOURCE_TIMEOUT
+
+    @abc.abstractmethod
+    def fetch(self, item):
+        ...
+
+    def fetch_many(self, items):
+        return {item: self.fetch(item) for item in items}
+
+    def catalog(self):
+        """Item names this store is known to stock (used to pick items out of meal plans)."""
+        return ()
+
+
+class FixtureSource(PriceSource):
+    """A store answered from a local price table after a simulated round trip."""
+
+    def __init__(self, name, prices, link, latency=0.0, currency="₹", timeout=PRICE_SOURCE_TIMEOUT):
+        self.name = name
+        self.prices = {normalize_item(k): v for k, v in prices.items()}
+        self.link = link
+        self.latency = latency
+        self.currency = currency
+        self.timeout = timeout
+
+    def fetch_many(self, items):
+        time.sleep(self.latency)  # one request for the whole batch
+        return {item: self._quote(item) for item in items}
+
+    def fetch(self, item):
+        return self.fetch_many([item])[item]
+
+    def _quote(self, item):
+        row = self.prices.get(item)
+        if row is None:
+            return None
+        return {"price": row["price"], "unit": row.get("unit"), "link": self.link.format(query=quote_plus(item))}
+
+    def catalog(self):
+        return self.prices.keys()
+
+
+def load_fixture_sources(path=PRICE_FIXTURES):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [
+        FixtureSource(name, store["prices"], store["link"], store.get("latency_ms", 0) / 1000,
+                      currency=data.get("currency", "₹"))
+        for name, store in data["stores"].items()
+    ]
+
+
+# --- CACHE ---
+class TTLCache:
+    """Thread-safe dict whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return default
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                now = time.monotonic()
+                self._data = {k: e for k, e in self._data.items() if e[0] >= now}
+                while len(self._data) >= self.max_entries:
+                    self._data.pop(next(iter(self._data)))  # oldest insert first
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+
+# --- AGGREGATOR ---
+class PriceAggregator:
+    """
+    Prices items across every source at once. Each source gets one `fetch_many` call per
+    request covering only the items it has no cached answer for, with its own timeout, so
+    the cost of a shopping list grows with its unique items, not items x stores.
+    """
+
+    def __init__(self, sources, ttl=PRICE_CACHE_TTL_SECONDS, max_workers=16):
+        self.sources = list(sources)
+        self.cache = TTLCache(ttl)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="price-source")
+        names = {normalize_item(n) for s in self.sources for n in s.catalog()}
+        # Longest first so "peanut butter" wins over "butter"
+        alternation = "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+        self.catalog_re = re.compile(r"\b(" + alternation + r")(?:s|es)?\b") if names else None
+
+    def resolve(self, text):
+        """Maps free text ("2 packs Paneer", "basmati rice 1kg") to a catalog item."""
+        item = normalize_item(text)
+        if self.catalog_re is not None:
+            match = self.catalog_re.search(item)
+            if match:
+                return match.group(1)
+        return item
+
+    def lookup(self, items):
+        """{item: {store: quote or None}} for unique resolved items; a store that timed out is absent."""
+        items = list(dict.fromkeys(items))
+        found = {item: {} for item in items}
+        jobs = {}
+        for source in self.sources:
+            pending = []
+            for item in items:
+                cached = self.cache.get((item, source.name), _MISSING)
+                if cached is _MISSING:
+                    pending.append(item)
+                else:
+                    found[item][source.name] = cached
+            if pending:
+                future = self.pool.submit(source.fetch_many, pending)
+                # Cache from the callback so an answer that arrives after its timeout still warms the cache
+                future.add_done_callback(lambda f, source=source, pending=pending: self._store(source, pending, f))
+                jobs[source] = (pending, future)
+
+        started = time.monotonic()
+        for source, (pending, future) in jobs.items():
+            try:
+                quotes = future.result(timeout=max(0.0, started + source.timeout - time.monotonic()))
+            except FutureTimeout:
+                logger.warning("price source timed out", extra={'store': source.name, 'items': len(pending)})
+                continue
+            except Exception as e:
+                logger.warning("price source failed", extra={'store': source.name, 'error': str(e)[:200]})
+                continue
+            for item in pending:
+                found[item][source.name] = quotes.get(item)
+        return found
+
+    def _store(self, source, pending, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        quotes = future.result()
+        for item in pending:
+            # "Not stocked" (None) is cached too; errors are not
+            self.cache.set((item, source.name), quotes.get(item))
+
+    def _results(self, item, by_store):
+        results = [
+            {"store": source.name, "price": quote["price"], "currency": source.currency,
+             "unit": quote.get("unit"), "link": quote["link"]}
+            for source in self.sources
+            if (quote := by_store.get(source.name))
+        ]
+        cheapest = min((r["price"] for r in results), default=None)
+        for r in results:
+            r["is_cheapest"] = r["price"] == cheapest
+        unavailable = [s.name for s in self.sources if not by_store.get(s.name)]
+        return results, unavailable
+
+    def compare(self, text):
+        item = self.resolve(text)
+        results, unavailable = self._results(item, self.lookup([item])[item])
+        return {"item": text, "matched": item, "results": results, "unavailable": unavailable}
+
+    def compare_list(self, texts):
+        """Prices a shopping list: per-item comparison, per-store totals and the cheapest basket."""
+        wanted = Counter(self.resolve(t) for t in texts if str(t).strip())
+        found = self.lookup(wanted)
+
+        lines, missing = [], []
+        totals = {s.name: {"total": 0, "items": 0} for s in self.sources}
+        basket = {"total": 0, "picks": []}
+        for item, quantity in wanted.items():
+            results, unavailable = self._results(item, found[item])
+            lines.append({"item": item, "quantity": quantity, "results": results, "unavailable": unavailable})
+            if not results:
+                missing.append(item)
+                continue
+            for r in results:
+                totals[r["store"]]["total"] += r["price"] * quantity
+                totals[r["store"]]["items"] += 1
+            best = next(r for r in results if r["is_cheapest"])
+            basket["total"] += best["price"] * quantity
+            basket["picks"].append({"item": item, "store": best["store"], "price": best["price"], "quantity": quantity})
+
+        for store in totals.values():
+            store["complete"] = store["items"] == len(wanted) - len(missing)
+        return {"items": lines, "store_totals": totals, "cheapest_basket": basket, "missing": missing}
+
+    def shopping_list(self, meal_plan):
+        """Catalog items mentioned in a /generate-meal-plan response, one entry per meal that uses them."""
+        if self.catalog_re is None:
+            return []
+        items = []
+        for meal in (meal_plan or {}).get("meals") or []:
+            if not isinstance(meal, dict):
+                continue
+            parts = [meal.get("name", "")]
+            for key in ("ingredients", "recipe"):
+                value = meal.get(key) or []
+                parts.extend(value if isinstance(value, list) else [value])
+            text = normalize_item(" ".join(str(p) for p in parts))
+            items.extend(dict.fromkeys(m.group(1) for m in self.catalog_re.finditer(text)))
+        return items
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_aggregator():
+    """Process-wide aggregator over the configured sources (store fixtures for now)."""
+    global _aggregator
+    with _aggregator_lock:
+        if _aggregator is None:
+            _aggregator = PriceAggregator(load_fixture_sources())
+        return _aggregator
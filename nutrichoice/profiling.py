@@ -0,0 +1,186 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+from .observability import has_admin_token, logger
+
+# Per-request profiling shared by the Django middleware (store/profiling.py) and the FastAPI
+# one (backend/profiling.py); those only adapt requests and responses.
+#
+# Output per profiled request, in the profile directory:
+#   <id>.pstats  cProfile data (snakeviz, `python -m pstats`)
+#   <id>.folded  sampled stacks in collapsed format (flamegraph.pl, speedscope)
+#   <id>.json    summary: path, wall time, tracemalloc peak and top allocation sites
+# Only the newest `keep` profiles are kept, so a sample rate can't fill the disk.
+PROFILE_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+PROFILE_EXTS = ('pstats', 'folded', 'json')
+SAMPLE_INTERVAL = 0.005
+DEFAULT_KEEP = 100
+
+# tracemalloc is process-wide, so only one request is profiled at a time
+busy = threading.Lock()
+
+
+def profile_dir(configured=''):
+    path = configured or os.path.join(tempfile.gettempdir(), 'nutrichoice-profiles')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def should_profile(headers, token, sample_rate):
+    """An admin asked with `X-Profile: 1`, or the request falls in the random sample."""
+    if has_admin_token(headers, token) and headers.get('X-Profile', '').lower() in ('1', 'true'):
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of the attached threads every few ms into folded-stack counts."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.interval = interval
+        self.thread_ids = set()
+        self.stacks = Counter()
+        self._halt = threading.Event()  # not _stop: Thread uses that name internally
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.thread_ids):
+                frame = frames.get(ident)
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if names:
+                    self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+class ProfileSession:
+    """One profiled request: cProfile + stack sampling on attached threads, tracemalloc peak."""
+
+    def __init__(self, label, directory, keep=DEFAULT_KEEP):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.directory = directory
+        self.keep = keep
+        self.profilers = {}  # thread id -> cProfile.Profile; a Profile can't span threads
+        self.sampler = StackSampler()
+        self._started_tracemalloc = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        self.sampler.start()
+
+    def attach(self):
+        """Call from the thread doing the request's work."""
+        ident = threading.get_ident()
+        self.sampler.thread_ids.add(ident)
+        profiler = self.profilers.get(ident) or cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one active cProfile per interpreter (sys.monitoring), and that
+            # one already sees every thread; this thread is covered by it and the stack sampler
+            return
+        self.profilers[ident] = profiler
+
+    def detach(self):
+        ident = threading.get_ident()
+        if ident in self.profilers:
+            self.profilers[ident].disable()
+        self.sampler.thread_ids.discard(ident)
+
+    def is_attached(self):
+        return threading.get_ident() in self.sampler.thread_ids
+
+    def stop(self):
+        wall = time.perf_counter() - self.started
+        self.sampler.stop()
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:15]
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        base = os.path.join(self.directory, self.id)
+        profilers = list(self.profilers.values())
+        if profilers:
+            stats = pstats.Stats(profilers[0])
+            for extra in profilers[1:]:
+                stats.add(extra)
+            stats.dump_stats(base + '.pstats')
+        with open(base + '.folded', 'w') as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        summary = {
+            'id': self.id,
+            'label': self.label,
+            'wall_ms': round(wall * 1000, 1),
+            'samples': sum(self.sampler.stacks.values()),
+            'tracemalloc_peak_bytes': peak,
+            'top_allocations': [{'site': str(s.traceback), 'bytes': s.size, 'count': s.count} for s in top],
+        }
+        with open(base + '.json', 'w') as f:
+            json.dump(summary, f, indent=2)
+        logger.info('request profiled', extra={'profile_id': self.id, 'label': self.label,
+                                               'wall_ms': summary['wall_ms'], 'peak_bytes': peak})
+        prune(self.directory, self.keep)
+        return summary
+
+
+def prune(directory, keep):
+    """Deletes all but the newest `keep` profiles (every output file of each); returns how many."""
+    newest = {}
+    for name in os.listdir(directory):
+        profile_id, _, ext = name.partition('.')
+        if PROFILE_ID_RE.match(profile_id) and ext in PROFILE_EXTS:
+            mtime = os.path.getmtime(os.path.join(directory, name))
+            newest[profile_id] = max(newest.get(profile_id, 0), mtime)
+    stale = sorted(newest, key=newest.get, reverse=True)[max(keep, 1):]
+    for profile_id in stale:
+        for ext in PROFILE_EXTS:
+            try:
+                os.remove(os.path.join(directory, f"{profile_id}.{ext}"))
+            except FileNotFoundError:
+                pass
+    return len(stale)
+
+
+# --- Listing and download ---
+def list_summaries(directory):
+    """Newest first: id, label, wall time and peak memory of each stored profile."""
+    paths = [os.path.join(directory, n) for n in os.listdir(directory) if n.endswith('.json')]
+    summaries = []
+    for path in sorted(paths, key=os.path.getmtime, reverse=True):
+        with open(path) as f:
+            data = json.load(f)
+        summaries.append({k: data[k] for k in ('id', 'label', 'wall_ms', 'tracemalloc_peak_bytes')})
+    return summaries
+
+
+def profile_file(directory, profile_id, ext):
+    """Path of one stored output file, or None for an unknown or malformed id/extension."""
+    if not PROFILE_ID_RE.match(profile_id) or ext not in PROFILE_EXTS:
+        return None
+    path = os.path.join(directory, f"{profile_id}.{ext}")
+    return path if os.path.exists(path) else None
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+from nutrichoice import admission
+from nutrichoice.admission import AdmissionGate, AsyncAdmissionGate, Deadline
+
+
+class DeadlineTests(unittest.TestCase):
+    def deadline(self, seconds, elapsed):
+        with mock.patch.object(admission.time, 'monotonic', return_value=100.0):
+            deadline = Deadline(seconds)
+        patch = mock.patch.object(admission.time, 'monotonic', return_value=100.0 + elapsed)
+        patch.start()
+        self.addCleanup(patch.stop)
+        return deadline
+
+    def test_even_share_of_what_is_left(self):
+        deadline = self.deadline(25, elapsed=1)
+        self.assertAlmostEqual(deadline.attempt_timeout(3), 8.0)
+        self.assertAlmostEqual(deadline.attempt_timeout(1), 24.0)
+        self.assertAlmostEqual(deadline.attempt_timeout(0), 24.0)
+
+    def test_floor_and_cap(self):
+        # Never below MIN_ATTEMPT_SECONDS while there is time, never past the deadline
+        self.assertEqual(self.deadline(25, elapsed=23).attempt_timeout(4), admission.MIN_ATTEMPT_SECONDS)
+        self.assertAlmostEqual(self.deadline(25, elapsed=24.5).attempt_timeout(4), 0.5)
+
+    def test_expiry(self):
+        self.assertFalse(self.deadline(25, elapsed=23).expired())
+        self.assertTrue(self.deadline(25, elapsed=24.5).expired())
+        deadline = self.deadline(25, elapsed=30)
+        self.assertEqual((deadline.remaining(), deadline.attempt_timeout(2)), (0.0, 0.0))
+
+
+class AdmissionGateTests(unittest.TestCase):
+    def acquire_in_thread(self, gate):
+        results = []
+        thread = threading.Thread(target=lambda: results.append(gate.acquire()))
+        thread.start()
+        return thread, results
+
+    def wait_for_waiters(self, gate, n):
+        for _ in range(200):
+            if gate.waiting == n:
+                return
+            time.sleep(0.005)
+        self.fail(f"expected {n} waiting, got {gate.waiting}")
+
+    def test_admit_queue_reject(self):
+        gate = AdmissionGate(limit=1, queue=1, wait=5)
+        self.assertEqual(gate.acquire(), 'admitted')
+        thread, results = self.acquire_in_thread(gate)
+        self.wait_for_waiters(gate, 1)
+        self.assertIsNone(gate.acquire())  # queue full
+        gate.release()
+        thread.join()
+        self.assertEqual(results, ['queued'])
+        gate.release()
+        self.assertEqual((gate.active, gate.waiting), (0, 0))
+
+    def test_queue_wait_times_out(self):
+        gate = AdmissionGate(limit=1, queue=1, wait=0.05)
+        gate.acquire()
+        self.assertIsNone(gate.acquire())
+        self.assertEqual((gate.active, gate.waiting), (1, 0))
+
+    def test_freed_slot_goes_to_the_oldest_waiter(self):
+        gate = AdmissionGate(limit=1, queue=2, wait=0.2)
+        gate.acquire()
+        thread, results = self.acquire_in_thread(gate)
+        self.wait_for_waiters(gate, 1)
+        gate.release()
+        # The slot is already the waiter's, so a newcomer queues behind it
+        self.assertIsNone(gate.acquire())
+        thread.join()
+        self.assertEqual((results, gate.active), (['queued'], 1))
+
+
+class AsyncAdmissionGateTests(unittest.TestCase):
+    def test_admit_queue_reject(self):
+        async def scenario():
+            gate = AsyncAdmissionGate(limit=1, queue=1, wait=5)
+            self.assertEqual(await gate.acquire(), 'admitted')
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            self.assertEqual(gate.waiting, 1)
+            self.assertIsNone(await gate.acquire())  # queue full
+            await gate.release()
+            self.assertEqual(await waiter, 'queued')
+            await gate.release()
+            self.assertEqual((gate.active, gate.waiting), (0, 0))
+        asyncio.run(scenario())
+
+    def test_freed_slot_goes_to_the_oldest_waiter(self):
+        async def scenario():
+            gate = AsyncAdmissionGate(limit=1, queue=2, wait=0.1)
+            await gate.acquire()
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            await gate.release()
+            self.assertIsNone(await gate.acquire())
+            self.assertEqual((await waiter, gate.active), ('queued', 1))
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_leaves_the_queue(self):
+        async def scenario():
+            gate = AsyncAdmissionGate(limit=1, queue=2, wait=5)
+            await gate.acquire()
+            first = asyncio.ensure_future(gate.acquire())
+            second = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            first.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            self.assertEqual(gate.waiting, 1)
+            await gate.release()
+            self.assertEqual((await second, gate.active, gate.waiting), ('queued', 1, 0))
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import unittest
+
+from nutrichoice.ai_schemas import (FoodScanResult, InvalidOutput, MealEstimate, RosterResult, SnapMealResult,
+                                    accept_reply, openai_response_format, parse_output)
+from nutrichoice.json_utils import clean_and_parse_json
+
+MEAL = {"estimated_calories": 540, "macros": {"protein": "21g", "carbs": "60g", "fat": "18g"},
+        "ingredients": ["rice", "dal"]}
+
+
+class ParseOutputTests(unittest.TestCase):
+    def test_valid_json_passes_through(self):
+        self.assertEqual(parse_output(json.dumps(MEAL), MealEstimate), MEAL)
+
+    def test_drift_is_coerced(self):
+        reply = dict(MEAL, estimated_calories="540 kcal", macros={"protein": 21, "carbs": 60.5, "fat": "18g"},
+                     extra="ignored")
+        self.assertEqual(parse_output(json.dumps(reply), MealEstimate),
+                         dict(MEAL, macros={"protein": "21", "carbs": "60.5", "fat": "18g"}))
+        scan = {"food_name": "Poha", "estimated_calories": 250.4, "protein": "5 g", "carbs": 45, "fat": "6.5g"}
+        self.assertEqual(parse_output(json.dumps(scan), FoodScanResult),
+                         {"food_name": "Poha", "estimated_calories": 250, "protein": 5.0, "carbs": 45.0, "fat": 6.5})
+
+    def test_bare_and_lower_case_days(self):
+        reply = {"monday": [{"time": "09:00", "event": "Shift"}], " friday ": []}
+        days = parse_output(json.dumps(reply), RosterResult)["weekly_schedule"]
+        self.assertEqual(days["Monday"], [{"time": "09:00", "event": "Shift"}])
+        self.assertEqual((days["Friday"], days["Sunday"]), ([], []))
+
+    def test_prose_is_repaired(self):
+        text = "Sure! Here is the estimate:\n```json\n" + json.dumps(MEAL) + "\n```"
+        with self.assertRaises(InvalidOutput):
+            parse_output(text, MealEstimate)
+        self.assertEqual(parse_output(text, MealEstimate, repair=clean_and_parse_json), MEAL)
+
+    def test_unrepairable(self):
+        for text in ("I can't see any food in this image.", json.dumps({"estimated_calories": "lots"})):
+            with self.assertRaises(InvalidOutput):
+                parse_output(text, MealEstimate, repair=clean_and_parse_json)
+
+
+class AcceptReplyTests(unittest.TestCase):
+    def test_free_form_returns_text(self):
+        attempt = {}
+        self.assertEqual(accept_reply("anything", None, attempt), "anything")
+        self.assertEqual(attempt, {})
+
+    def test_invalid_reply_marks_the_attempt(self):
+        attempt = {'outcome': 'ok'}
+        with self.assertRaises(InvalidOutput):
+            accept_reply("not json", MealEstimate, attempt, repair=clean_and_parse_json)
+        self.assertEqual(attempt['outcome'], 'invalid')
+
+    def test_valid_reply(self):
+        attempt = {'outcome': 'ok'}
+        self.assertEqual(accept_reply(json.dumps(MEAL), MealEstimate, attempt), MEAL)
+        self.assertEqual(attempt['outcome'], 'ok')
+
+
+class StrictSchemaTests(unittest.TestCase):
+    def objects(self, node):
+        if node.get("type") == "object":
+            yield node
+            for prop in node["properties"].values():
+                yield from self.objects(prop)
+        elif node.get("type") == "array":
+            yield from self.objects(node["items"])
+
+    def test_every_object_is_closed_and_fully_required(self):
+        for model in (SnapMealResult, RosterResult, FoodScanResult):
+            response_format = openai_response_format(model)
+            self.assertEqual((response_format["type"], response_format["json_schema"]["strict"]), ("json_schema", True))
+            objects = list(self.objects(response_format["json_schema"]["schema"]))
+            self.assertTrue(objects)
+            for node in objects:
+                self.assertEqual(node["required"], list(node["properties"]))
+                self.assertIs(node["additionalProperties"], False)
+                self.assertNotIn("$ref", json.dumps(node))
+
+
+if __name__ == "__main__":
+    unittest.main()
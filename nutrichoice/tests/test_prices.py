@@ -0,0 +1,100 @@
+import time
+import unittest
+from unittest import mock
+
+from nutrichoice import prices
+from nutrichoice.prices import FixtureSource, PriceAggregator, load_fixture_sources
+
+
+class CountingSource(FixtureSource):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    def fetch_many(self, items):
+        self.calls.append(list(items))
+        return super().fetch_many(items)
+
+
+def store(name, prices, **kwargs):
+    return CountingSource(name, {item: {"price": price, "unit": "1 kg"} for item, price in prices.items()},
+                          f"https://{name.lower()}.example/?q={{query}}", **kwargs)
+
+
+class PriceAggregatorTests(unittest.TestCase):
+    def setUp(self):
+        self.a = store("A", {"paneer": 92, "rice": 67, "tofu": 75})
+        self.b = store("B", {"paneer": 89, "rice": 68})
+        self.aggregator = PriceAggregator([self.a, self.b], ttl=60)
+        self.addCleanup(self.aggregator.pool.shutdown)
+
+    def test_compare_picks_the_cheapest_store(self):
+        result = self.aggregator.compare("2 packs Paneer")
+        self.assertEqual(result["matched"], "paneer")
+        self.assertEqual([(r["store"], r["price"], r["is_cheapest"]) for r in result["results"]],
+                         [("A", 92, False), ("B", 89, True)])
+        self.assertEqual(self.aggregator.compare("tofu")["unavailable"], ["B"])
+
+    def test_answers_are_cached_per_item_and_store(self):
+        clock = [1000.0]
+        with mock.patch.object(prices.time, "monotonic", side_effect=lambda: clock[0]):
+            self.aggregator.compare("paneer")
+            self.aggregator.compare("paneer")
+            self.aggregator.compare("tofu")  # "not stocked" at B is cached too
+            self.aggregator.compare("tofu")
+            self.assertEqual((self.a.calls, self.b.calls), ([["paneer"], ["tofu"]], [["paneer"], ["tofu"]]))
+            clock[0] += 61
+            self.aggregator.compare("paneer")
+        self.assertEqual(self.a.calls[-1], ["paneer"])
+        self.assertEqual(len(self.a.calls), 3)
+
+    def test_one_fetch_many_per_source_per_list(self):
+        self.aggregator.compare("rice")
+        self.aggregator.compare_list(["paneer", "Rice 1kg", "paneer", "tofu", "basmati"])
+        # rice was already cached; everything else goes to each store in one batch
+        self.assertEqual(self.a.calls, [["rice"], ["paneer", "tofu", "basmati"]])
+        self.assertEqual(self.b.calls, [["rice"], ["paneer", "tofu", "basmati"]])
+
+    def test_list_totals_and_cheapest_basket(self):
+        result = self.aggregator.compare_list(["paneer", "paneer", "rice", "tofu", "saffron"])
+        self.assertEqual(result["store_totals"], {
+            "A": {"total": 92 * 2 + 67 + 75, "items": 3, "complete": True},
+            "B": {"total": 89 * 2 + 68, "items": 2, "complete": False},
+        })
+        self.assertEqual(result["cheapest_basket"], {"total": 89 * 2 + 67 + 75, "picks": [
+            {"item": "paneer", "store": "B", "price": 89, "quantity": 2},
+            {"item": "rice", "store": "A", "price": 67, "quantity": 1},
+            {"item": "tofu", "store": "A", "price": 75, "quantity": 1},
+        ]})
+        self.assertEqual(result["missing"], ["saffron"])
+
+    def test_slow_source_is_reported_unavailable(self):
+        slow = store("Slow", {"paneer": 10}, latency=0.3, timeout=0.05)
+        aggregator = PriceAggregator([self.a, slow], ttl=60)
+        self.addCleanup(aggregator.pool.shutdown)
+        started = time.monotonic()
+        with self.assertLogs(prices.logger, "WARNING"):
+            result = aggregator.compare("paneer")
+        self.assertLess(time.monotonic() - started, 0.25)
+        self.assertEqual([r["store"] for r in result["results"]], ["A"])
+        self.assertEqual(result["unavailable"], ["Slow"])
+        # The late answer still warms the cache for the next request
+        aggregator.pool.shutdown(wait=True)
+        self.assertEqual(aggregator.cache.get(("paneer", "Slow"))["price"], 10)
+
+
+class FixtureSourceTests(unittest.TestCase):
+    def test_shipped_fixtures(self):
+        sources = load_fixture_sources()
+        for source in sources:
+            source.latency = 0
+        aggregator = PriceAggregator(sources)
+        self.addCleanup(aggregator.pool.shutdown)
+        result = aggregator.compare("Basmati Rice 1kg")
+        self.assertEqual(result["matched"], "basmati rice")
+        self.assertEqual(len(result["results"]), len(sources))
+        self.assertEqual(sum(r["is_cheapest"] for r in result["results"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
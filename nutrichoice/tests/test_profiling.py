@@ -0,0 +1,88 @@
+import cProfile
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from nutrichoice import profiling
+
+
+class SingleProfiler(cProfile.Profile):
+    """cProfile as on Python 3.12+: a second active profiler in the interpreter is refused."""
+    active = None
+
+    def enable(self, *args, **kwargs):
+        if SingleProfiler.active not in (None, self):
+            raise ValueError("Another profiling tool is already active")
+        SingleProfiler.active = self
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        if SingleProfiler.active is self:
+            SingleProfiler.active = None
+        super().disable()
+
+
+class ProfileSessionTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def test_worker_thread_falls_back_to_sampling(self):
+        session = profiling.ProfileSession('GET /snap-meal', self.directory)
+        with mock.patch.object(profiling.cProfile, 'Profile', SingleProfiler):
+            session.start()
+            session.attach()
+
+            errors = []
+
+            def work():
+                try:
+                    session.attach()
+                    sum(range(1000))
+                    session.detach()
+                except ValueError as e:
+                    errors.append(e)
+
+            worker = threading.Thread(target=work)
+            worker.start()
+            worker.join()
+            session.detach()
+            session.stop()
+        self.assertEqual(errors, [])
+        self.assertEqual(list(session.profilers), [threading.get_ident()])
+        for ext in profiling.PROFILE_EXTS:
+            self.assertIsNotNone(profiling.profile_file(self.directory, session.id, ext), ext)
+
+    def test_only_the_newest_profiles_are_kept(self):
+        ids = []
+        for age in range(5):
+            profile_id = f"{age:032x}"
+            ids.append(profile_id)
+            for ext in profiling.PROFILE_EXTS:
+                path = os.path.join(self.directory, f"{profile_id}.{ext}")
+                open(path, 'w').close()
+                os.utime(path, (1000 - age, 1000 - age))
+        open(os.path.join(self.directory, 'notes.txt'), 'w').close()
+
+        self.assertEqual(profiling.prune(self.directory, keep=2), 3)
+        left = sorted(os.listdir(self.directory))
+        self.assertEqual(left, sorted([f"{i}.{ext}" for i in ids[:2] for ext in profiling.PROFILE_EXTS] + ['notes.txt']))
+
+    def test_stop_prunes(self):
+        sessions = []
+        for _ in range(3):
+            session = profiling.ProfileSession('GET /', self.directory, keep=2)
+            session.start()
+            session.stop()
+            sessions.append(session)
+            if len(sessions) == 1:
+                for name in os.listdir(self.directory):
+                    os.utime(os.path.join(self.directory, name), (0, 0))
+        kept = {name.partition('.')[0] for name in os.listdir(self.directory)}
+        self.assertEqual(kept, {sessions[1].id, sessions[2].id})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from nutrichoice.admission import CONNECT_TIMEOUT, AdmissionGate, Deadline
+from nutrichoice.observability import ADMISSION
+
+# Django side of nutrichoice/admission.py. Gates count per worker process and only bound
+# concurrency when a process serves several requests at once (gunicorn --threads, or gthread /
+# async workers). A plain sync worker handles one request at a time, so its gate never queues
+# or rejects; there the worker count is the concurrency limit.
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def get_gate(endpoint):
+    with _gates_lock:
+        if endpoint not in _gates:
+            _gates[endpoint] = AdmissionGate(settings.AI_CONCURRENCY_LIMIT, settings.AI_QUEUE_LIMIT,
+                                             settings.AI_QUEUE_WAIT_SECONDS)
+        return _gates[endpoint]
+
+
+def overloaded():
+    response = JsonResponse({"error": "Server busy. Try again shortly."}, status=503)
+    response['Retry-After'] = str(settings.AI_RETRY_AFTER_SECONDS)
+    return response
+
+
+def admission(endpoint):
+    """
+    View decorator for AI-backed endpoints: bounded concurrency with a short admission
+    queue, and a `request.deadline` budget that starts before any queueing.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            request.deadline = Deadline(settings.AI_DEADLINE_SECONDS)
+            gate = get_gate(endpoint)
+            result = gate.acquire()
+            ADMISSION.labels(endpoint, result or 'rejected').inc()
+            if result is None:
+                return overloaded()
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                gate.release()
+        return wrapper
+    return decorator
@@ -0,0 +1,96 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from nutrichoice.observability import CACHE_REQUESTS
+
+# Namespaces for versioned keys. Bumping a version orphans every key built from it,
+# so invalidation never has to enumerate cached list pages.
+FOODS = 'food'
+PROFILE = 'profile'
+
+LOCK_TTL = 10         # seconds a rebuild may hold the stampede lock
+LOCK_WAIT = 0.05      # poll interval while another worker rebuilds
+LOCK_POLLS = 40       # give up waiting after ~2s and load directly
+
+# Striped so versioned keys don't grow an unbounded lock table
+_local_locks = [threading.Lock() for _ in range(64)]
+
+
+def _timeout():
+    return getattr(settings, 'OBJECT_CACHE_TIMEOUT', 300)
+
+
+def get_version(namespace):
+    version = cache.get(f'ver:{namespace}')
+    if version is None:
+        cache.add(f'ver:{namespace}', 1, timeout=None)
+        version = cache.get(f'ver:{namespace}', 1)
+    return version
+
+
+def bump_version(namespace):
+    try:
+        cache.incr(f'ver:{namespace}')
+    except ValueError:
+        # Key was evicted; any value other than the old one invalidates
+        cache.set(f'ver:{namespace}', int(time.time()), timeout=None)
+
+
+def object_key(namespace, pk):
+    return f'{namespace}:{pk}:v{get_version(f"{namespace}:{pk}")}'
+
+
+def list_key(namespace, suffix=''):
+    return f'{namespace}:list:{suffix}:v{get_version(f"{namespace}:list")}'
+
+
+def invalidate_object(namespace, pk):
+    bump_version(f'{namespace}:{pk}')
+    bump_version(f'{namespace}:list')
+
+
+def invalidate_list(namespace):
+    bump_version(f'{namespace}:list')
+
+
+def _local_lock(key):
+    return _local_locks[hash(key) % len(_local_locks)]
+
+
+def read_through(key, loader, timeout=None):
+    """
+    Returns the cached value for `key`, calling `loader()` on a miss.
+    Only one caller per key rebuilds at a time: threads in this process queue on a
+    local lock, other processes see the cache.add() lock and poll for the result.
+    """
+    namespace = key.split(':', 1)[0]
+    value = cache.get(key)
+    if value is not None:
+        CACHE_REQUESTS.labels(namespace, 'hit').inc()
+        return value
+
+    CACHE_REQUESTS.labels(namespace, 'miss').inc()
+    with _local_lock(key):
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f'lock:{key}'
+        acquired = cache.add(lock_key, 1, timeout=LOCK_TTL)
+        if not acquired:
+            for _ in range(LOCK_POLLS):
+                time.sleep(LOCK_WAIT)
+                value = cache.get(key)
+                if value is not None:
+                    return value
+        try:
+            value = loader()
+            if value is not None:
+                cache.set(key, value, timeout=timeout or _timeout())
+            return value
+        finally:
+            if acquired:
+                cache.delete(lock_key)
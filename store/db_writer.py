@@ -0,0 +1,119 @@
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+WRITE_TIMEOUT = 30  # seconds a request waits for its write to be committed
+
+
+class WriteTimeout(TimeoutError):
+    """
+    run_write gave up waiting. A job still queued is cancelled and never runs
+    (may_apply=False); one the writer had already started may still commit.
+    """
+
+    def __init__(self, may_apply):
+        self.may_apply = may_apply
+        super().__init__("Write timed out; it may still be applied" if may_apply
+                         else "Write timed out before it started; it was not applied")
+
+
+class WriterQueue:
+    """
+    Serializes writes onto one thread so SQLite never sees two writers at once.
+    Jobs that arrive together are committed as a group: one BEGIN/COMMIT (and one
+    WAL sync) for up to `group_size` writes, each in its own savepoint so a failing
+    job only rolls back itself.
+    """
+
+    def __init__(self, group_size=32, group_window=0.002):
+        self.group_size = group_size
+        self.group_window = group_window
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self._ensure_started()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def on_writer_thread(self):
+        return threading.current_thread() is self._thread
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def _next_group(self):
+        group = [self._jobs.get()]
+        while len(group) < self.group_size:
+            try:
+                group.append(self._jobs.get(timeout=self.group_window))
+            except queue.Empty:
+                break
+        return group
+
+    def _run(self):
+        while True:
+            group = self._next_group()
+            close_old_connections()
+            results = []
+            try:
+                with transaction.atomic():
+                    for future, fn, args, kwargs in group:
+                        # False if run_write timed out and cancelled the job while it was queued
+                        if not future.set_running_or_notify_cancel():
+                            continue
+                        try:
+                            with transaction.atomic():
+                                results.append((future, fn(*args, **kwargs), None))
+                        except Exception as e:
+                            results.append((future, None, e))
+            except Exception as e:
+                # BEGIN or COMMIT failed: nothing in this group was written
+                results = [(future, None, e) for future, *_ in group
+                           if future.running() or future.set_running_or_notify_cancel()]
+
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriterQueue(settings.DB_WRITER_GROUP_SIZE, settings.DB_WRITER_GROUP_WINDOW)
+        return _writer
+
+
+def run_write(fn, *args, **kwargs):
+    """
+    Runs a write on the shared writer thread in SQLite production mode and waits for
+    its group to commit. Everywhere else (Postgres, dev SQLite) it simply calls `fn`.
+    Raises WriteTimeout after WRITE_TIMEOUT seconds.
+    """
+    if not settings.SQLITE_PRODUCTION_MODE:
+        return fn(*args, **kwargs)
+    writer = get_writer()
+    if writer.on_writer_thread():
+        return fn(*args, **kwargs)
+    future = writer.submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=WRITE_TIMEOUT)
+    except FutureTimeout:
+        raise WriteTimeout(may_apply=not future.cancel()) from None
@@ -0,0 +1,201 @@
+import atexit
+import re
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from . import cache
+from .db_writer import WriteTimeout, run_write
+from nutrichoice.observability import logger, span
+from .models import ChangeCounter, FoodItem, normalize_food_name
+
+MACROS = ('calories', 'protein', 'carbs', 'fat')
+
+
+def _number(value):
+    """Models return '12g', '12.5', 12 or None for the same field."""
+    match = re.search(r"-?\d+(?:\.\d+)?", str(value if value is not None else 0))
+    return float(match.group(0)) if match else 0.0
+
+
+def scan_to_observation(data):
+    """Turns a parsed ScanFoodView response into an observation dict, or None if unnamed."""
+    name = str(data.get('food_name') or '').strip()
+    key = normalize_food_name(name)
+    if not key:
+        return None
+    return {
+        'key': key,
+        'name': name[:200],
+        'calories': _number(data.get('estimated_calories', data.get('calories'))),
+        'protein': _number(data.get('protein')),
+        'carbs': _number(data.get('carbs')),
+        'fat': _number(data.get('fat')),
+        'count': 1,
+    }
+
+
+def _merge(into, obs):
+    # Running mean weighted by how many scans each side already represents
+    n, m = into['count'], obs['count']
+    for field in MACROS:
+        into[field] = (into[field] * n + obs[field] * m) / (n + m)
+    into['count'] = n + m
+
+
+def upsert_observations(observations):
+    """
+    Folds a batch of scan observations into canonical FoodItem rows in one transaction.
+    Duplicates within the batch are merged in memory first, so the cost is one SELECT,
+    one bulk UPDATE and one bulk INSERT per batch regardless of burst size.
+    """
+    grouped = {}
+    for obs in observations:
+        if obs['key'] in grouped:
+            _merge(grouped[obs['key']], obs)
+        else:
+            grouped[obs['key']] = dict(obs)
+    if not grouped:
+        return 0
+
+    with transaction.atomic():
+        existing = {
+            item.normalized_name: item
+            for item in FoodItem.objects.select_for_update().filter(normalized_name__in=list(grouped))
+        }
+        # One change version for the whole batch: it commits atomically
+        version = ChangeCounter.advance(ChangeCounter.FOODS)
+        to_update, to_create = [], []
+        for key, obs in grouped.items():
+            item = existing.get(key)
+            if item is None:
+                to_create.append(FoodItem(
+                    name=obs['name'], normalized_name=key,
+                    calories=round(obs['calories']), protein=obs['protein'],
+                    carbs=obs['carbs'], fat=obs['fat'], scan_count=obs['count'],
+                    change_version=version,
+                ))
+                continue
+            # Rows added through the API start at scan_count=0 but their macros still count
+            # as one observation, so the merged row carries that weight from now on
+            current = {field: getattr(item, field) for field in MACROS}
+            current['count'] = item.scan_count or 1
+            _merge(current, obs)
+            item.calories = round(current['calories'])
+            item.protein, item.carbs, item.fat = current['protein'], current['carbs'], current['fat']
+            item.scan_count = current['count']
+            item.change_version = version
+            to_update.append(item)
+
+        if to_update:
+            FoodItem.objects.bulk_update(to_update, [*MACROS, 'scan_count', 'change_version'])
+        if to_create:
+            FoodItem.objects.bulk_create(to_create)
+
+        # bulk_* bypass post_save, so invalidate the object cache here
+        transaction.on_commit(lambda: _invalidate([item.pk for item in to_update]))
+    return len(grouped)
+
+
+def _invalidate(pks):
+    for pk in pks:
+        cache.invalidate_object(cache.FOODS, pk)
+    cache.invalidate_list(cache.FOODS)
+
+
+class ScanBuffer:
+    """
+    Collects scan observations and writes them in batches, either when the buffer
+    reaches `batch_size` or `flush_interval` seconds after the first pending scan.
+    A batch that fails to write goes back to the front of the buffer and is retried on
+    the next flush, up to `max_pending` scans (the oldest are dropped beyond that).
+    """
+
+    def __init__(self, batch_size=20, flush_interval=2.0, max_pending=1000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def add(self, observation):
+        with self._lock:
+            self._pending.append(observation)
+            full = len(self._pending) >= self.batch_size
+            if not full:
+                self._schedule()
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                # Requeued by flush; the timer retries it. The scan itself was accepted.
+                logger.exception("Scan buffer flush failed; will retry")
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not batch:
+                return 0
+            try:
+                with span('db_write', rows=len(batch)):
+                    try:
+                        return run_write(upsert_observations, batch)
+                    except IntegrityError:
+                        # Another worker inserted one of our new names first; it exists now, so retry as updates
+                        return run_write(upsert_observations, batch)
+            except WriteTimeout as e:
+                if not e.may_apply:
+                    self._requeue(batch)
+                # Otherwise the writer is still on it; requeueing would count these scans twice
+                raise
+            except Exception:
+                self._requeue(batch)
+                raise
+
+    def _requeue(self, batch):
+        with self._lock:
+            self._pending[:0] = batch
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+                logger.error("Scan buffer full; dropped oldest scans", extra={'dropped': overflow})
+            self._schedule()
+
+    def _schedule(self):
+        # Caller holds self._lock
+        if self._timer is None and self._pending:
+            self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Scan buffer flush failed; will retry")
+        finally:
+            # Timer threads are short-lived; don't leave their connection open
+            connection.close()
+
+
+scan_buffer = ScanBuffer(
+    batch_size=getattr(settings, 'FOOD_SCAN_BATCH_SIZE', 20),
+    flush_interval=getattr(settings, 'FOOD_SCAN_FLUSH_SECONDS', 2.0),
+)
+atexit.register(scan_buffer.flush)
+
+
+def record_scan(data):
+    """Queues a scanned food for the batched upsert. Returns False if the scan had no name."""
+    obs = scan_to_observation(data)
+    if obs is None:
+        return False
+    scan_buffer.add(obs)
+    return True
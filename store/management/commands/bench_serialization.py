@@ -0,0 +1,66 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework.renderers import JSONRenderer
+
+from store.models import FoodItem
+from store.renderers import ORJSONRenderer
+from store.serializers import FOOD_FIELDS, FoodItemSerializer, encode_food_row
+
+
+class Command(BaseCommand):
+    help = "Compares rows/second for the ModelSerializer + JSONRenderer path and the fast read path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        # Fixture rows go into a throwaway test database (in-memory for SQLite), never the real one
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            created = 0
+            for n in sorted(options['rows']):
+                FoodItem.objects.bulk_create(
+                    FoodItem(name=f"food {i}", normalized_name=f"food {i}", calories=100 + i % 500,
+                             protein=i % 40 + 0.5, carbs=i % 90 + 0.25, fat=i % 30 + 0.75)
+                    for i in range(created, n)
+                )
+                created = max(created, n)
+                self.report(n, options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def report(self, n, repeat):
+        paths = {
+            'serializer+json': self.default_path,
+            'values_list+orjson': self.fast_path,
+        }
+        results = {}
+        for label, fn in paths.items():
+            best = min(self.timed(fn) for _ in range(repeat))
+            results[label] = best
+            self.stdout.write(f"{n:>8} rows  {label:<20} {best * 1000:9.1f} ms  {n / best:>12,.0f} rows/s")
+        # Both paths must produce the same document
+        if json.loads(self.default_path()) != json.loads(self.fast_path()):
+            raise CommandError("The fast path's output differs from FoodItemSerializer's")
+        speedup = results['serializer+json'] / results['values_list+orjson']
+        self.stdout.write(f"{'':>8}       speedup {speedup:.1f}x")
+
+    @staticmethod
+    def timed(fn):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    @staticmethod
+    def default_path():
+        data = FoodItemSerializer(FoodItem.objects.all(), many=True).data
+        return JSONRenderer().render(data)
+
+    @staticmethod
+    def fast_path():
+        rows = list(map(encode_food_row, FoodItem.objects.values_list(*FOOD_FIELDS)))
+        return ORJSONRenderer().render(rows)
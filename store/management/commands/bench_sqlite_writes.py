@@ -0,0 +1,113 @@
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test.utils import setup_databases, teardown_databases
+
+from store.db_writer import run_write
+from store.food_writer import scan_to_observation, upsert_observations
+from store.models import FoodItem, UserProfile
+
+
+class Command(BaseCommand):
+    help = ("Concurrent scan/profile writes plus reads against a throwaway SQLite database. "
+            "--compare runs the default and production modes one after the other.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--compare', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            for mode in ('0', '1'):
+                self.run_mode(mode, options)
+            return
+
+        if connection.vendor != 'sqlite':
+            self.stderr.write("This benchmark only makes sense on SQLite.")
+            return
+        # Load goes into a migrated test database in a temp file (WAL needs a file), never the real one
+        with tempfile.TemporaryDirectory() as tmp:
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                self.run_load(options['threads'], options['seconds'])
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+    def run_mode(self, mode, options):
+        # Settings read SQLITE_PRODUCTION_MODE at startup, so each mode runs in its own process
+        env = dict(os.environ, SQLITE_PRODUCTION_MODE=mode)
+        manage = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py')]
+        label = 'production (WAL + writer queue)' if mode == '1' else 'default'
+        self.stdout.write(f"--- {label} ---")
+        self.stdout.flush()
+        subprocess.run(manage + ['bench_sqlite_writes', '--threads', str(options['threads']),
+                                 '--seconds', str(options['seconds'])], env=env, check=True)
+
+    def run_load(self, threads, seconds):
+        user = User.objects.create(username='bench')
+        profile = UserProfile.objects.create(user=user, current_weight=70, height=170)
+        stats = {'writes': 0, 'reads': 0, 'locked': 0, 'errors': 0}
+        latencies = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def scan():
+            obs = scan_to_observation({'food_name': f"food {random.randint(0, 200)}",
+                                       'estimated_calories': random.randint(50, 600), 'protein': 10})
+            run_write(upsert_observations, [obs])
+
+        def update_profile():
+            profile.current_weight = random.uniform(50, 100)
+            run_write(profile.save, update_fields=['current_weight'])
+
+        def worker(n):
+            try:
+                while time.perf_counter() < deadline:
+                    op = random.random()
+                    start = time.perf_counter()
+                    try:
+                        if op < 0.4:
+                            scan()
+                            kind = 'writes'
+                        elif op < 0.6:
+                            update_profile()
+                            kind = 'writes'
+                        else:
+                            list(FoodItem.objects.all()[:50])
+                            kind = 'reads'
+                    except OperationalError as e:
+                        kind = 'locked' if 'locked' in str(e) else 'errors'
+                    except Exception:
+                        kind = 'errors'
+                    with lock:
+                        stats[kind] += 1
+                        if kind == 'writes':
+                            latencies.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+
+        latencies.sort()
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+        self.stdout.write(
+            f"threads={threads} writes/s={stats['writes'] / seconds:,.0f} reads/s={stats['reads'] / seconds:,.0f} "
+            f"locked={stats['locked']} other_errors={stats['errors']} "
+            f"write p50={pct(0.5):.1f}ms p99={pct(0.99):.1f}ms"
+        )
@@ -0,0 +1,114 @@
+import os
+import re
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from whitenoise.compress import Compressor
+
+from store.webapp import BUILD_ID_RE, build_files, build_id, build_url, builds_dir
+
+BASE_HREF_RE = re.compile(r'<base href="[^"]*">')
+
+
+class Command(BaseCommand):
+    help = ("Collects the Flutter web build into STATIC_ROOT/web/<build id>/ with Brotli and gzip "
+            "variants, and writes the index.html that WhiteNoise serves at /. Run after collectstatic.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=settings.FLUTTER_WEB_BUILD,
+                            help='flutter build web output (default: FLUTTER_WEB_BUILD)')
+        parser.add_argument('--build', action='store_true', help='run `flutter build web --release` first')
+        parser.add_argument('--keep', type=int, default=3,
+                            help='collected builds to keep, so open tabs on an older index.html still load')
+
+    def handle(self, *args, **options):
+        source = os.path.abspath(options['source'])
+        if options['build']:
+            self.flutter_build(source)
+        index_path = os.path.join(source, 'index.html')
+        if not os.path.isfile(index_path):
+            raise CommandError(f"No Flutter web build at {source} (run `flutter build web` in app/, or pass --build)")
+
+        build = build_id(source)
+        target = os.path.join(builds_dir(), build)
+        compressor = Compressor(quiet=True)
+        if not compressor.use_brotli:
+            self.stderr.write("Brotli not installed: writing gzip variants only (pip install Brotli)")
+
+        if os.path.isdir(target):
+            self.stdout.write(f"Build {build} already collected")
+        else:
+            self.collect(source, target, compressor)
+
+        with open(index_path, encoding='utf-8') as f:
+            index = f.read()
+        if not BASE_HREF_RE.search(index):
+            raise CommandError("index.html has no <base href>; can't point it at the collected build")
+        index = BASE_HREF_RE.sub(f'<base href="{build_url(build)}">', index, count=1)
+        self.write_index(index, compressor)
+        self.prune(build, options['keep'])
+        self.stdout.write(self.style.SUCCESS(f"Serving Flutter web build {build} at / (assets under {build_url(build)})"))
+
+    def flutter_build(self, source):
+        # --source is normally app/build/web, so the Flutter project is two levels up
+        project = os.path.dirname(os.path.dirname(source))
+        try:
+            subprocess.run(['flutter', 'build', 'web', '--release'], cwd=project, check=True)
+        except FileNotFoundError:
+            raise CommandError("flutter is not on PATH")
+        except subprocess.CalledProcessError as e:
+            raise CommandError(f"flutter build web failed ({e.returncode})")
+
+    def collect(self, source, target, compressor):
+        # Into a temp dir first: a half-written build dir would otherwise be served (and cached forever)
+        staging = target + '.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(source, staging, ignore=shutil.ignore_patterns('index.html'))
+        raw, count, compressed = 0, 0, {'.br': 0, '.gz': 0}
+        for path in list(build_files(staging)):
+            count += 1
+            size = os.path.getsize(path)
+            raw += size
+            variants = set()
+            if compressor.should_compress(path):
+                for variant in compressor.compress(path):
+                    ext = variant[-3:]
+                    variants.add(ext)
+                    compressed[ext] += os.path.getsize(variant)
+            # Uncompressible files are sent as-is, so count them as-is for both encodings
+            for ext in compressed.keys() - variants:
+                compressed[ext] += size
+        os.replace(staging, target)
+        summary = ', '.join(f"{ext[1:]} {n // 1024}K" for ext, n in compressed.items()
+                            if ext != '.br' or compressor.use_brotli)
+        self.stdout.write(f"Collected {count} files into {target}: {raw // 1024}K raw, {summary}")
+
+    def write_index(self, html, compressor):
+        root = settings.WEB_APP_ROOT
+        os.makedirs(root, exist_ok=True)
+        path = os.path.join(root, 'index.html')
+        staging = path + '.tmp'
+        with open(staging, 'w', encoding='utf-8') as f:
+            f.write(html)
+        written = set()
+        for variant in compressor.compress(staging):
+            os.replace(variant, path + variant[-3:])
+            written.add(variant[-3:])
+        # A stale variant would be served in place of the new index
+        for ext in {'.br', '.gz'} - written:
+            if os.path.exists(path + ext):
+                os.remove(path + ext)
+        os.replace(staging, path)
+
+    def prune(self, current, keep):
+        root = builds_dir()
+        builds = [
+            entry for entry in os.scandir(root)
+            if entry.is_dir() and BUILD_ID_RE.fullmatch(entry.name) and entry.name != current
+        ]
+        builds.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in builds[max(0, keep - 1):]:
+            shutil.rmtree(entry.path)
+            self.stdout.write(f"Removed old build {entry.name}")
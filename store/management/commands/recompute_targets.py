@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store import cache
+from store.models import UserProfile
+from store.targets import INPUT_FIELDS, TARGET_FIELDS, TARGETS_VERSION, apply_targets
+
+
+class Command(BaseCommand):
+    help = ("Recomputes stored calorie and macro targets for profiles computed with an older "
+            "TARGETS_VERSION (after a formula change). --all recomputes every profile.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.only('id', *INPUT_FIELDS, *TARGET_FIELDS).order_by('id')
+        if not options['all']:
+            profiles = profiles.exclude(targets_version=TARGETS_VERSION)
+
+        scanned, changed, batch = 0, 0, []
+        for profile in profiles.iterator(chunk_size=options['batch_size']):
+            scanned += 1
+            if apply_targets(profile):
+                batch.append(profile)
+            if len(batch) >= options['batch_size']:
+                changed += self.write(batch)
+        changed += self.write(batch)
+
+        # bulk_update skips the post_save signal that normally drops the cached profile. The bump
+        # reaches running workers only through a shared cache (file backend or Redis); a
+        # local-memory cache belongs to this process alone.
+        if changed:
+            cache.invalidate_object(cache.PROFILE, 'owner')
+            if isinstance(caches['default'], LocMemCache):
+                self.stderr.write(f"Cache is local to each process: running workers may serve the old targets "
+                                  f"for up to {settings.OBJECT_CACHE_TIMEOUT}s (or restart them)")
+        self.stdout.write(f"Targets v{TARGETS_VERSION}: {scanned} profiles checked, {changed} updated")
+
+    def write(self, batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            UserProfile.objects.bulk_update(batch, TARGET_FIELDS)
+        count = len(batch)
+        batch.clear()
+        return count
@@ -0,0 +1,26 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store.sync import SNAPSHOT_RE, prune_tombstones, snapshot_dir, write_snapshot
+
+
+class Command(BaseCommand):
+    help = ("Writes the food table snapshot new clients bootstrap delta sync from. Run periodically "
+            "(e.g. hourly cron). --prune drops tombstones older than the oldest kept snapshot.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=settings.FOOD_SNAPSHOTS_KEPT)
+        parser.add_argument('--prune', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['keep'] < 1:
+            raise CommandError("--keep must be at least 1")
+        version, path, rows = write_snapshot(keep=options['keep'])
+        self.stdout.write(f"Snapshot v{version}: {rows} foods -> {path}")
+        if options['prune']:
+            # Clients further behind than every kept snapshot get a 410 and re-bootstrap
+            oldest = min((int(m.group(1)) for m in map(SNAPSHOT_RE.match, os.listdir(snapshot_dir())) if m),
+                         default=version)
+            self.stdout.write(f"Pruned {prune_tombstones(oldest)} tombstones at or below v{oldest}")
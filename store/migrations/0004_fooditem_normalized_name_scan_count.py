@@ -0,0 +1,66 @@
+# Generated by Django 5.1.6 on 2026-10-19 09:12
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalize(name):
+    # Frozen copy of store.models.normalize_food_name
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower())
+    return text.strip()[:200]
+
+
+def merge_duplicate_foods(apps, schema_editor):
+    """Backfills normalized_name and folds duplicate rows into one averaged row."""
+    FoodItem = apps.get_model('store', 'FoodItem')
+    canonical = {}
+    for item in FoodItem.objects.order_by('id'):
+        key = _normalize(item.name) or None
+        keeper = canonical.get(key) if key else None
+        if keeper is None:
+            # Rows from before scan counting were either scans or typed in; both are one
+            # observation, the weight food_writer gives a scan_count=0 row anyway
+            item.normalized_name = key
+            item.scan_count = 1
+            item.save(update_fields=['normalized_name', 'scan_count'])
+            if key:
+                canonical[key] = item
+            continue
+
+        n = keeper.scan_count
+        keeper.calories = round((keeper.calories * n + item.calories) / (n + 1))
+        keeper.protein = (keeper.protein * n + item.protein) / (n + 1)
+        keeper.carbs = (keeper.carbs * n + item.carbs) / (n + 1)
+        keeper.fat = (keeper.fat * n + item.fat) / (n + 1)
+        keeper.scan_count = n + 1
+        keeper.save(update_fields=['calories', 'protein', 'carbs', 'fat', 'scan_count'])
+        item.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='normalized_name',
+            field=models.CharField(editable=False, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='scan_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(merge_duplicate_foods, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='fooditem',
+            name='normalized_name',
+            field=models.CharField(editable=False, max_length=200, null=True, unique=True),
+        ),
+    ]
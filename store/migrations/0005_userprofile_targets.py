@@ -0,0 +1,71 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+# Frozen copy of store.targets v1, so this migration keeps working when the live formula or
+# its inputs change. Later versions are applied by `manage.py recompute_targets`.
+ACTIVITY_FACTORS = {'SEDENTARY': 1.2, 'ACTIVE': 1.55, 'ATHLETE': 1.725}
+GOAL_FACTORS = {'SHRED': 0.8, 'BULK': 1.1, 'MAINTAIN': 1.0}
+PROTEIN_PER_KG = {'SHRED': 2.2, 'BULK': 1.8, 'MAINTAIN': 1.6}
+
+
+def _targets_v1(current_weight, height, goal, activity_level):
+    weight = max(float(current_weight or 0), 1.0)
+    bmr = 10 * weight + 6.25 * float(height or 0) - 5 * 30 - 78
+    tdee = bmr * ACTIVITY_FACTORS.get(activity_level, ACTIVITY_FACTORS['SEDENTARY'])
+    calories = max(1200, round(tdee * GOAL_FACTORS.get(goal, 1.0) / 10) * 10)
+    protein = round(weight * PROTEIN_PER_KG.get(goal, PROTEIN_PER_KG['MAINTAIN']))
+    protein = min(protein, int(calories * 0.75 / 4))
+    fat = round(calories * 0.25 / 9)
+    carbs = max(0, round((calories - protein * 4 - fat * 9) / 4))
+    return {
+        'daily_calorie_target': calories,
+        'protein_target': protein,
+        'carbs_target': carbs,
+        'fat_target': fat,
+        'targets_version': 1,
+    }
+
+
+def backfill_targets(apps, schema_editor):
+    UserProfile = apps.get_model('store', 'UserProfile')
+    profiles = list(UserProfile.objects.only('id', 'current_weight', 'height', 'goal', 'activity_level'))
+    for profile in profiles:
+        targets = _targets_v1(profile.current_weight, profile.height, profile.goal, profile.activity_level)
+        for field, value in targets.items():
+            setattr(profile, field, value)
+    UserProfile.objects.bulk_update(
+        profiles, ['daily_calorie_target', 'protein_target', 'carbs_target', 'fat_target', 'targets_version'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_fooditem_normalized_name_scan_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='carbs_target',
+            field=models.IntegerField(default=0, help_text='g/day'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='fat_target',
+            field=models.IntegerField(default=0, help_text='g/day'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='protein_target',
+            field=models.IntegerField(default=0, help_text='g/day'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='targets_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_targets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:46
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def stamp_existing_foods(apps, schema_editor):
+    """Gives existing rows distinct versions (their ids) and starts the counter above them."""
+    FoodItem = apps.get_model('store', 'FoodItem')
+    ChangeCounter = apps.get_model('store', 'ChangeCounter')
+    FoodItem.objects.update(change_version=F('id'))
+    head = FoodItem.objects.aggregate(head=Max('id'))['head'] or 0
+    ChangeCounter.objects.create(name='foods', value=head)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_userprofile_targets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FoodTombstone',
+            fields=[
+                ('food_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('change_version', models.BigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='change_version',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(stamp_existing_foods, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,75 @@
-from django.db import models
+import re
+import unicodedata
+
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 
+from .targets import INPUT_FIELDS, TARGET_FIELDS, apply_targets
+
+
+def normalize_food_name(name):
+    """Canonical lookup key: 'Paneer  Tikka!' and 'paneer tikka' map to the same row."""
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower())
+    return text.strip()[:200]
+
+
+class ChangeCounter(models.Model):
+    """Monotonic version per change stream (delta sync, store/sync.py)."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    FOODS = 'foods'
+    FOODS_PRUNED = 'foods.pruned'  # tombstones at or below this version have been dropped
+
+    @classmethod
+    def advance(cls, name):
+        """
+        Next version of stream `name`; call inside the writing transaction. The counter row
+        stays locked until commit, so versions become visible in the order they were issued.
+        """
+        if not cls.objects.filter(name=name).update(value=F('value') + 1):
+            cls.objects.get_or_create(name=name)
+            cls.objects.filter(name=name).update(value=F('value') + 1)
+        return cls.objects.values_list('value', flat=True).get(name=name)
+
+    @classmethod
+    def current(cls, name):
+        return cls.objects.filter(name=name).values_list('value', flat=True).first() or 0
+
+
 class FoodItem(models.Model):
     name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, unique=True, null=True, editable=False)
     calories = models.IntegerField()
     protein = models.FloatField()
     carbs = models.FloatField(default=0.0)
     fat = models.FloatField(default=0.0)
+    # Number of scans folded into the macro averages above
+    scan_count = models.PositiveIntegerField(default=0)
+    # ChangeCounter.FOODS version of the last write; bulk writers stamp it themselves
+    change_version = models.BigIntegerField(default=0, db_index=True, editable=False)
     
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_food_name(self.name) or None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'normalized_name', 'change_version'}
+        with transaction.atomic():
+            self.change_version = ChangeCounter.advance(ChangeCounter.FOODS)
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
+
+
+class FoodTombstone(models.Model):
+    """A deleted FoodItem, kept so delta sync can tell clients to drop it."""
+    food_id = models.BigIntegerField(primary_key=True)
+    change_version = models.BigIntegerField(db_index=True)
+
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     current_weight = models.FloatField(help_text="Weight in kg")
@@ -29,7 +89,19 @@ class UserProfile(models.Model):
     ]
     activity_level = models.CharField(max_length=10, choices=ACTIVITY_CHOICES, default='SEDENTARY')
     
+    # Derived from the fields above on every save (store/targets.py); never set directly
     daily_calorie_target = models.IntegerField(default=2000)
+    protein_target = models.IntegerField(default=0, help_text="g/day")
+    carbs_target = models.IntegerField(default=0, help_text="g/day")
+    fat_target = models.IntegerField(default=0, help_text="g/day")
+    targets_version = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    def save(self, *args, **kwargs):
+        apply_targets(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(INPUT_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | set(TARGET_FIELDS)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} Profile"
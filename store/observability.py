@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from nutrichoice.observability import has_admin_token, render_metrics
+
+
+def metrics_view(request):
+    # Same admin token as /profiles (settings.PROFILING_TOKEN)
+    if not has_admin_token(request.headers, settings.PROFILING_TOKEN): return HttpResponseForbidden()
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
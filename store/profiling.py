@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseForbidden, JsonResponse
+
+from nutrichoice import profiling
+from nutrichoice.observability import has_admin_token
+
+# Django side of nutrichoice/profiling.py. Under WSGI a request runs on one thread, so the
+# profile covers exactly that request.
+
+
+def profile_dir():
+    return profiling.profile_dir(getattr(settings, 'PROFILE_DIR', ''))
+
+
+def is_admin(request):
+    return has_admin_token(request.headers, getattr(settings, 'PROFILING_TOKEN', ''))
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when an admin sends `X-Profile: 1` with a valid `X-Profile-Token`,
+    or for PROFILE_SAMPLE_RATE of traffic. The profile id comes back as `X-Profile-Id`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = getattr(settings, 'PROFILING_TOKEN', '')
+        rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0.0)
+        if not profiling.should_profile(request.headers, token, rate) or not profiling.busy.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            session = profiling.ProfileSession(f"{request.method} {request.path}", profile_dir(),
+                                               keep=getattr(settings, 'PROFILES_KEPT', profiling.DEFAULT_KEEP))
+            session.start()
+            session.attach()
+            try:
+                response = self.get_response(request)
+            finally:
+                session.detach()
+                session.stop()
+        finally:
+            profiling.busy.release()
+        response['X-Profile-Id'] = session.id
+        return response
+
+
+# --- Download views (admin token required) ---
+def profile_list(request):
+    if not is_admin(request): return HttpResponseForbidden()
+    return JsonResponse({'profiles': profiling.list_summaries(profile_dir())})
+
+
+def profile_download(request, profile_id, ext):
+    if not is_admin(request): return HttpResponseForbidden()
+    path = profiling.profile_file(profile_dir(), profile_id, ext)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f"{profile_id}.{ext}")
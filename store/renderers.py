@@ -0,0 +1,17 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Drop-in for DRF's JSONRenderer on read-heavy endpoints. orjson serializes
+    straight to bytes, skipping json.dumps' str round-trip and encoder dispatch.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
@@ -1,11 +1,37 @@
 from rest_framework import serializers
-from .models import FoodItem, UserProfile
+from .models import FoodItem, UserProfile, normalize_food_name
+
+# Fast read path: tuple rows from .values_list() -> dicts without a serializer per row.
+# Output matches FoodItemSerializer for the plain model fields listed here.
+FOOD_FIELDS = ('id', 'name', 'calories', 'protein', 'carbs', 'fat', 'scan_count')
+PROFILE_FIELDS = ('current_weight', 'height', 'goal', 'activity_level',
+                  'daily_calorie_target', 'protein_target', 'carbs_target', 'fat_target')
+
+def row_encoder(fields):
+    """`row -> {field: value}` for tuples from .values_list(*fields)."""
+    return lambda row: dict(zip(fields, row))
+
+encode_food_row = row_encoder(FOOD_FIELDS)
+encode_profile_row = row_encoder(PROFILE_FIELDS)
 
 # 1. Food Item Serializer
 class FoodItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = FoodItem
-        fields = ['id', 'name', 'calories', 'protein', 'carbs', 'fat']
+        fields = list(FOOD_FIELDS)
+        read_only_fields = ['scan_count']
+
+    def validate_name(self, value):
+        # One canonical row per food; normalized_name carries the unique index
+        key = normalize_food_name(value)
+        if not key:
+            raise serializers.ValidationError("Name must contain letters or digits.")
+        clash = FoodItem.objects.filter(normalized_name=key)
+        if self.instance is not None:
+            clash = clash.exclude(pk=self.instance.pk)
+        if clash.exists():
+            raise serializers.ValidationError("A food with this name already exists.")
+        return value
 
 # 2. Image Upload Serializer
 class FoodImageSerializer(serializers.Serializer):
@@ -15,5 +41,6 @@ class FoodImageSerializer(serializers.Serializer):
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
-        fields = ['current_weight', 'height', 'goal', 'activity_level', 'daily_calorie_target']
-        read_only_fields = ['daily_calorie_target']
\ No newline at end of file
+        fields = list(PROFILE_FIELDS)
+        # Computed on save (store/targets.py)
+        read_only_fields = ['daily_calorie_target', 'protein_target', 'carbs_target', 'fat_target']
\ No newline at end of file
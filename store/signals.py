@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .models import ChangeCounter, FoodItem, FoodTombstone, UserProfile
+
+
+# Invalidate after commit so a concurrent reader can't re-cache the pre-commit row
+@receiver([post_save, post_delete], sender=FoodItem)
+def invalidate_food(sender, instance, **kwargs):
+    pk = instance.pk  # cleared on the instance by delete() before on_commit runs
+    transaction.on_commit(lambda: cache.invalidate_object(cache.FOODS, pk))
+
+
+# Runs inside the delete's transaction, so the tombstone commits (or rolls back) with it
+@receiver(post_delete, sender=FoodItem)
+def tombstone_food(sender, instance, **kwargs):
+    FoodTombstone.objects.update_or_create(
+        food_id=instance.pk, defaults={'change_version': ChangeCounter.advance(ChangeCounter.FOODS)}
+    )
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+@receiver([post_save, post_delete], sender=User)
+def invalidate_profile(sender, instance, **kwargs):
+    # Only the single owner profile is served, so any user/profile change drops it
+    transaction.on_commit(lambda: cache.invalidate_object(cache.PROFILE, 'owner'))
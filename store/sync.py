@@ -0,0 +1,120 @@
+import gzip
+import os
+import re
+import tempfile
+
+import orjson
+from django.conf import settings
+from django.db import transaction
+
+from .models import ChangeCounter, FoodItem, FoodTombstone
+from .serializers import FOOD_FIELDS
+
+# Delta sync for the food table. Every FoodItem write stamps the row with the next
+# ChangeCounter.FOODS version and every delete leaves a FoodTombstone, so a client that has
+# seen version V only needs rows and tombstones above V. Payloads are columnar:
+#   {"version": 42, "fields": [...FOOD_FIELDS], "upserts": [[row], ...], "deletes": [id, ...], "more": false}
+# New clients bootstrap from the latest snapshot (same shape) and then poll changes?since=version.
+
+SNAPSHOT_RE = re.compile(r'^foods-(\d+)\.json\.gz$')
+
+
+class ResyncRequired(Exception):
+    """`since` predates pruned tombstones; the client must start over from a snapshot."""
+
+
+def changes_since(since, limit, head=None):
+    """
+    Upserts and deletes in (since, version]; `more` means call again with since=version.
+    `head` must be read before the rows: every version at or below it has committed.
+    """
+    if since < ChangeCounter.current(ChangeCounter.FOODS_PRUNED):
+        raise ResyncRequired()
+    if head is None:
+        head = ChangeCounter.current(ChangeCounter.FOODS)
+    if since >= head:
+        return {'version': since, 'fields': FOOD_FIELDS, 'upserts': [], 'deletes': [], 'more': False}
+    changed = FoodItem.objects.filter(change_version__gt=since, change_version__lte=head)
+    deleted = FoodTombstone.objects.filter(change_version__gt=since, change_version__lte=head)
+
+    # Page on version boundaries: a bulk scan write shares one version across its rows,
+    # and splitting it would let the next page's since skip the rest of the batch
+    upto = head
+    boundary = (
+        changed.order_by('change_version').values_list('change_version', flat=True)[limit - 1:limit].first()
+    )
+    tomb_boundary = (
+        deleted.order_by('change_version').values_list('change_version', flat=True)[limit - 1:limit].first()
+    )
+    for version in (boundary, tomb_boundary):
+        if version is not None:
+            upto = min(upto, version)
+
+    rows = changed.filter(change_version__lte=upto).order_by('change_version', 'id').values_list(*FOOD_FIELDS)
+    return {
+        'version': upto,
+        'fields': FOOD_FIELDS,
+        'upserts': [list(row) for row in rows],
+        'deletes': list(deleted.filter(change_version__lte=upto).order_by('change_version')
+                        .values_list('food_id', flat=True)),
+        'more': upto < head,
+    }
+
+
+# --- SNAPSHOTS ---
+def snapshot_dir():
+    return settings.FOOD_SNAPSHOT_DIR
+
+
+def latest_snapshot():
+    """(version, path) of the newest snapshot file, or (None, None)."""
+    try:
+        names = os.listdir(snapshot_dir())
+    except FileNotFoundError:
+        return None, None
+    versions = [int(m.group(1)) for m in map(SNAPSHOT_RE.match, names) if m]
+    if not versions:
+        return None, None
+    version = max(versions)
+    return version, os.path.join(snapshot_dir(), f'foods-{version}.json.gz')
+
+
+def write_snapshot(keep=3):
+    """Writes the full food table as a gzipped changes payload; returns (version, path, rows)."""
+    if keep < 1:
+        raise ValueError('keep must be at least 1')
+    with transaction.atomic():
+        # Rows written after `head` may be included too; the client re-applies them from changes
+        head = ChangeCounter.current(ChangeCounter.FOODS)
+        rows = [list(row) for row in FoodItem.objects.order_by('id').values_list(*FOOD_FIELDS)]
+    payload = {'version': head, 'fields': FOOD_FIELDS, 'upserts': rows, 'deletes': [], 'more': False}
+
+    os.makedirs(snapshot_dir(), exist_ok=True)
+    path = os.path.join(snapshot_dir(), f'foods-{head}.json.gz')
+    # Unique per writer, so concurrent runs never write into each other's staging file
+    fd, staging = tempfile.mkstemp(dir=snapshot_dir(), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # mtime=0: an unchanged table produces a byte-identical file
+            with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0) as gz:
+                gz.write(orjson.dumps(payload))
+        os.chmod(staging, 0o644)
+        os.replace(staging, path)
+    except BaseException:
+        os.remove(staging)
+        raise
+
+    for name in sorted((n for n in os.listdir(snapshot_dir()) if SNAPSHOT_RE.match(n)),
+                       key=lambda n: int(SNAPSHOT_RE.match(n).group(1)), reverse=True)[keep:]:
+        os.remove(os.path.join(snapshot_dir(), name))
+    return head, path, len(rows)
+
+
+def prune_tombstones(below):
+    """Drops tombstones at or below version `below`; clients older than that must resync."""
+    with transaction.atomic():
+        # The horizon only moves forward: lowering it would let clients miss pruned deletes
+        below = max(below, ChangeCounter.current(ChangeCounter.FOODS_PRUNED))
+        deleted, _ = FoodTombstone.objects.filter(change_version__lte=below).delete()
+        ChangeCounter.objects.update_or_create(name=ChangeCounter.FOODS_PRUNED, defaults={'value': below})
+    return deleted
@@ -0,0 +1,54 @@
+# Daily calorie and macro targets derived from a profile. Computed when the profile is saved
+# (UserProfile.save) and stored on its row, so every reader gets plain stored numbers.
+# Bump TARGETS_VERSION with any formula change and run `manage.py recompute_targets`.
+
+TARGETS_VERSION = 1
+
+# Inputs and outputs on UserProfile
+INPUT_FIELDS = ('current_weight', 'height', 'goal', 'activity_level')
+TARGET_FIELDS = ('daily_calorie_target', 'protein_target', 'carbs_target', 'fat_target', 'targets_version')
+
+# Mifflin-St Jeor. The profile has no age or sex yet, so both use population defaults:
+# age 30 and the midpoint of the male (+5) and female (-161) constants.
+DEFAULT_AGE = 30
+SEX_CONSTANT = -78
+
+ACTIVITY_FACTORS = {'SEDENTARY': 1.2, 'ACTIVE': 1.55, 'ATHLETE': 1.725}
+GOAL_FACTORS = {'SHRED': 0.8, 'BULK': 1.1, 'MAINTAIN': 1.0}
+# Protein in g per kg body weight; fat as a share of calories; carbs take the rest
+PROTEIN_PER_KG = {'SHRED': 2.2, 'BULK': 1.8, 'MAINTAIN': 1.6}
+FAT_SHARE = 0.25
+MIN_CALORIES = 1200
+
+KCAL_PER_GRAM = {'protein': 4, 'carbs': 4, 'fat': 9}
+
+
+def compute_targets(current_weight, height, goal, activity_level):
+    """{field: value} for TARGET_FIELDS."""
+    weight = max(float(current_weight or 0), 1.0)
+    bmr = 10 * weight + 6.25 * float(height or 0) - 5 * DEFAULT_AGE + SEX_CONSTANT
+    tdee = bmr * ACTIVITY_FACTORS.get(activity_level, ACTIVITY_FACTORS['SEDENTARY'])
+    calories = max(MIN_CALORIES, round(tdee * GOAL_FACTORS.get(goal, 1.0) / 10) * 10)
+
+    protein = round(weight * PROTEIN_PER_KG.get(goal, PROTEIN_PER_KG['MAINTAIN']))
+    # Very light profiles on a cut: protein can't exceed what the fat share leaves over
+    protein = min(protein, int(calories * (1 - FAT_SHARE) / KCAL_PER_GRAM['protein']))
+    fat = round(calories * FAT_SHARE / KCAL_PER_GRAM['fat'])
+    carbs = max(0, round((calories - protein * KCAL_PER_GRAM['protein'] - fat * KCAL_PER_GRAM['fat'])
+                         / KCAL_PER_GRAM['carbs']))
+    return {
+        'daily_calorie_target': calories,
+        'protein_target': protein,
+        'carbs_target': carbs,
+        'fat_target': fat,
+        'targets_version': TARGETS_VERSION,
+    }
+
+
+def apply_targets(profile):
+    """Recomputes `profile`'s targets in place; True if any stored value changed."""
+    targets = compute_targets(*(getattr(profile, f) for f in INPUT_FIELDS))
+    changed = any(getattr(profile, f) != v for f, v in targets.items())
+    for field, value in targets.items():
+        setattr(profile, field, value)
+    return changed
@@ -1,3 +1,292 @@
-from django.test import TestCase
+import importlib
+import io
+import itertools
+import os
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from . import admission, db_writer, targets
+from .db_writer import WriteTimeout, WriterQueue, run_write
+from .food_writer import ScanBuffer, upsert_observations
+from .models import ChangeCounter, FoodItem, FoodTombstone, UserProfile
+from .sync import ResyncRequired, changes_since, latest_snapshot, prune_tombstones
+from .webapp import WebAppWhiteNoiseMiddleware, build_url
+
+
+def scan(name, calories=100):
+    return {'key': name, 'name': name, 'calories': calories, 'protein': 1, 'carbs': 1, 'fat': 1, 'count': 1}
+
+
+class ScanBufferTests(TestCase):
+    def test_failed_batch_is_requeued(self):
+        buffer = ScanBuffer(batch_size=10, flush_interval=60)
+        buffer.add(scan('poha'))
+        with mock.patch('store.food_writer.run_write', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                buffer.flush()
+        buffer.add(scan('upma'))
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(set(FoodItem.objects.values_list('normalized_name', flat=True)), {'poha', 'upma'})
+
+    def test_requeue_is_bounded(self):
+        buffer = ScanBuffer(batch_size=10, flush_interval=60, max_pending=3)
+        for name in ('a', 'b', 'c'):
+            buffer.add(scan(name))
+        with mock.patch('store.food_writer.run_write', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                buffer.flush()
+            buffer.add(scan('d'))
+            with self.assertRaises(OperationalError):
+                buffer.flush()
+        self.assertEqual([obs['key'] for obs in buffer._pending], ['b', 'c', 'd'])
+        buffer._timer.cancel()
+
+    def test_api_rows_count_as_one_observation(self):
+        item = FoodItem.objects.create(name='Dal', calories=200, protein=10, carbs=20, fat=5)
+        buffer = ScanBuffer(batch_size=10, flush_interval=60)
+        buffer.add(scan('dal', calories=100))
+        buffer.flush()
+        item.refresh_from_db()
+        self.assertEqual((item.calories, item.scan_count), (150, 2))
+
+
+class ReadCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.item = FoodItem.objects.create(name='Dal', calories=200, protein=10, carbs=20, fat=5)
+
+    def assertWarm(self, url, queries):
+        with self.assertNumQueries(queries):
+            cold = self.client.get(url)
+        with self.assertNumQueries(0):
+            warm = self.client.get(url)
+        self.assertEqual((cold.status_code, cold.json()), (warm.status_code, warm.json()))
+        return warm.json()
+
+    def test_warm_reads_skip_the_database(self):
+        self.assertWarm('/api/foods/', 1)
+        self.assertWarm(f'/api/foods/{self.item.pk}/', 1)
+        UserProfile.objects.create(user=User.objects.create(username='owner'), current_weight=70, height=170)
+        self.assertWarm('/api/profile/', 2)
+
+    def test_save_invalidates(self):
+        self.assertWarm(f'/api/foods/{self.item.pk}/', 1)
+        self.item.calories = 250
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.save()
+        self.assertEqual(self.assertWarm(f'/api/foods/{self.item.pk}/', 1)['calories'], 250)
+        self.assertEqual(self.assertWarm('/api/foods/', 1)[0]['calories'], 250)
+
+    def test_delete_invalidates(self):
+        self.assertWarm('/api/foods/', 1)
+        self.assertWarm(f'/api/foods/{self.item.pk}/', 1)
+        pk = self.item.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.delete()
+        self.assertEqual(self.assertWarm('/api/foods/', 1), [])
+        self.assertEqual(self.client.get(f'/api/foods/{pk}/').status_code, 404)
+
+    def test_bulk_scan_upsert_invalidates(self):
+        self.assertWarm('/api/foods/', 1)
+        self.assertWarm(f'/api/foods/{self.item.pk}/', 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_observations([scan('dal', calories=100), scan('poha')])
+        self.assertEqual(self.assertWarm(f'/api/foods/{self.item.pk}/', 1)['calories'], 150)
+        self.assertEqual(len(self.assertWarm('/api/foods/', 1)), 2)
+
+    def test_profile_save_invalidates(self):
+        profile = UserProfile.objects.create(user=User.objects.create(username='owner'), current_weight=70, height=170)
+        self.assertWarm('/api/profile/', 2)
+        profile.current_weight = 80
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(self.assertWarm('/api/profile/', 2)['current_weight'], 80)
+
+
+class AdmissionTests(TestCase):
+    def setUp(self):
+        patch = mock.patch.dict(admission._gates, clear=True)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    @override_settings(AI_CONCURRENCY_LIMIT=0, AI_QUEUE_LIMIT=0, AI_RETRY_AFTER_SECONDS=7)
+    def test_full_gate_answers_503_with_retry_after(self):
+        response = self.client.post('/api/ask-ai/', {'question': 'Is dal healthy?'}, content_type='application/json')
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '7'))
+
+
+class WebAppTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        source = os.path.join(tmp.name, 'build', 'web')
+        os.makedirs(source)
+        with open(os.path.join(source, 'index.html'), 'w') as f:
+            f.write('<html><head><base href="/"></head><body></body></html>')
+        with open(os.path.join(source, 'main.dart.js'), 'w') as f:
+            f.write('console.log("app");' * 100)
+        self.static_root = os.path.join(tmp.name, 'static')
+        self.web_root = os.path.join(tmp.name, 'webroot')
+        with override_settings(STATIC_ROOT=self.static_root, WEB_APP_ROOT=self.web_root):
+            call_command('collectweb', source=source, stdout=io.StringIO(), stderr=io.StringIO())
+            self.build = os.listdir(os.path.join(self.static_root, 'web'))[0]
+            self.assets = build_url(self.build)
+
+    def test_production_headers(self):
+        # Without autorefresh (DEBUG=False) the files are scanned when the middleware is built
+        with override_settings(DEBUG=False, STATIC_ROOT=self.static_root, WHITENOISE_ROOT=self.web_root):
+            middleware = WebAppWhiteNoiseMiddleware(lambda request: HttpResponse(status=404))
+        get = lambda path: middleware(RequestFactory().get(path))
+
+        asset = get(self.assets + 'main.dart.js')
+        self.assertEqual(asset.status_code, 200)
+        self.assertIn('immutable', asset['Cache-Control'])
+        index = get('/')
+        self.assertEqual(index.status_code, 200)
+        self.assertEqual(index['Cache-Control'], f'max-age={settings.WHITENOISE_MAX_AGE}, public')
+        self.assertIn(self.assets.encode(), b''.join(index.streaming_content))
+
+
+class TargetsTests(TestCase):
+    def test_mifflin_st_jeor(self):
+        # No sex on the profile yet: the BMR is halfway between the male and female equations
+        male = 10 * 70 + 6.25 * 170 - 5 * 30 + 5
+        female = 10 * 70 + 6.25 * 170 - 5 * 30 - 161
+        for activity, factor in (('SEDENTARY', 1.2), ('ACTIVE', 1.55), ('ATHLETE', 1.725)):
+            calories = targets.compute_targets(70, 170, 'MAINTAIN', activity)['daily_calorie_target']
+            self.assertEqual(calories, round((male + female) / 2 * factor / 10) * 10, activity)
+
+    def test_goal_adjustment(self):
+        calories = {goal: targets.compute_targets(80, 180, goal, 'ACTIVE')['daily_calorie_target']
+                    for goal in ('SHRED', 'MAINTAIN', 'BULK')}
+        # BMR 1697 x 1.55 = 2630.35 kcal/day, then x0.8 / x1.0 / x1.1, rounded to 10
+        self.assertEqual(calories, {'SHRED': 2100, 'MAINTAIN': 2630, 'BULK': 2890})
+        self.assertEqual(targets.compute_targets(40, 140, 'SHRED', 'SEDENTARY')['daily_calorie_target'],
+                         targets.MIN_CALORIES)
+
+    def test_macro_split(self):
+        for weight, goal in itertools.product((45, 70, 110), ('SHRED', 'MAINTAIN', 'BULK')):
+            t = targets.compute_targets(weight, 175, goal, 'ACTIVE')
+            self.assertEqual(t['protein_target'], round(weight * targets.PROTEIN_PER_KG[goal]))
+            self.assertEqual(t['fat_target'], round(t['daily_calorie_target'] * 0.25 / 9))
+            kcal = t['protein_target'] * 4 + t['carbs_target'] * 4 + t['fat_target'] * 9
+            self.assertLessEqual(abs(kcal - t['daily_calorie_target']), 6, (weight, goal))
+
+    def test_migration_copy_matches_v1(self):
+        # 0005 backfills with a frozen copy; it must stay equal to the live formula while TARGETS_VERSION is 1
+        migration = importlib.import_module('store.migrations.0005_userprofile_targets')
+        self.assertEqual(targets.TARGETS_VERSION, 1)
+        for args in itertools.product((0, 30, 52.5, 70, 95, 180), (0, 120, 165, 190),
+                                      ('SHRED', 'MAINTAIN', 'BULK', None), ('SEDENTARY', 'ACTIVE', 'ATHLETE', '')):
+            self.assertEqual(migration._targets_v1(*args), targets.compute_targets(*args), args)
+
+    def profile(self, **fields):
+        return UserProfile.objects.create(user=User.objects.create(username='owner'),
+                                          **{'current_weight': 70, 'height': 170, **fields})
+
+    def test_save_with_update_fields_stores_targets(self):
+        profile = self.profile()
+        profile.goal = 'SHRED'
+        profile.save(update_fields=['goal'])
+        stored = UserProfile.objects.values(*targets.TARGET_FIELDS).get(pk=profile.pk)
+        self.assertEqual(stored, targets.compute_targets(70, 170, 'SHRED', 'SEDENTARY'))
+
+    def test_recompute_targets(self):
+        profile = self.profile(goal='BULK')
+        UserProfile.objects.filter(pk=profile.pk).update(daily_calorie_target=2000, targets_version=0)
+        self.client.get('/api/profile/')  # cached with the stale target
+        out, err = io.StringIO(), io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('recompute_targets', stdout=out, stderr=err)
+        self.assertIn('1 profiles checked, 1 updated', out.getvalue())
+        self.assertIn('local to each process', err.getvalue())
+        expected = targets.compute_targets(70, 170, 'BULK', 'SEDENTARY')
+        self.assertEqual(UserProfile.objects.values(*targets.TARGET_FIELDS).get(pk=profile.pk), expected)
+        self.assertEqual(self.client.get('/api/profile/').json()['daily_calorie_target'],
+                         expected['daily_calorie_target'])
+
+        call_command('recompute_targets', stdout=out)
+        self.assertIn('0 profiles checked, 0 updated', out.getvalue())
+        call_command('recompute_targets', '--all', stdout=out)
+        self.assertIn('1 profiles checked, 0 updated', out.getvalue())
+
+
+class FoodSyncTests(TestCase):
+    def test_pages_never_split_a_version(self):
+        batch = [FoodItem.objects.create(name=name, calories=100, protein=1) for name in ('a', 'b', 'c')]
+        # A bulk scan write stamps all its rows with one version
+        shared = batch[-1].change_version
+        FoodItem.objects.filter(pk__in=[item.pk for item in batch]).update(change_version=shared)
+        last = FoodItem.objects.create(name='d', calories=100, protein=1)
+
+        page = changes_since(0, limit=2)
+        self.assertEqual((page['version'], len(page['upserts']), page['more']), (shared, 3, True))
+        page = changes_since(page['version'], limit=2)
+        self.assertEqual((page['version'], len(page['upserts']), page['more']), (last.change_version, 1, False))
+
+    def test_deletes_are_paged_with_upserts(self):
+        item = FoodItem.objects.create(name='poha', calories=100, protein=1)
+        pk = item.pk
+        item.delete()
+        page = changes_since(0, limit=10)
+        self.assertEqual((page['upserts'], page['deletes']), ([], [pk]))
+        self.assertEqual(page['version'], FoodTombstone.objects.get().change_version)
+
+    def test_prune_horizon(self):
+        for name in ('a', 'b', 'c'):
+            FoodItem.objects.create(name=name, calories=100, protein=1).delete()
+        horizon = FoodTombstone.objects.order_by('change_version')[1].change_version
+        self.assertEqual(prune_tombstones(horizon), 2)
+        with self.assertRaises(ResyncRequired):
+            changes_since(horizon - 1, limit=10)
+        self.assertEqual(len(changes_since(horizon, limit=10)['deletes']), 1)
+        # An older horizon never lowers the current one
+        self.assertEqual(prune_tombstones(0), 0)
+        self.assertEqual(ChangeCounter.current(ChangeCounter.FOODS_PRUNED), horizon)
+
+    def test_snapshot_command(self):
+        FoodItem.objects.create(name='dal', calories=100, protein=1)
+        with tempfile.TemporaryDirectory() as directory, override_settings(FOOD_SNAPSHOT_DIR=directory):
+            with self.assertRaises(CommandError):
+                call_command('snapshot_foods', keep=0, prune=True, stdout=io.StringIO())
+            call_command('snapshot_foods', keep=1, prune=True, stdout=io.StringIO())
+            version, _ = latest_snapshot()
+            self.assertEqual(os.listdir(directory), [f'foods-{version}.json.gz'])
+            self.assertEqual(ChangeCounter.current(ChangeCounter.FOODS_PRUNED), version)
+
+
+@override_settings(SQLITE_PRODUCTION_MODE=True)
+class RunWriteTimeoutTests(TransactionTestCase):
+    def setUp(self):
+        self.writer = WriterQueue(group_size=1)
+        self.release = threading.Event()
+        patches = [mock.patch.object(db_writer, 'get_writer', return_value=self.writer),
+                   mock.patch.object(db_writer, 'WRITE_TIMEOUT', 0.05)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.release.set)
+
+    def test_started_job_may_apply(self):
+        with self.assertRaises(WriteTimeout) as raised:
+            run_write(self.release.wait)
+        self.assertTrue(raised.exception.may_apply)
+
+    def test_queued_job_is_cancelled(self):
+        ran = []
+        self.writer.submit(self.release.wait)
+        with self.assertRaises(WriteTimeout) as raised:
+            run_write(ran.append, 1)
+        self.assertFalse(raised.exception.may_apply)
+        self.release.set()
+        self.assertEqual(run_write(len, 'ok'), 2)
+        self.assertEqual(ran, [])
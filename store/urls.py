@@ -6,6 +6,8 @@ from django.views.decorators.csrf import csrf_exempt
 urlpatterns = [
     path('foods/', views.FoodItemList.as_view()),
     path('foods/<int:pk>/', views.FoodItemDetail.as_view()),
+    path('foods/changes', views.food_changes),
+    path('foods/snapshot', views.food_snapshot),
     path('ask-ai/', views.ask_nutritionist),
     path('scan-food/', views.ScanFoodView.as_view()),
     path('profile/', views.user_profile_view),
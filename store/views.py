@@ -1,4 +1,4 @@
-from rest_framework.decorators import api_view, parser_classes, authentication_classes, permission_classes
+from rest_framework.decorators import api_view, parser_classes, authentication_classes, permission_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -7,34 +7,86 @@ from rest_framework import serializers
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.contrib.auth.models import User
+from django.db import IntegrityError
 from django.conf import settings
+from django.http import FileResponse, HttpResponse, JsonResponse
 import os
+import gzip
 import base64
+import functools
+from operator import attrgetter
 import json
 import time
 import requests 
 import re # <--- ADDED THIS FOR REGEX CLEANING
 
 # --- HYBRID LIBRARIES ---
-from openai import OpenAI  # For OpenRouter
-import google.generativeai as genai # For Google Direct
+# openai (OpenRouter) and google.generativeai (Google Direct) cost ~1.5s to import, so they
+# load on the first AI call (see google_sdk / openrouter_client), not in every worker and
+# manage.py command.
 
 # --- IMPORTS FROM YOUR APP ---
-from .models import FoodItem, UserProfile 
-from .serializers import FoodItemSerializer, UserProfileSerializer
+from .models import ChangeCounter, FoodItem, UserProfile 
+from .serializers import FoodItemSerializer, UserProfileSerializer, PROFILE_FIELDS, FOOD_FIELDS, encode_food_row, encode_profile_row
+from .renderers import ORJSONRenderer
+from .food_writer import record_scan
+from .sync import ResyncRequired, changes_since, latest_snapshot
+from .db_writer import WriteTimeout, run_write
+from .admission import CONNECT_TIMEOUT, Deadline, admission
+from . import cache
+from nutrichoice.observability import logger, provider_attempt, record_source, span
 
 # --- CONFIGURATION ---
 OPENROUTER_KEY = os.environ.get("OPENROUTER_API_KEY")
 HF_KEY = os.environ.get("HUGGINGFACE_API_KEY")
 GOOGLE_KEY = os.environ.get("GOOGLE_API_KEY") 
 
+# Provider endpoints. Point these at benchmarks/stub_llm.py to load-test without real quota.
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+GEMINI_API_ENDPOINT = os.environ.get("GEMINI_API_ENDPOINT")
+
 SITE_URL = "https://nutrichoice.onrender.com"
 APP_NAME = "NutriChoice"
 
+# --- HELPER: Lazy provider SDKs ---
+@functools.cache
+def google_sdk():
+    """google.generativeai, imported and configured on first use."""
+    import google.generativeai as genai
+    if GEMINI_API_ENDPOINT:
+        # A custom endpoint (e.g. the local stub) only works over REST, not gRPC
+        genai.configure(api_key=GOOGLE_KEY, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+    else:
+        genai.configure(api_key=GOOGLE_KEY)
+    return genai
+
+@functools.cache
+def openrouter_client():
+    """Shared OpenAI-compatible client for OpenRouter, created on first use."""
+    from openai import OpenAI
+    # No SDK retries: the provider chain is the retry, and the request deadline bounds it
+    return OpenAI(base_url=OPENROUTER_BASE_URL, api_key=OPENROUTER_KEY, max_retries=0)
+
+# --- HELPER: Structured output ---
+@functools.cache
+def ai_schemas():
+    """nutrichoice.ai_schemas; like the SDKs, pydantic (~0.2s) loads on the first AI call."""
+    from nutrichoice import ai_schemas
+    return ai_schemas
+
+def structured(name):
+    """The ai_schemas model to request, or None when STRUCTURED_OUTPUT is off."""
+    return getattr(ai_schemas(), name) if settings.STRUCTURED_OUTPUT else None
+
+def accept_reply(text, schema, attempt):
+    # Free-form mode (no schema) never loads pydantic
+    return text if schema is None else ai_schemas().accept_reply(text, schema, attempt, repair=safe_json_extract)
+
 # --- HELPER: Encode Image ---
 def encode_image(image_file):
-    image_file.seek(0)
-    return base64.b64encode(image_file.read()).decode('utf-8')
+    with span('image_encode'):
+        image_file.seek(0)
+        return base64.b64encode(image_file.read()).decode('utf-8')
 
 # --- HELPER: Robust JSON Extraction (UPDATED) ---
 def safe_json_extract(text):
@@ -61,76 +113,110 @@ def safe_json_extract(text):
 
         return json.loads(fixed_text)
     except Exception as e:
-        print(f"JSON Repair Failed: {e}")
+        logger.warning("JSON repair failed", extra={'error': str(e)[:200]})
         return None
 
+# --- HELPER: Roster post-processing ---
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def normalize_roster(json_data):
+    """Wraps bare day maps in weekly_schedule, fills missing days and sorts each day's events by time."""
+    if "weekly_schedule" not in json_data:
+        json_data = {"weekly_schedule": json_data}
+    
+    for d in WEEK_DAYS:
+        if d not in json_data["weekly_schedule"]:
+            json_data["weekly_schedule"][d] = []
+    
+    # Sort events
+    for day, events in json_data["weekly_schedule"].items():
+        if isinstance(events, list):
+            try:
+                events.sort(key=lambda x: str(x.get("time", "")))
+            except: pass
+    return json_data
+
+# Vision chain: Google Direct, then each OpenRouter model in turn
+OPENROUTER_VISION_MODELS = [
+    "qwen/qwen-2.5-vl-72b-instruct:free",    # 1. High Accuracy
+    "meta-llama/llama-3.2-11b-vision-instruct:free", # 2. Llama
+    "microsoft/phi-3.5-vision-instruct:free", # 3. Phi
+    "google/gemini-2.0-flash-exp:free",      # 4. Fallback Google via OR
+]
+
 # =========================================================================
 # LAYER 0: GOOGLE DIRECT (The Tank - 15 RPM Free)
 # =========================================================================
-def scan_with_google_direct(prompt, base64_img):
+def scan_with_google_direct(prompt, base64_img, deadline=None, schema=None):
     if not GOOGLE_KEY: 
-        print("Skipping Layer 0: GOOGLE_API_KEY not found.")
+        logger.warning("Skipping Layer 0: GOOGLE_API_KEY not found.")
         return None, None
+    deadline = deadline or Deadline(settings.AI_DEADLINE_SECONDS)
+    if deadline.expired(): return None, None
     
-    print("Trying Layer 0 (Google Direct)...")
     try:
-        genai.configure(api_key=GOOGLE_KEY)
-        # Use Flash 1.5 - Fast, Free, Vision-Native
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Google SDK expects a dict for image data
-        response = model.generate_content([
-            {'mime_type': 'image/jpeg', 'data': base64_img},
-            prompt
-        ])
-        
-        if response.text:
-            return response.text, "Google Gemini Direct"
+        with provider_attempt(0, "google-direct") as attempt:
+            # Use Flash 1.5 - Fast, Free, Vision-Native
+            model = google_sdk().GenerativeModel('gemini-1.5-flash')
             
-    except Exception as e:
-        print(f"Layer 0 (Google) Failed: {e}")
-        # Common Google Errors: 400 (Bad Request), 429 (Quota), 500
+            # Google SDK expects a dict for image data
+            response = model.generate_content([
+                {'mime_type': 'image/jpeg', 'data': base64_img},
+                prompt
+            ], generation_config=(
+                {'response_mime_type': 'application/json', 'response_schema': ai_schemas().gemini_schema(schema)} if schema else None
+            ), request_options={'timeout': deadline.attempt_timeout(1 + len(OPENROUTER_VISION_MODELS))})
+            
+            if response.text:
+                result = accept_reply(response.text, schema, attempt)
+                attempt['ok'] = True
+                return result, "Google Gemini Direct"
+            
+    except Exception:
+        # Logged by provider_attempt. Common Google Errors: 400 (Bad Request), 429 (Quota), 500
+        pass
         
     return None, None
 
 # =========================================================================
 # LAYER 1: OPENROUTER SWARM (The Backup)
 # =========================================================================
-def scan_with_openrouter(prompt, base64_img):
+def scan_with_openrouter(prompt, base64_img, deadline=None, schema=None):
     if not OPENROUTER_KEY: 
-        print("CRITICAL ERROR: OPENROUTER_API_KEY is missing!")
+        logger.error("OPENROUTER_API_KEY is missing!")
         return None, None
-    
-    # Expanded Swarm
-    models = [
-        "qwen/qwen-2.5-vl-72b-instruct:free",    # 1. High Accuracy
-        "meta-llama/llama-3.2-11b-vision-instruct:free", # 2. Llama
-        "microsoft/phi-3.5-vision-instruct:free", # 3. Phi
-        "google/gemini-2.0-flash-exp:free",      # 4. Fallback Google via OR
-    ]
+    deadline = deadline or Deadline(settings.AI_DEADLINE_SECONDS)
 
-    client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=OPENROUTER_KEY)
+    client = openrouter_client()
 
-    for model in models:
+    models = OPENROUTER_VISION_MODELS
+    # JSON mode rather than json_schema: not every free vision model behind OpenRouter takes a
+    # schema. The shape is checked by accept_reply; an invalid reply moves on to the next model.
+    extra = {'response_format': {'type': 'json_object'}} if schema else {}
+    for i, model in enumerate(models):
+        if deadline.expired(): break
         try:
-            print(f"Trying Layer 1 (OpenRouter): {model}...")
-            completion = client.chat.completions.create(
-                extra_headers={"HTTP-Referer": SITE_URL, "X-Title": APP_NAME},
-                model=model,
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_img}"}}
-                    ]
-                }]
-            )
-            return completion.choices[0].message.content, f"OpenRouter {model}"
+            with provider_attempt(1, model) as attempt:
+                completion = client.chat.completions.create(
+                    extra_headers={"HTTP-Referer": SITE_URL, "X-Title": APP_NAME},
+                    model=model,
+                    messages=[{
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": prompt},
+                            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_img}"}}
+                        ]
+                    }],
+                    timeout=deadline.attempt_timeout(len(models) - i),
+                    **extra,
+                )
+                result = accept_reply(completion.choices[0].message.content, schema, attempt)
+                attempt['ok'] = True
+                return result, f"OpenRouter {model}"
         except Exception as e:
             err_str = str(e)
-            print(f"Model {model} failed. Reason: {err_str[:50]}...")
             if "401" in err_str: break 
-            time.sleep(0.5)
+            time.sleep(min(0.5, deadline.remaining()))
             continue 
             
     return None, None
@@ -139,18 +225,19 @@ def scan_with_openrouter(prompt, base64_img):
 # 1. DIAGNOSTIC ENDPOINT
 # ==========================================
 @csrf_exempt 
+@admission('ai_check')
 @api_view(['GET'])
 @authentication_classes([])
 @permission_classes([])
 def ai_status_check(request):
     results = {}
+    deadline = request.deadline
     
     # Check Google Direct
     if GOOGLE_KEY:
         try:
-            genai.configure(api_key=GOOGLE_KEY)
-            m = genai.GenerativeModel('gemini-1.5-flash')
-            m.generate_content("Ping")
+            m = google_sdk().GenerativeModel('gemini-1.5-flash')
+            m.generate_content("Ping", request_options={'timeout': deadline.attempt_timeout(3)})
             results["GoogleDirect"] = "SUCCESS"
         except Exception as e: results["GoogleDirect"] = f"FAILED: {str(e)[:50]}"
     else: results["GoogleDirect"] = "MISSING KEY"
@@ -158,10 +245,11 @@ def ai_status_check(request):
     # Check OpenRouter
     if OPENROUTER_KEY:
         try:
-            client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=OPENROUTER_KEY)
+            client = openrouter_client()
             client.chat.completions.create(
                 model="microsoft/phi-3.5-vision-instruct:free", 
-                messages=[{"role": "user", "content": "Hi"}]
+                messages=[{"role": "user", "content": "Hi"}],
+                timeout=deadline.attempt_timeout(2),
             )
             results["OpenRouter"] = "SUCCESS"
         except Exception as e:
@@ -172,7 +260,8 @@ def ai_status_check(request):
     # Check HF (Account Only)
     if HF_KEY:
         try:
-            r = requests.get("https://huggingface.co/api/whoami-v2", headers={"Authorization": f"Bearer {HF_KEY}"})
+            r = requests.get("https://huggingface.co/api/whoami-v2", headers={"Authorization": f"Bearer {HF_KEY}"},
+                             timeout=(CONNECT_TIMEOUT, deadline.attempt_timeout(1)))
             if r.status_code == 200: results["HuggingFace"] = "SUCCESS"
             else: results["HuggingFace"] = f"FAILED: {r.status_code}"
         except: results["HuggingFace"] = "FAILED: Connection"
@@ -189,6 +278,7 @@ class AnalyzeRosterView(APIView):
     authentication_classes = []
     permission_classes = []
 
+    @method_decorator(admission('analyze_roster'))
     def post(self, request, *args, **kwargs):
         if 'file' not in request.FILES: return Response({"error": "No file"}, status=400)
         image_file = request.FILES['file']
@@ -205,44 +295,37 @@ class AnalyzeRosterView(APIView):
         4. Do not include comments or trailing commas.
         """
 
-        print("--- STARTING SCAN ---")
+        schema = structured('RosterResult')
 
         # 1. TRY GOOGLE DIRECT (Best Chance)
-        data, source = scan_with_google_direct(prompt, base64_img)
+        data, source = scan_with_google_direct(prompt, base64_img, request.deadline, schema)
 
         # 2. TRY OPENROUTER SWARM (Backup)
         if not data:
-            data, source = scan_with_openrouter(prompt, base64_img)
+            data, source = scan_with_openrouter(prompt, base64_img, request.deadline, schema)
 
-        print(f"DEBUG: Source used: {source}")
+        logger.info("roster scan", extra={'ai_source': source})
         
         if not data:
+             record_source('analyze_roster', None, fallback='all_providers_failed')
              return Response({"error": "All AI Services Busy. Try again in 1 min."}, status=503)
 
         try:
-            # Use updated robust extractor
-            json_data = safe_json_extract(data)
+            if schema:
+                json_data = data  # validated by the provider layer
+            else:
+                # Use updated robust extractor
+                with span('json_repair'):
+                    json_data = safe_json_extract(data)
             
             if json_data:
-                if "weekly_schedule" not in json_data:
-                    json_data = {"weekly_schedule": json_data}
-                
-                days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-                for d in days:
-                    if d not in json_data["weekly_schedule"]:
-                        json_data["weekly_schedule"][d] = []
-                
-                # Sort events
-                for day, events in json_data["weekly_schedule"].items():
-                    if isinstance(events, list):
-                        try:
-                            events.sort(key=lambda x: str(x.get("time", "")))
-                        except: pass
-
+                json_data = normalize_roster(json_data)
                 json_data['ai_source'] = source
+                record_source('analyze_roster', source)
                 return Response(json_data)
 
             # Raw Fallback
+            record_source('analyze_roster', source, fallback='raw_mode')
             clean_text = str(data)[:200].replace('"', '')
             return Response({
                 "weekly_schedule": {
@@ -253,25 +336,106 @@ class AnalyzeRosterView(APIView):
             })
 
         except Exception as e:
-            print(f"Parsing Error: {e}")
+            logger.exception("Roster parsing error")
             return Response({"error": "Failed to parse result."}, status=500)
 
 # ==========================================
 # 3. STANDARD VIEWS
 # ==========================================
-class FoodItemList(ListCreateAPIView):
+def wants_fast_reads(request):
+    """Opt-in fast read mode: FAST_READS setting, or ?fast=1 per request."""
+    return settings.FAST_READS or request.query_params.get('fast') == '1'
+
+class FastReadMixin:
+    # Reads skip ModelSerializer and DRF's JSONRenderer; writes still validate through the serializer
+    def get_renderers(self):
+        if self.request.method == 'GET' and wants_fast_reads(self.request):
+            return [ORJSONRenderer()]
+        return super().get_renderers()
+
+class FoodItemList(FastReadMixin, ListCreateAPIView):
     queryset = FoodItem.objects.all()
     serializer_class = FoodItemSerializer
     authentication_classes = [] 
     permission_classes = []
 
-class FoodItemDetail(RetrieveUpdateDestroyAPIView):
+    def list(self, request, *args, **kwargs):
+        # Keyed on the query string so filtered/paginated pages cache separately
+        key = cache.list_key(cache.FOODS, request.META.get('QUERY_STRING', ''))
+        if wants_fast_reads(request):
+            qs = self.filter_queryset(self.get_queryset())
+            loader = lambda: list(map(encode_food_row, qs.values_list(*FOOD_FIELDS)))
+        else:
+            loader = lambda: super(FoodItemList, self).list(request, *args, **kwargs).data
+        return Response(cache.read_through(key, loader))
+
+class FoodItemDetail(FastReadMixin, RetrieveUpdateDestroyAPIView):
     queryset = FoodItem.objects.all()
     serializer_class = FoodItemSerializer
     authentication_classes = []
     permission_classes = []
 
+    def retrieve(self, request, *args, **kwargs):
+        key = cache.object_key(cache.FOODS, kwargs['pk'])
+        if wants_fast_reads(request):
+            loader = lambda: self._fast_row(kwargs['pk'])
+        else:
+            loader = lambda: super(FoodItemDetail, self).retrieve(request, *args, **kwargs).data
+        data = cache.read_through(key, loader)
+        if data is None: return Response({"detail": "No FoodItem matches the given query."}, status=404)
+        return Response(data)
+
+    def _fast_row(self, pk):
+        row = self.get_queryset().filter(pk=pk).values_list(*FOOD_FIELDS).first()
+        return encode_food_row(row) if row else None
+
+# ==========================================
+# 4. FOOD DELTA SYNC (store/sync.py)
+# ==========================================
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([])
+@renderer_classes([ORJSONRenderer])
+def food_changes(request):
+    try:
+        since = int(request.query_params.get('since', 0))
+        limit = int(request.query_params.get('limit', settings.FOOD_SYNC_PAGE_SIZE))
+    except ValueError:
+        return Response({"error": "since and limit must be integers"}, status=400)
+    if since < 0 or limit < 1:
+        return Response({"error": "since must be >= 0 and limit >= 1"}, status=400)
+    limit = min(limit, settings.FOOD_SYNC_PAGE_SIZE)
+
+    # Keyed on the head version, so a cached page never goes stale and needs no invalidation
+    head = ChangeCounter.current(ChangeCounter.FOODS)
+    try:
+        data = cache.read_through(f'{cache.FOODS}:changes:{since}:{limit}:{head}',
+                                  lambda: changes_since(since, limit, head))
+    except ResyncRequired:
+        return Response({"error": "Too far behind; bootstrap from the snapshot", "snapshot": "/api/foods/snapshot"},
+                        status=410)
+    return Response(data)
+
+def food_snapshot(request):
+    version, path = latest_snapshot()
+    if version is None:
+        # Written only by the periodic `snapshot_foods` job, never in the request thread
+        return JsonResponse({"error": "No snapshot yet; run manage.py snapshot_foods"}, status=503,
+                            headers={'Retry-After': '60'})
+    etag = f'"foods-{version}"'
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={settings.FOOD_SNAPSHOT_MAX_AGE}', 'Vary': 'Accept-Encoding'}
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponse(status=304, headers=headers)
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = FileResponse(open(path, 'rb'), content_type='application/json', headers=headers)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = FileResponse(gzip.open(path, 'rb'), content_type='application/json', headers=headers)
+    response['X-Sync-Version'] = str(version)
+    return response
+
 @csrf_exempt
+@admission('ask_ai')
 @api_view(['POST'])
 def ask_nutritionist(request):
     q = request.data.get('question')
@@ -279,17 +443,17 @@ def ask_nutritionist(request):
     try:
         # Prefer Google for Q&A (Faster)
         if GOOGLE_KEY:
-            genai.configure(api_key=GOOGLE_KEY)
-            m = genai.GenerativeModel('gemini-1.5-flash')
-            resp = m.generate_content(q)
+            m = google_sdk().GenerativeModel('gemini-1.5-flash')
+            resp = m.generate_content(q, request_options={'timeout': request.deadline.attempt_timeout(1)})
             return Response({"answer": resp.text})
         
         # Fallback to OpenRouter
-        client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=OPENROUTER_KEY)
+        client = openrouter_client()
         resp = client.chat.completions.create(
             model="google/gemini-2.0-flash-exp:free", 
             messages=[{"role": "user", "content": q}],
-            extra_headers={"HTTP-Referer": SITE_URL, "X-Title": APP_NAME}
+            extra_headers={"HTTP-Referer": SITE_URL, "X-Title": APP_NAME},
+            timeout=request.deadline.attempt_timeout(1),
         )
         return Response({"answer": resp.choices[0].message.content})
     except: return Response({"error": "AI Error"}, 500)
@@ -300,45 +464,95 @@ class ScanFoodView(APIView):
     authentication_classes = []
     permission_classes = []
 
+    @method_decorator(admission('scan_food'))
     def post(self, request):
         if 'image' not in request.FILES: return Response({"error": "No image"}, 400)
         img = request.FILES['image']
         b64 = encode_image(img)
         prompt = """Identify food. JSON: { "food_name": "...", "estimated_calories": 0, "protein": 0, "carbs": 0, "fat": 0 }"""
         
+        schema = structured('FoodScanResult')
+        
         # 1. Google Direct
-        data, source = scan_with_google_direct(prompt, b64)
+        data, source = scan_with_google_direct(prompt, b64, request.deadline, schema)
         # 2. OpenRouter Fallback
-        if not data: data, source = scan_with_openrouter(prompt, b64)
+        if not data: data, source = scan_with_openrouter(prompt, b64, request.deadline, schema)
         
         if data:
             try:
-                j = safe_json_extract(data)
+                if schema: j = data  # validated by the provider layer
+                else:
+                    with span('json_repair'):
+                        j = safe_json_extract(data)
                 if j:
-                    FoodItem.objects.create(name=j.get('food_name','?'), calories=j.get('estimated_calories',0))
+                    # Deduped + batched: repeat scans update one canonical row instead of inserting
+                    record_scan(j)
+                    record_source('scan_food', source)
                     return Response({"message": "Success", "saved_data": j})
-            except: pass
+            except Exception: logger.exception("Scan save failed")
+        record_source('scan_food', source, fallback='scan_failed')
         return Response({"error": "Scan failed"}, 500)
 
+def _get_owner_profile():
+    user = User.objects.first()
+    if not user and settings.DEBUG:
+        user = run_write(_create_dev_admin)
+    if not user: return None
+
+    profile = UserProfile.objects.filter(user=user).first()
+    if profile is None:
+        profile = run_write(_create_owner_profile, user)
+    return profile
+
+def _create_dev_admin():
+    # On the writer thread; re-check, another request may have created it while we queued
+    try: return User.objects.first() or User.objects.create_superuser('admin', 'admin@example.com', 'admin123')
+    except IntegrityError: return User.objects.first()
+
+def _create_owner_profile(user):
+    # Placeholder body stats until onboarding posts the real ones (both columns are NOT NULL)
+    profile, _ = UserProfile.objects.get_or_create(user=user, defaults={'current_weight': 70.0, 'height': 170})
+    return profile
+
+def _load_owner_profile_data():
+    profile = _get_owner_profile()
+    return UserProfileSerializer(profile).data if profile else None
+
+def _load_owner_profile_row():
+    # Same owner lookup (get_or_create needs the instance anyway), minus the serializer
+    profile = _get_owner_profile()
+    return encode_profile_row(attrgetter(*PROFILE_FIELDS)(profile)) if profile else None
+
 @csrf_exempt
 @api_view(['POST', 'GET'])
 @authentication_classes([])
 @permission_classes([])
 def user_profile_view(request):
-    if settings.DEBUG and not User.objects.exists():
-        try: User.objects.create_superuser('admin', 'admin@example.com', 'admin123')
-        except: pass 
-    
-    user = User.objects.first()
-    if not user: return Response({"error": "No users found"}, status=404)
-
-    profile, _ = UserProfile.objects.get_or_create(user=user)
-    if request.method == 'GET': return Response(UserProfileSerializer(profile).data)
+    if request.method == 'GET':
+        if wants_fast_reads(request):
+            request.accepted_renderer, request.accepted_media_type = ORJSONRenderer(), ORJSONRenderer.media_type
+        # Both loaders produce the same dict, so they share one cache entry
+        loader = _load_owner_profile_row if wants_fast_reads(request) else _load_owner_profile_data
+        data = cache.read_through(cache.object_key(cache.PROFILE, 'owner'), loader)
+        if data is None: return Response({"error": "No users found"}, status=404)
+        return Response(data)
+
+    profile = _get_owner_profile()
+    if not profile: return Response({"error": "No users found"}, status=404)
     if request.method == 'POST':
         serializer = UserProfileSerializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            return Response({"message": "Updated"})
+            try:
+                with span('db_write'):
+                    run_write(serializer.save)
+            except WriteTimeout as e:
+                return Response({"error": str(e)}, status=503)
+            # Targets were recomputed by the save; onboarding reads calculated_calories
+            return Response({
+                "message": "Updated",
+                "calculated_calories": profile.daily_calorie_target,
+                "targets": {f: getattr(profile, f) for f in ('daily_calorie_target', 'protein_target', 'carbs_target', 'fat_target')},
+            })
         return Response(serializer.errors, status=400)
 
 @csrf_exempt
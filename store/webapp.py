@@ -0,0 +1,55 @@
+import functools
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+# The Flutter web build is collected (manage.py collectweb) into STATIC_ROOT/web/<build id>/,
+# where the build id is a hash of the whole build. Flutter's loader builds asset URLs at
+# runtime from fixed names (main.dart.js, assets/AssetManifest.bin, ...), so the hash goes
+# in the directory rather than in each filename; index.html's <base href> picks the build.
+WEB_BUILD_PREFIX = 'web/'
+BUILD_ID_LENGTH = 12
+BUILD_ID_RE = re.compile(r'[0-9a-f]{%d}' % BUILD_ID_LENGTH)
+
+
+def build_id(root):
+    """Content hash of every file (name and bytes) under `root`."""
+    digest = hashlib.sha256()
+    for path in sorted(build_files(root)):
+        digest.update(os.path.relpath(path, root).replace(os.sep, '/').encode() + b'\0')
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+    return digest.hexdigest()[:BUILD_ID_LENGTH]
+
+
+def build_files(root):
+    for directory, _, names in os.walk(root):
+        for name in names:
+            yield os.path.join(directory, name)
+
+
+def builds_dir():
+    return os.path.join(settings.STATIC_ROOT, WEB_BUILD_PREFIX)
+
+
+def build_url(build):
+    """Absolute URL of a collected build's directory, used as index.html's <base href>."""
+    return '/' + settings.STATIC_URL.strip('/') + '/' + WEB_BUILD_PREFIX + build + '/'
+
+
+class WebAppWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that also caches everything under a collected build forever."""
+
+    # Lazy: without autorefresh, WhiteNoiseMiddleware.__init__ scans STATIC_ROOT (calling
+    # immutable_file_test) before it returns, though after it has set static_prefix
+    @functools.cached_property
+    def web_build_re(self):
+        return re.compile(r'^' + re.escape(self.static_prefix + WEB_BUILD_PREFIX) + BUILD_ID_RE.pattern + '/')
+
+    def immutable_file_test(self, path, url):
+        return bool(self.web_build_re.match(url)) or super().immutable_file_test(path, url)